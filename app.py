@@ -0,0 +1,279 @@
+# Plik: app.py
+# Serwer API dla chart.js (Procfile: gunicorn app:app, zależności: requirements.txt).
+#
+# Endpointy:
+#   GET /api/data/<TICKER>?from=...&to=...  - notowania z magazynu data/ (price_store),
+#                                             from/to jako RRRR-MM-DD lub znacznik czasu (s)
+#   GET /api/forecasts[?ticker=...]          - wiersze wig_company_forecasts
+#   GET /api/indicators[?ticker=...]         - wiersze wig_indicators_summary
+#   GET /data/<plik>[?v=hash]                - pliki statyczne z data/ w wariancie .br/.gz przygotowanym
+#                                             przez artifacts.py; adresy z ?v= są cache'owane bezterminowo
+#
+# Nic nie jest pobierane z sieci w trakcie zapytania. Gotowe odpowiedzi (JSON, wersja gzip
+# i ETag) trzyma w pamięci cache LRU ograniczony rozmiarem w bajtach. Wpis jest ważny, dopóki
+# nie zmieni się plik źródłowy: manifest tickera (przepisywany przez data_fetcher przy każdej
+# zmianie danych), stary plik data/{TICKER}.json albo eksport CSV tabeli.
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+import pandas as pd
+from flask import Flask, Response, request, send_file
+from werkzeug.security import safe_join
+
+import price_store
+from constants import INDEX_TICKERS
+
+DATA_DIR = os.environ.get('DATA_DIR', price_store.DATA_DIR)
+CACHE_MAX_BYTES = int(os.environ.get('API_CACHE_MB', '64')) * 1024 * 1024
+GZIP_MIN_SIZE = 1024            # Mniejszych odpowiedzi nie opłaca się kompresować
+GZIP_LEVEL = 6
+CACHE_CONTROL = 'public, max-age=60'
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+TABLE_TTL = 300                 # Jak długo (s) ufamy tabelom czytanym z bazy danych
+
+_db_engine = None
+_db_engine_lock = threading.Lock()
+
+# Tabele wig_*: eksport CSV w katalogu repozytorium lub - gdy ustawiono DB_URL - baza danych
+TABLES = {
+    'forecasts': ('wig_company_forecasts', 'wig_company_forecasts.csv'),
+    'indicators': ('wig_indicators_summary', 'wig_indicators_summary.csv'),
+}
+
+
+class ResponseCache:
+    """
+    Cache gotowych odpowiedzi z wyrzucaniem najdawniej używanych (LRU) po przekroczeniu
+    limitu bajtów. Każdy wpis ma wersję źródła - wpis o innej wersji jest nieaktualny.
+    """
+    def __init__(self, max_bytes=CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, version):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry['version'] != version:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, version, body):
+        entry = {'version': version, 'body': body, 'etag': hashlib.md5(body).hexdigest(), 'gzip': None, 'size': len(body)}
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size -= old['size']
+            if entry['size'] <= self.max_bytes:
+                self._entries[key] = entry
+                self.size += entry['size']
+            self._evict()
+        return entry
+
+    def gzip_body(self, key, entry):
+        """Zwraca skompresowaną treść wpisu; kompresja odbywa się raz, przy pierwszej potrzebie."""
+        if entry['gzip'] is None:
+            compressed = gzip.compress(entry['body'], GZIP_LEVEL)
+            with self._lock:
+                if entry['gzip'] is None:
+                    entry['gzip'] = compressed
+                    entry['size'] += len(compressed)
+                    if self._entries.get(key) is entry:
+                        self.size += len(compressed)
+                        self._evict()
+        return entry['gzip']
+
+    def _evict(self):
+        while self.size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.size -= evicted['size']
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'bytes': self.size, 'hits': self.hits, 'misses': self.misses}
+
+
+# === ŹRÓDŁA DANYCH ===
+
+def ticker_version(ticker, data_dir=DATA_DIR):
+    """Wersja danych tickera (czas modyfikacji i rozmiar manifestu lub starego pliku) albo None."""
+    for path in (os.path.join(price_store.ticker_dir(ticker, data_dir), price_store.MANIFEST_FILE),
+                 price_store.legacy_path(ticker, data_dir)):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        return (path, stat.st_mtime_ns, stat.st_size)
+    return None
+
+
+def parse_time(value, end_of_day=False):
+    """Zamienia RRRR-MM-DD lub znacznik czasu (s) na sekundy; None, gdy brak wartości."""
+    if value is None or value == '':
+        return None
+    if value.lstrip('-').isdigit():
+        return int(value)
+    day = datetime.strptime(value, '%Y-%m-%d').replace(tzinfo=timezone.utc)
+    return int(day.timestamp()) + (86399 if end_of_day else 0)
+
+
+def render_bars(ticker, start, end, data_dir=DATA_DIR):
+    """Serializuje notowania z zakresu [start, end] w formacie partycji JSON (lista świec)."""
+    if price_store.load_manifest(ticker, data_dir) is not None:
+        columns = price_store.read_range(ticker, start, end, data_dir, as_frame=False)
+    else:
+        df = price_store.load_bars(ticker, data_dir)
+        if start is not None:
+            df = df[df['time'] >= start]
+        if end is not None:
+            df = df[df['time'] <= end]
+        columns = {name: df[name].to_numpy() for name in price_store.PRICE_COLUMNS}
+    names = list(columns)
+    rows = zip(*(columns[name].tolist() for name in names))
+    return json.dumps([dict(zip(names, row)) for row in rows], separators=(',', ':')).encode('utf-8')
+
+
+def table_version(name, base_dir):
+    """Wersja tabeli: czas modyfikacji eksportu CSV albo przedział TTL dla bazy danych."""
+    if os.environ.get('DB_URL'):
+        return ('db', int(time.time() // TABLE_TTL))
+    path = os.path.join(base_dir, TABLES[name][1])
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (path, stat.st_mtime_ns, stat.st_size)
+
+
+def db_engine():
+    """Silnik SQLAlchemy dla DB_URL, tworzony przy pierwszym użyciu i współdzielony (pula połączeń)."""
+    global _db_engine
+    with _db_engine_lock:
+        if _db_engine is None:
+            from sqlalchemy import create_engine
+            _db_engine = create_engine(os.environ['DB_URL'], pool_pre_ping=True)
+        return _db_engine
+
+
+def render_table(name, ticker, base_dir):
+    table, csv_file = TABLES[name]
+    if os.environ.get('DB_URL'):
+        df = pd.read_sql_table(table, db_engine())
+    else:
+        df = pd.read_csv(os.path.join(base_dir, csv_file), keep_default_na=False, na_values=['NULL', ''])
+    if ticker:
+        df = df[df['Ticker'].astype(str).str.upper() == ticker]
+    return df.to_json(orient='records', force_ascii=False).encode('utf-8')
+
+
+# === APLIKACJA ===
+
+def create_app(data_dir=DATA_DIR, base_dir=None, cache_bytes=CACHE_MAX_BYTES, warm_up=True):
+    app = Flask(__name__)
+    base_dir = base_dir or os.path.dirname(os.path.abspath(__file__))
+    cache = ResponseCache(cache_bytes)
+    app.extensions['response_cache'] = cache
+
+    def cached_response(key, version, render):
+        entry = cache.get(key, version)
+        if entry is None:
+            entry = cache.put(key, version, render())
+        use_gzip = len(entry['body']) >= GZIP_MIN_SIZE and 'gzip' in request.headers.get('Accept-Encoding', '')
+        body = cache.gzip_body(key, entry) if use_gzip else entry['body']
+        response = Response(body, mimetype='application/json')
+        response.set_etag(entry['etag'] + ('-gz' if use_gzip else ''))
+        if use_gzip:
+            response.headers['Content-Encoding'] = 'gzip'
+        response.headers['Vary'] = 'Accept-Encoding'
+        response.headers['Cache-Control'] = CACHE_CONTROL
+        return response.make_conditional(request)
+
+    def error(message, status):
+        return Response(json.dumps({'error': message}), status=status, mimetype='application/json')
+
+    @app.after_request
+    def allow_cross_origin(response):
+        # Frontend jest serwowany z innej domeny niż API
+        response.headers['Access-Control-Allow-Origin'] = '*'
+        response.headers['Access-Control-Expose-Headers'] = 'ETag'
+        return response
+
+    @app.route('/api/data/<ticker>')
+    def price_data(ticker):
+        ticker = ticker.strip().upper()
+        try:
+            start = parse_time(request.args.get('from'))
+            end = parse_time(request.args.get('to'), end_of_day=True)
+        except ValueError:
+            return error("Parametry 'from' i 'to' muszą mieć format RRRR-MM-DD lub być znacznikiem czasu.", 400)
+        version = ticker_version(ticker, data_dir)
+        if version is None:
+            return error(f"Brak danych dla tickera {ticker}.", 404)
+        return cached_response(('data', ticker, start, end), version, lambda: render_bars(ticker, start, end, data_dir))
+
+    def table_endpoint(name):
+        ticker = request.args.get('ticker', '').strip().upper() or None
+        version = table_version(name, base_dir)
+        if version is None:
+            return error(f"Brak tabeli {TABLES[name][0]}.", 404)
+        return cached_response(('table', name, ticker), version, lambda: render_table(name, ticker, base_dir))
+
+    app.add_url_rule('/api/forecasts', 'forecasts', lambda: table_endpoint('forecasts'))
+    app.add_url_rule('/api/indicators', 'indicators', lambda: table_endpoint('indicators'))
+
+    @app.route('/data/<path:filename>')
+    def static_data(filename):
+        path = safe_join(data_dir, filename)
+        if path is None or not os.path.isfile(path):
+            return error("Nie znaleziono pliku.", 404)
+        accepted = request.headers.get('Accept-Encoding', '')
+        encoding = None
+        for name, ext in (('br', '.br'), ('gzip', '.gz')):
+            if name in accepted and os.path.isfile(path + ext):
+                encoding, path = name, path + ext
+                break
+        response = send_file(path, mimetype='application/json' if filename.endswith('.json') else None,
+                             conditional=True, etag=True)
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        response.headers['Vary'] = 'Accept-Encoding'
+        # Adres z ?v=hash wskazuje niezmienną treść; bez niego przeglądarka musi pytać o zmiany
+        response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL if request.args.get('v') else 'no-cache'
+        return response
+
+    @app.route('/api/cache')
+    def cache_stats():
+        return Response(json.dumps(cache.stats()), mimetype='application/json')
+
+    if warm_up:
+        threading.Thread(target=warm_up_cache, args=(cache, data_dir), daemon=True).start()
+    return app
+
+
+def warm_up_cache(cache, data_dir=DATA_DIR, tickers=INDEX_TICKERS):
+    """Wypełnia cache pełną historią indeksów (najczęściej otwierane wykresy)."""
+    for ticker in tickers:
+        version = ticker_version(ticker, data_dir)
+        if version is None:
+            continue
+        try:
+            cache.put(('data', ticker, None, None), version, render_bars(ticker, None, None, data_dir))
+        except Exception as e:
+            logging.warning(f"Nie udało się wczytać {ticker} do cache: {e}")
+
+
+app = create_app(warm_up=os.environ.get('API_WARM_UP', '1') != '0')
@@ -0,0 +1,191 @@
+# Plik: artifacts.py
+# Wersjonowanie i wstępna kompresja plików JSON z katalogu data/ serwowanych frontendowi.
+#
+# Dla każdego pliku {nazwa}.json obok powstają {nazwa}.json.gz i (jeśli zainstalowano pakiet
+# brotli) {nazwa}.json.br - tylko wtedy, gdy zmienił się skrót zawartości. Skróty i rozmiary
+# trafiają do:
+#   data/{TICKER}/manifest.json   - klucz 'files': {plik: {hash, size, gzip, br}}
+#   data/manifest.json            - jeden plik dla całej strony: ticker -> skrót manifestu tickera
+#                                   (lub starego pliku data/{TICKER}.json), rozmiary, czas ostatniej świecy
+# Frontend pobiera data/manifest.json bez cache, a wszystkie pozostałe pliki pod adresami
+# z ?v={hash}, które można trzymać w cache bezterminowo - niezmieniony ticker nie jest pobierany
+# ponownie.
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+
+import price_store
+
+try:
+    import brotli
+except ImportError:         # Opcjonalne - bez brotli powstają tylko warianty gzip
+    brotli = None
+
+DATA_MANIFEST = 'manifest.json'
+SITE_FILES = {DATA_MANIFEST, 'screener.json'}     # Pliki w data/ niebędące tickerami (patrz screener.py)
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 11
+COMPRESSED_EXTENSIONS = ('.gz', '.br')
+
+
+def content_hash(body):
+    return hashlib.blake2b(body, digest_size=8).hexdigest()
+
+
+def compress_file(path, body=None):
+    """Zapisuje warianty .gz i .br pliku; zwraca ich rozmiary (None, gdy brak brotli)."""
+    if body is None:
+        with open(path, 'rb') as f:
+            body = f.read()
+    sizes = {'gzip': price_store.write_atomic(path + '.gz', gzip.compress(body, GZIP_LEVEL, mtime=0)), 'br': None}
+    if brotli is not None:
+        sizes['br'] = price_store.write_atomic(path + '.br', brotli.compress(body, quality=BROTLI_QUALITY))
+    elif os.path.exists(path + '.br'):
+        os.remove(path + '.br')     # Nieaktualny wariant po odinstalowaniu brotli
+    return sizes
+
+
+def _remove_variants(path):
+    for ext in COMPRESSED_EXTENSIONS:
+        if os.path.exists(path + ext):
+            os.remove(path + ext)
+
+
+def file_entry(path, previous=None):
+    """Opis pliku {hash, size, gzip, br}; kompresuje tylko, gdy zmienił się skrót lub brakuje wariantu."""
+    with open(path, 'rb') as f:
+        body = f.read()
+    digest = content_hash(body)
+    if (previous and previous.get('hash') == digest and os.path.exists(path + '.gz')
+            and (brotli is None or os.path.exists(path + '.br'))):
+        return previous
+    return {'hash': digest, 'size': len(body), **compress_file(path, body)}
+
+
+# === TICKERY ===
+
+def publish_ticker(ticker, data_dir=price_store.DATA_DIR, changed=None):
+    """
+    Aktualizuje skróty i warianty skompresowane plików tickera. `changed` to lista ścieżek
+    zwróconych przez price_store/indicators/rollups - pozostałe pliki nie są czytane;
+    None = sprawdź wszystkie. Zwraca wpis tickera do data/manifest.json albo None.
+    """
+    directory = price_store.ticker_dir(ticker, data_dir)
+    manifest_path = os.path.join(directory, price_store.MANIFEST_FILE)
+    legacy = price_store.legacy_path(ticker, data_dir)
+    previous = load_data_manifest(data_dir).get('tickers', {}).get(ticker.upper())
+    if not os.path.exists(manifest_path):
+        if not os.path.exists(legacy):
+            return None
+        entry = file_entry(legacy, previous)
+        return {**entry, 'file': os.path.basename(legacy), 'last_time': price_store.last_time(ticker, data_dir)}
+    if not os.path.exists(legacy):
+        _remove_variants(legacy)    # Stary plik zmigrowany przez price_store.save_bars
+
+    manifest = price_store.load_manifest(ticker, data_dir)
+    files = dict(manifest.get('files', {}))
+    names = sorted(n for n in os.listdir(directory) if n.endswith('.json') and n != price_store.MANIFEST_FILE)
+    touched = None if changed is None else {os.path.basename(p) for p in changed}
+    for name in names:
+        if touched is None or name in touched or name not in files:
+            files[name] = file_entry(os.path.join(directory, name), files.get(name))
+    for name in set(files) - set(names):
+        del files[name]
+        _remove_variants(os.path.join(directory, name))
+    for name in os.listdir(directory):
+        base, ext = os.path.splitext(name)
+        if ext in COMPRESSED_EXTENSIONS and base.endswith('.json') and not os.path.exists(os.path.join(directory, base)):
+            os.remove(os.path.join(directory, name))
+
+    if files != manifest.get('files'):
+        manifest['files'] = files
+        price_store.save_manifest(ticker, manifest, data_dir)
+    # Poprzedni wpis w data/manifest.json ma skrót manifestu tickera - bez zmian nie kompresujemy go ponownie
+    entry = file_entry(manifest_path, previous)
+    return {
+        'hash': entry['hash'],
+        'file': f'{ticker.upper()}/{price_store.MANIFEST_FILE}',
+        'size': sum(f['size'] for f in files.values()),
+        'gzip': sum(f['gzip'] for f in files.values()),
+        'br': sum(f['br'] for f in files.values()) if brotli is not None else None,
+        'last_time': manifest.get('last_time'),
+    }
+
+
+_cached_manifest = {}
+
+
+def load_data_manifest(data_dir=price_store.DATA_DIR):
+    """Zawartość data/manifest.json (czytana raz na zmianę pliku)."""
+    path = os.path.join(data_dir, DATA_MANIFEST)
+    try:
+        stamp = os.stat(path).st_mtime_ns
+    except OSError:
+        return {}
+    cached = _cached_manifest.get(path)
+    if cached is None or cached[0] != stamp:
+        with open(path) as f:
+            cached = (stamp, json.load(f))
+        _cached_manifest[path] = cached
+    return cached[1]
+
+
+def write_data_manifest(entries, data_dir=price_store.DATA_DIR):
+    """
+    Zapisuje data/manifest.json z wpisami {ticker: wpis} (wpisy pozostałych tickerów
+    są zachowywane, None usuwa ticker). Zwraca ścieżkę, gdy plik się zmienił.
+    """
+    path = os.path.join(data_dir, DATA_MANIFEST)
+    tickers = dict(load_data_manifest(data_dir).get('tickers', {}))
+    for ticker, entry in entries.items():
+        if entry is None:
+            tickers.pop(ticker.upper(), None)
+        else:
+            tickers[ticker.upper()] = entry
+    body = json.dumps({'tickers': dict(sorted(tickers.items()))}, separators=(',', ':')).encode('utf-8')
+    if os.path.exists(path):
+        with open(path, 'rb') as f:
+            if f.read() == body:
+                return None
+    price_store.write_atomic(path, body)
+    compress_file(path, body)
+    return path
+
+
+def list_tickers(data_dir=price_store.DATA_DIR):
+    """Tickery obecne w katalogu danych (z partycjami lub w starym formacie)."""
+    tickers = set()
+    for name in os.listdir(data_dir):
+        if os.path.isdir(os.path.join(data_dir, name)):
+            tickers.add(name.upper())
+        elif name.endswith('.json') and name not in SITE_FILES:
+            tickers.add(name[:-len('.json')].upper())
+    return sorted(tickers)
+
+
+def publish_all(data_dir=price_store.DATA_DIR, tickers=None, changed=None):
+    """
+    Aktualizuje warianty skompresowane i data/manifest.json dla podanych tickerów
+    (None lub brak data/manifest.json = wszystkie). `changed` to {ticker: [zapisane ścieżki]}
+    (jak z data_fetcher.fetch_all) - tickery spoza słownika mają sprawdzane wszystkie pliki.
+    Zwraca ścieżkę, gdy manifest się zmienił.
+    """
+    if tickers is None or not os.path.exists(os.path.join(data_dir, DATA_MANIFEST)):
+        tickers = list_tickers(data_dir)
+    changed = changed or {}
+    entries = {}
+    for ticker in tickers:
+        try:
+            entries[ticker] = publish_ticker(ticker, data_dir, changed.get(ticker))
+        except Exception as e:
+            logging.warning(f"Nie udało się opublikować plików {ticker}: {e}")
+    return write_data_manifest(entries, data_dir)
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+    written = publish_all()
+    print("Zapisano data/manifest.json." if written else "data/manifest.json bez zmian.")
@@ -0,0 +1,124 @@
+# Plik: benchmarks/bench_api.py
+# Lokalny test obciążeniowy serwera API (app.py): opóźnienia p50/p99 i przepustowość
+# dla /api/data/<TICKER> w kilku scenariuszach:
+#   bez_cache  - każda odpowiedź budowana od nowa z magazynu data/
+#   cache      - odpowiedzi z cache LRU
+#   cache_gzip - jak wyżej, klient akceptuje gzip
+#   etag_304   - klient wysyła If-None-Match (odpowiedź 304 bez treści)
+#   zakres     - zapytania from/to o ostatni rok
+#
+# Użycie:
+#   python benchmarks/bench_api.py [--requests 2000] [--concurrency 8] [--data-dir data]
+
+import argparse
+import logging
+import multiprocessing
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import requests
+from werkzeug.serving import make_server
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault('API_WARM_UP', '0')
+
+import app as api  # noqa: E402
+
+
+def available_tickers(data_dir):
+    names = {os.path.splitext(name)[0] for name in os.listdir(data_dir) if not name.startswith('.')}
+    return sorted(name for name in names if api.ticker_version(name, data_dir) is not None)
+
+
+def _serve(port_queue, data_dir, cache_bytes):
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    flask_app = api.create_app(data_dir=data_dir, cache_bytes=cache_bytes, warm_up=False)
+    api.warm_up_cache(flask_app.extensions['response_cache'], data_dir)
+    server = make_server('127.0.0.1', 0, flask_app, threaded=True)
+    port_queue.put(server.server_port)
+    server.serve_forever()
+
+
+def serve(data_dir, cache_bytes):
+    """Uruchamia serwer w osobnym procesie, żeby klienci testu nie konkurowali z nim o GIL."""
+    port_queue = multiprocessing.Queue()
+    process = multiprocessing.Process(target=_serve, args=(port_queue, data_dir, cache_bytes), daemon=True)
+    process.start()
+    return process, f'http://127.0.0.1:{port_queue.get(timeout=60)}'
+
+
+def run_load(base_url, paths, concurrency, headers_for=None):
+    local = threading.local()
+
+    def one(path):
+        session = getattr(local, 'session', None) or requests.Session()
+        local.session = session
+        headers = headers_for(path) if headers_for else {}
+        start = time.perf_counter()
+        response = session.get(base_url + path, headers=headers)
+        elapsed = time.perf_counter() - start
+        return elapsed, response.status_code, int(response.headers.get('Content-Length', len(response.content)))
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one, paths))
+    wall = time.perf_counter() - started
+    latencies = np.array([r[0] for r in results]) * 1000
+    return {
+        'p50_ms': round(float(np.percentile(latencies, 50)), 2),
+        'p99_ms': round(float(np.percentile(latencies, 99)), 2),
+        'req_s': round(len(paths) / wall, 1),
+        'statuses': sorted({r[1] for r in results}),
+        'avg_kb': round(sum(r[2] for r in results) / len(results) / 1024, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Test obciążeniowy API notowań.")
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--data-dir', default=os.path.join(ROOT, 'data'))
+    parser.add_argument('--cache-mb', type=int, default=api.CACHE_MAX_BYTES // (1024 * 1024))
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    tickers = available_tickers(args.data_dir)
+    rng = random.Random(args.seed)
+    # Rozkład zbliżony do ruchu na stronie: indeksy i kilka popularnych spółek dominują
+    weights = [1 / (rank + 1) for rank in range(len(tickers))]
+    popular = [t for t in api.INDEX_TICKERS if t in tickers] + [t for t in tickers if t not in api.INDEX_TICKERS]
+    paths = [f'/api/data/{t}' for t in rng.choices(popular, weights=weights, k=args.requests)]
+    range_paths = [p + '?from=2024-01-01&to=2024-12-31' for p in paths]
+
+    servers = {'uncached': serve(args.data_dir, 0), 'cached': serve(args.data_dir, args.cache_mb * 1024 * 1024)}
+
+    etags = {}
+    for path in set(paths):
+        etags[path] = requests.get(servers['cached'][1] + path).headers['ETag']
+
+    scenarios = [
+        ('bez_cache', 'uncached', paths, None),
+        ('cache', 'cached', paths, None),
+        ('cache_gzip', 'cached', paths, lambda p: {'Accept-Encoding': 'gzip'}),
+        ('etag_304', 'cached', paths, lambda p: {'If-None-Match': etags[p]}),
+        ('zakres', 'cached', range_paths, None),
+    ]
+    print(f"{len(tickers)} tickerów, {args.requests} zapytań, {args.concurrency} równoległych klientów")
+    print(f"{'scenariusz':<12}{'p50 ms':>9}{'p99 ms':>9}{'zap/s':>9}{'śr. KB':>9}  statusy")
+    for name, server, scenario_paths, headers_for in scenarios:
+        result = run_load(servers[server][1], scenario_paths, args.concurrency, headers_for)
+        print(f"{name:<12}{result['p50_ms']:>9}{result['p99_ms']:>9}{result['req_s']:>9}{result['avg_kb']:>9}  {result['statuses']}")
+    print("cache:", requests.get(servers['cached'][1] + '/api/cache').json())
+
+    for process, _ in servers.values():
+        process.terminate()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+# Plik: benchmarks/bench_html_tables.py
+# Porównanie czasu i szczytowego zużycia pamięci: pd.read_html (wszystkie tabele na stronie)
+# kontra html_tables.extract_table (tylko tabela docelowa) na stronach StockWatch/Bankier.
+#
+# Każde podejście jest uruchamiane w osobnym procesie, aby pomiar pamięci (ru_maxrss
+# oraz tracemalloc) nie był zaburzony przez poprzednie przebiegi.
+#
+# Użycie:
+#   python benchmarks/bench_html_tables.py [--repeat 20] [--pages KATALOG]
+# --pages wskazuje katalog z zapisanymi stronami (*.html), np. zrzuconymi z cache scrapera;
+# bez niego używane są deterministyczne strony z benchmarks/fixtures.py.
+
+import argparse
+import glob
+import io
+import json
+import os
+import re
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, 'scrapers'), os.path.dirname(os.path.abspath(__file__))]
+
+APPROACHES = ('read_html', 'extract_table')
+
+
+def load_pages(pages_dir=None):
+    """Zwraca listę (nazwa, kolumna nagłówka, html)."""
+    if pages_dir:
+        pages = []
+        for path in sorted(glob.glob(os.path.join(pages_dir, '*.html'))):
+            with open(path, encoding='utf-8') as f:
+                html = f.read()
+            label = 'Dane/Okres' if 'dane-finansowe' in path else 'Wskażnik/Okres' if 'wskazniki' in path else 'Nazwa'
+            pages.append((os.path.basename(path), label, html))
+        return pages
+
+    import fixtures
+    return [
+        ('stockwatch_dane_finansowe', 'Dane/Okres', fixtures.stockwatch_finance_page('spolka-sa')),
+        ('stockwatch_wskazniki', 'Wskażnik/Okres', fixtures.stockwatch_indicators_page('spolka-sa')),
+        ('bankier_wig', 'Nazwa', fixtures.bankier_wig_page(fixtures.company_names(360))),
+    ]
+
+
+def parse_read_html(html, label):
+    """Dotychczasowe podejście: DataFrame dla każdej tabeli, potem wyszukiwanie."""
+    import pandas as pd
+    if label == 'Nazwa':
+        tables = pd.read_html(io.StringIO(html), decimal=',', thousands='.')
+        return next((t for t in tables if 'Nazwa' in t.columns), None)
+    tables = pd.read_html(io.StringIO(html), header=0, decimal=',', thousands='.', encoding='utf-8')
+    for table in tables:
+        table.columns = [col.replace(' ', '').replace('>', '').strip() for col in table.columns]
+        if label in table.columns and any(re.match(r'Q\d{1}\s*\d{4}', str(c)) for c in table.columns):
+            return table
+    return None
+
+
+def parse_extract_table(html, label):
+    from html_tables import extract_table
+    if label == 'Nazwa':
+        return extract_table(html, lambda columns: 'Nazwa' in columns, decimal=',', thousands='.')
+    import data
+    return data.parse_company_indicators(html, 'benchmark', label)
+
+
+def run_one(approach, page_index, repeat, pages_dir):
+    """Pomiar w bieżącym procesie (wywoływany w podprocesie przez main)."""
+    import logging
+    import pandas  # noqa: F401 - import poza pomiarem pamięci
+    import lxml.html  # noqa: F401
+    import data  # noqa: F401 - moduł scrapera (sqlalchemy itd.) również ładujemy przed pomiarem
+    logging.disable(logging.INFO)
+    name, label, html = load_pages(pages_dir)[page_index]
+    parse = parse_read_html if approach == 'read_html' else parse_extract_table
+
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    tracemalloc.start()
+    result = parse(html, label)
+    _, traced_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        parse(html, label)
+        times.append(time.perf_counter() - start)
+    times.sort()
+    return {
+        'page': name,
+        'approach': approach,
+        'page_kb': round(len(html.encode('utf-8')) / 1024, 1),
+        'rows': None if result is None else len(result),
+        'median_ms': round(times[len(times) // 2] * 1000, 2),
+        'min_ms': round(times[0] * 1000, 2),
+        'traced_peak_kb': round(traced_peak / 1024, 1),
+        'rss_growth_kb': rss_after - rss_before,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ekstrakcji tabel HTML.")
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--pages', help="Katalog z zapisanymi stronami *.html")
+    parser.add_argument('--json', action='store_true', help="Wypisz wyniki jako JSON")
+    parser.add_argument('--_worker', nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args._worker:
+        approach, page_index = args._worker
+        print(json.dumps(run_one(approach, int(page_index), args.repeat, args.pages)))
+        return
+
+    results = []
+    for page_index in range(len(load_pages(args.pages))):
+        for approach in APPROACHES:
+            cmd = [sys.executable, os.path.abspath(__file__), '--repeat', str(args.repeat), '--_worker', approach, str(page_index)]
+            if args.pages:
+                cmd += ['--pages', args.pages]
+            output = subprocess.run(cmd, check=True, capture_output=True, text=True).stdout
+            results.append(json.loads(output.strip().splitlines()[-1]))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'strona':<28}{'metoda':<15}{'KB':>7}{'wiersze':>9}{'mediana ms':>12}{'peak KB':>10}{'RSS +KB':>9}")
+    for r in results:
+        print(f"{r['page']:<28}{r['approach']:<15}{r['page_kb']:>7}{str(r['rows']):>9}"
+              f"{r['median_ms']:>12}{r['traced_peak_kb']:>10}{r['rss_growth_kb']:>9}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,187 @@
+# Plik: benchmarks/bench_indicators.py
+# Porównanie wskaźników z indicators.py z dosłownym przeniesieniem funkcji calculateSMA/EMA/
+# RSI/MACD/OBV z chart.js (pętle w Pythonie, tak jak w przeglądarce). Sprawdza zgodność
+# wyników w granicach tolerancji i mierzy: pełne przeliczenie pętlami, pełne przeliczenie
+# wektorowe oraz aktualizację po dopisaniu jednej świecy (tylko ogon).
+#
+# Użycie:
+#   python benchmarks/bench_indicators.py [--data-dir data] [--tickers 20] [--repeat 3]
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import indicators  # noqa: E402
+import price_store  # noqa: E402
+
+RTOL = 1e-9
+
+
+# === PRZENIESIENIE FUNKCJI Z chart.js ===
+
+def js_sma(close, period):
+    return [(i, sum(close[i - j] for j in range(period)) / period) for i in range(period - 1, len(close))]
+
+
+def js_ema(points, period):
+    """points: lista (indeks, wartość) - jak tablica {time, value} w JS."""
+    if len(points) < period:
+        return []
+    k = 2 / (period + 1)
+    prev = sum(v for _, v in points[:period]) / period
+    result = [(points[period - 1][0], prev)]
+    for i in range(period, len(points)):
+        prev = points[i][1] * k + prev * (1 - k)
+        result.append((points[i][0], prev))
+    return result
+
+
+def js_rsi(close, period=14):
+    gains = losses = 0.0
+    result = []
+    for i in range(1, len(close)):
+        diff = close[i] - close[i - 1]
+        if i <= period:
+            if diff > 0:
+                gains += diff
+            else:
+                losses += abs(diff)
+        else:
+            gains = (gains * (period - 1) + (diff if diff > 0 else 0)) / period
+            losses = (losses * (period - 1) + (abs(diff) if diff < 0 else 0)) / period
+        if i >= period:
+            rs = 100 if losses == 0 else gains / losses
+            result.append((i, 100 - (100 / (1 + rs))))
+    return result
+
+
+def js_macd(close, fast=12, slow=26, signal=9):
+    points = list(enumerate(close))
+    slow_map = dict(js_ema(points, slow))
+    line = [(t, v - slow_map[t]) for t, v in js_ema(points, fast) if t in slow_map]
+    signal_line = js_ema(line, signal)
+    signal_map = dict(signal_line)
+    return line, signal_line, [(t, v - signal_map[t]) for t, v in line if t in signal_map]
+
+
+def js_obv(close, volume):
+    obv, result = 0.0, []
+    for i in range(1, len(close)):
+        if close[i] > close[i - 1]:
+            obv += volume[i]
+        elif close[i] < close[i - 1]:
+            obv -= volume[i]
+        result.append((i, obv))
+    return result
+
+
+def js_all(close, volume):
+    points = list(enumerate(close))
+    series = {f'sma{p}': js_sma(close, p) for p in indicators.SMA_PERIODS}
+    series.update({f'ema{p}': js_ema(points, p) for p in indicators.EMA_PERIODS})
+    series[f'rsi{indicators.RSI_PERIOD}'] = js_rsi(close, indicators.RSI_PERIOD)
+    series['macd'], series['macd_signal'], series['macd_hist'] = js_macd(close, *indicators.MACD_PERIODS)
+    series['obv'] = js_obv(close, volume)
+    return series
+
+
+def compare(reference, columns):
+    """Największy błąd względny; sprawdza też, że zbiory określonych świec są identyczne."""
+    worst = 0.0
+    for name, points in reference.items():
+        values = columns[name]
+        expected = np.full(len(values), np.nan)
+        for i, v in points:
+            expected[i] = v
+        if not np.array_equal(np.isnan(expected), np.isnan(values)):
+            raise AssertionError(f"{name}: różne świece z określoną wartością")
+        mask = ~np.isnan(expected)
+        scale = np.maximum(np.abs(expected[mask]), 1.0)
+        worst = max(worst, float(np.max(np.abs(values[mask] - expected[mask]) / scale, initial=0.0)))
+    return worst
+
+
+# === POMIAR ===
+
+def load_series(data_dir, count):
+    """Notowania `count` najdłuższych tickerów z katalogu danych (manifest lub stary JSON)."""
+    series = []
+    for name in sorted(os.listdir(data_dir)):
+        ticker = name[:-5] if name.endswith('.json') else name
+        bars = price_store.load_bars(ticker, data_dir)
+        if bars is not None and len(bars) > 50:
+            series.append((ticker, bars))
+    series.sort(key=lambda item: -len(item[1]))
+    return series[:count]
+
+
+def best_time(func, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--data-dir', default=os.path.join(ROOT, 'data'))
+    parser.add_argument('--tickers', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    series = load_series(args.data_dir, args.tickers)
+    print(f"{len(series)} tickerów, {sum(len(b) for _, b in series)} świec")
+
+    worst = 0.0
+    for ticker, bars in series:
+        close, volume = bars['close'].to_numpy(float), bars['volume'].to_numpy(float)
+        worst = max(worst, compare(js_all(close.tolist(), volume.tolist()), indicators.compute_indicators(close, volume)))
+    print(f"największy błąd względny względem chart.js: {worst:.2e}")
+    assert worst < RTOL, "wyniki odbiegają od chart.js"
+
+    inputs = [(b['close'].to_numpy(float), b['volume'].to_numpy(float)) for _, b in series]
+    js_time = best_time(lambda: [js_all(c.tolist(), v.tolist()) for c, v in inputs], 1)
+    full_time = best_time(lambda: [indicators.compute_indicators(c, v) for c, v in inputs], args.repeat)
+
+    # Aktualizacja po dopisaniu jednej świecy: magazyn w katalogu tymczasowym
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        for ticker, bars in series:
+            price_store.save_bars(ticker, bars.iloc[:-1], tmp_dir)
+            indicators.update_indicators(ticker, tmp_dir)
+
+        def append_one():
+            for ticker, bars in series:
+                price_store.save_bars(ticker, bars.iloc[-1:], tmp_dir, replace=False)
+                indicators.update_indicators(ticker, tmp_dir)
+
+        start = time.perf_counter()
+        append_one()
+        tail_time = time.perf_counter() - start
+
+        for ticker, bars in series:
+            stored = price_store.read_columns(indicators.indicator_path(ticker, tmp_dir))
+            fresh = indicators.compute_indicators(bars['close'].to_numpy(float), bars['volume'].to_numpy(float))
+            for name in indicators.series_names():
+                np.testing.assert_allclose(stored[name], fresh[name], rtol=RTOL, atol=1e-9, equal_nan=True)
+    finally:
+        shutil.rmtree(tmp_dir)
+
+    print(f"{'wariant':<28}{'czas s':>10}")
+    print(f"{'chart.js (pętle)':<28}{js_time:>10.3f}")
+    print(f"{'wektorowo, cała historia':<28}{full_time:>10.3f}")
+    print(f"{'+1 świeca (ogon + zapis)':<28}{tail_time:>10.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+# Plik: benchmarks/bench_reshape.py
+# Porównanie przekształcenia surowych tabel StockWatch do formatu długiego:
+# process_indicators_dataframe wywoływane osobno dla każdej spółki + pd.concat
+# kontra jedno wywołanie process_indicators_batch. Sprawdza też identyczność wyników.
+#
+# Użycie:
+#   python benchmarks/bench_reshape.py [--companies 380] [--scales 1 10] [--repeat 3]
+
+import argparse
+import logging
+import os
+import sys
+import time
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, 'scrapers'), os.path.dirname(os.path.abspath(__file__))]
+
+import data  # noqa: E402
+import fixtures  # noqa: E402
+
+WIG_COMPANIES = 380
+
+
+def build_raw_companies(count, distinct=50):
+    """Surowe tabele `count` spółek; strony są parsowane raz dla `distinct` wzorców i powielane."""
+    templates = []
+    for k in range(min(count, distinct)):
+        slug = f'spolka{k}'
+        templates.append((
+            data.parse_company_indicators(fixtures.stockwatch_finance_page(slug), slug, 'Dane/Okres'),
+            data.parse_company_indicators(fixtures.stockwatch_indicators_page(slug), slug, 'Wskażnik/Okres'),
+        ))
+    return [(f'SPÓŁKA {i}', f'T{i:04d}') + templates[i % len(templates)] for i in range(count)]
+
+
+def per_company(companies):
+    """Dotychczasowa ścieżka (kopie ramek, bo stare funkcje modyfikują wejście)."""
+    frames = []
+    for company_name, company_ticker, df, df_indicators in companies:
+        processed_df = data.process_indicators_dataframe(df.copy(), df_indicators.copy())
+        if processed_df.empty:
+            continue
+        processed_df['Spółka'] = company_name
+        processed_df['Ticker'] = company_ticker
+        frames.append(processed_df)
+    return pd.concat(frames, ignore_index=True).reindex(columns=data.SUMMARY_COLUMNS)
+
+
+def best_time(func, companies, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(companies)
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark przekształcania wskaźników.")
+    parser.add_argument('--companies', type=int, default=WIG_COMPANIES, help="Liczba spółek w skali 1x.")
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 10])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    print(f"{'skala':>6}{'spółki':>8}{'wiersze':>9}{'osobno s':>11}{'wsadowo s':>11}{'przysp.':>9}")
+    for scale in args.scales:
+        companies = build_raw_companies(args.companies * scale)
+        old_time, expected = best_time(per_company, companies, args.repeat)
+        new_time, result = best_time(data.process_indicators_batch, companies, args.repeat)
+        pd.testing.assert_frame_equal(expected, result)
+        print(f"{str(scale) + 'x':>6}{len(companies):>8}{len(result):>9}{old_time:>11.3f}{new_time:>11.3f}{old_time / new_time:>8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+# Plik: benchmarks/bench_rollups.py
+# Świece W/M i przegląd z rollups.py kontra agregacja w przeglądarce (dosłowne przeniesienie
+# aggregateDataToInterval z chart.js). Sprawdza identyczność świec W/M, porównuje liczbę bajtów
+# do pobrania i świec do narysowania dla widoku całej historii oraz czas aktualizacji
+# przyrostowej (jedna nowa świeca) względem pełnego przeliczenia.
+#
+# Użycie:
+#   python benchmarks/bench_rollups.py [--data-dir data] [--tickers WIG WIG20 ...]
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import price_store  # noqa: E402
+import rollups  # noqa: E402
+
+
+def js_aggregate(daily, interval):
+    """aggregateDataToInterval z chart.js (lista słowników -> lista słowników)."""
+    result, current = [], None
+    for d in daily:
+        date = datetime.fromtimestamp(d['time'], timezone.utc)
+        if interval == 'W':
+            monday = date - timedelta(days=date.weekday())
+            key = (monday.year, monday.month, monday.day)
+        else:
+            key = (date.year, date.month)
+        if current is None or current['key'] != key:
+            if current is not None:
+                result.append(current['data'])
+            current = {'key': key, 'data': dict(d)}
+        else:
+            data = current['data']
+            data['high'] = max(data['high'], d['high'])
+            data['low'] = min(data['low'], d['low'])
+            data['close'] = d['close']
+            data['volume'] += d['volume']
+    if current is not None:
+        result.append(current['data'])
+    return result
+
+
+def json_size(columns):
+    names = price_store.PRICE_COLUMNS
+    rows = zip(*(np.asarray(columns[name]).tolist() for name in names))
+    return len(json.dumps([dict(zip(names, row)) for row in rows]).encode())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--data-dir', default=os.path.join(ROOT, 'data'))
+    parser.add_argument('--tickers', nargs='*', default=['WIG', 'WIG20', 'MWIG40', 'SWIG80'])
+    args = parser.parse_args()
+
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        print(f"{'ticker':<8}{'świece D':>9}{'KB D':>9}{'KB W':>7}{'KB M':>7}{'KB przegl.':>11}"
+              f"{'JS W+M ms':>11}{'pełne ms':>10}{'+1 ms':>8}")
+        for ticker in args.tickers:
+            bars = price_store.load_bars(ticker, args.data_dir)
+            if bars is None or bars.empty:
+                print(f"{ticker:<8} brak danych")
+                continue
+            daily = {name: bars[name].to_numpy() for name in price_store.PRICE_COLUMNS}
+            records = bars.to_dict('records')
+
+            start = time.perf_counter()
+            expected = {interval: js_aggregate(records, interval) for interval in rollups.ROLLUP_INTERVALS}
+            js_ms = (time.perf_counter() - start) * 1000
+            for interval in rollups.ROLLUP_INTERVALS:
+                result = rollups.rollup(daily, interval)
+                for name in price_store.PRICE_COLUMNS:
+                    # Suma wolumenu może różnić się od sumowania po kolei na ostatnim bicie
+                    np.testing.assert_allclose(result[name], [row[name] for row in expected[interval]], rtol=1e-12)
+
+            price_store.save_bars(ticker, bars.iloc[:-1], tmp_dir)
+            start = time.perf_counter()
+            rollups.update_rollups(ticker, tmp_dir)
+            full_ms = (time.perf_counter() - start) * 1000
+            price_store.save_bars(ticker, bars.iloc[-1:], tmp_dir, replace=False)
+            start = time.perf_counter()
+            rollups.update_rollups(ticker, tmp_dir, since=int(bars['time'].iloc[-1]))
+            tail_ms = (time.perf_counter() - start) * 1000
+            for interval in rollups.ROLLUP_INTERVALS:
+                stored = price_store.read_columns(rollups.rollup_path(ticker, interval, tmp_dir, 'bin'))
+                np.testing.assert_array_equal(stored['close'], [row['close'] for row in expected[interval]])
+
+            sizes = [json_size(daily)] + [
+                os.path.getsize(rollups.rollup_path(ticker, name, tmp_dir)) for name in ('W', 'M', 'overview')]
+            print(f"{ticker:<8}{len(bars):>9}" + ''.join(f"{s / 1024:>{w}.0f}" for s, w in zip(sizes, (9, 7, 7, 11)))
+                  + f"{js_ms:>11.1f}{full_ms:>10.1f}{tail_ms:>8.1f}")
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+# Plik: benchmarks/fixtures.py
+# Deterministyczne strony testowe odwzorowujące układ StockWatch.pl i Bankier.pl:
+# dużo tabel "szumu" (menu, notowania, wiadomości) oraz jedna tabela docelowa.
+# Liczby są formatowane po polsku (spacja jako separator tysięcy, przecinek dziesiętny).
+
+import random
+import zlib
+
+QUARTERS = [f"Q{q} {y}" for y in range(2024, 2013, -1) for q in range(4, 0, -1)]
+FINANCE_ROWS = ['Przychody ze sprzedaży', 'Zysk operacyjny (EBIT)', 'Zysk brutto', 'Zysk netto',
+                'Amortyzacja', 'EBITDA', 'Aktywa', 'Kapitał własny', 'Liczba akcji', 'Zysk netto',
+                'Przepływy operacyjne', 'Przepływy inwestycyjne', 'Przepływy finansowe', 'Dywidenda']
+INDICATOR_ROWS = ['Kurs', 'Kapitalizacja', 'C/Z', 'C/WK', 'C/P', 'EV/EBITDA', 'ROE', 'ROA',
+                  'Marża netto', 'Zadłużenie', 'Stopa dywidendy']
+
+
+def _rng(*key):
+    return random.Random(zlib.crc32(repr(key).encode()))
+
+
+def polish_int(value):
+    return f"{value:,}".replace(',', '\xa0')
+
+
+def polish_float(value):
+    return f"{value:,.2f}".replace(',', ' ').replace('.', ',').replace(' ', '.')
+
+
+def _noise_tables(rng, count):
+    parts = []
+    for t in range(count):
+        rows = ''.join(
+            f"<tr><td><a href='/x/{t}/{r}'>Pozycja {t}-{r}</a></td><td>{polish_float(rng.uniform(0, 999))}</td>"
+            f"<td>{rng.choice(['+', '-'])}{polish_float(rng.uniform(0, 9))}%</td><td colspan='2'>{rng.randint(1, 28)}.0{rng.randint(1, 9)}</td></tr>"
+            for r in range(rng.randint(5, 25))
+        )
+        parts.append(f"<div class='box'><table class='noise'><tr><th>Instrument</th><th>Kurs</th><th>Zmiana</th><th colspan='2'>Data</th></tr>{rows}</table></div>")
+    return ''.join(parts)
+
+
+def _target_table(label, row_names, values):
+    head = f"<thead><tr><th>{label}</th>" + ''.join(f"<th>{q} <span>&gt;</span></th>" for q in QUARTERS) + "</tr></thead>"
+    body = ''.join(
+        f"<tr><td>{name}</td>" + ''.join(f"<td>{v}</td>" for v in row) + "</tr>"
+        for name, row in zip(row_names, values)
+    )
+    return f"<table class='cTable'>{head}<tbody>{body}</tbody></table>"
+
+
+def _page(title, body):
+    return (f"<!DOCTYPE html><html><head><meta charset='utf-8'><title>{title}</title>"
+            f"<style>.x{{display:none}}</style><script>var a = '<table>';</script></head>"
+            f"<body><div id='menu'><ul>{''.join(f'<li>Menu {i}</li>' for i in range(60))}</ul></div>{body}</body></html>")
+
+
+def stockwatch_finance_page(slug, noise_tables=40):
+    rng = _rng('finance', slug)
+    values = []
+    for name in FINANCE_ROWS:
+        if name == 'Liczba akcji':
+            base = rng.randint(1_000_000, 2_000_000_000)
+            values.append([polish_int(base) for _ in QUARTERS])
+        else:
+            values.append([polish_int(rng.randint(-50_000, 500_000)) if rng.random() > 0.03 else '-' for _ in QUARTERS])
+    body = _noise_tables(rng, noise_tables // 2) + _target_table('Dane / Okres', FINANCE_ROWS, values) + _noise_tables(rng, noise_tables // 2)
+    return _page(f'{slug} - dane finansowe', body)
+
+
+def stockwatch_indicators_page(slug, noise_tables=40):
+    rng = _rng('indicators', slug)
+    values = [[polish_float(rng.uniform(0.1, 900)) if rng.random() > 0.03 else '' for _ in QUARTERS] for _ in INDICATOR_ROWS]
+    body = _noise_tables(rng, noise_tables // 2) + _target_table('Wskażnik / Okres', INDICATOR_ROWS, values) + _noise_tables(rng, noise_tables // 2)
+    return _page(f'{slug} - wskaźniki', body)
+
+
+def company_names(count):
+    return [(f"SPOLKA{i:04d}", f"S{i:03d}"[-3:] if i < 1000 else f"X{i:04d}") for i in range(count)]
+
+
+def bankier_wig_page(companies, noise_tables=20):
+    rng = _rng('bankier', len(companies))
+    rows = ''.join(
+        f"<tr><td><a href='/q/{ticker}'>{name}</a></td><td>{ticker}</td><td>{polish_float(rng.uniform(0.1, 900))}</td>"
+        f"<td>{polish_float(rng.uniform(-5, 5))}</td><td>{polish_float(rng.uniform(-9, 9))}%</td><td>{polish_float(rng.uniform(0, 1))}%</td>"
+        f"<td>{polish_float(rng.uniform(0, 3))}%</td><td>{polish_int(rng.randint(1000, 10**9))}</td><td>{polish_float(rng.uniform(0, 5))}%</td></tr>"
+        for name, ticker in companies
+    )
+    head = ''.join(f"<th>{c}</th>" for c in ['Nazwa', 'Ticker', 'Kurs', 'Zmiana', 'Zmiana procentowa', 'Wpływ na indeks',
+                                              'Udział w obrocie', 'Pakiet', 'Udział w portfelu'])
+    table = f"<table class='sortTable'><thead><tr>{head}</tr></thead><tbody>{rows}</tbody></table>"
+    return _page('Skład indeksu WIG', _noise_tables(rng, noise_tables // 2) + table + _noise_tables(rng, noise_tables // 2))
+
+
+def stooq_csv(ticker, days=2500, last_day='2024-12-31'):
+    """Dzienne notowania w formacie CSV Stooq (dni robocze kończące się w `last_day`)."""
+    import numpy as np
+    import pandas as pd
+
+    rng = np.random.default_rng(zlib.crc32(ticker.encode()))
+    dates = pd.bdate_range(end=last_day, periods=days)
+    close = np.round(np.maximum(0.05, 20 * np.exp(np.cumsum(rng.normal(0, 0.02, days)))), 2)
+    open_ = np.round(close * (1 + rng.normal(0, 0.005, days)), 2)
+    high = np.round(np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.01, days))), 2)
+    low = np.round(np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.01, days))), 2)
+    volume = rng.integers(100, 2_000_000, days)
+    lines = ["Data,Otwarcie,Najwyzszy,Najnizszy,Zamkniecie,Wolumen"]
+    lines += [f"{d:%Y-%m-%d},{o},{h},{lo},{c},{v}" for d, o, h, lo, c, v in zip(dates, open_, high, low, close, volume)]
+    return '\n'.join(lines) + '\n'
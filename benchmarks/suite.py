@@ -0,0 +1,431 @@
+# Plik: benchmarks/suite.py
+# Zestaw pomiarów gorących ścieżek codziennych skryptów, uruchamiany bez dostępu do sieci.
+#
+# Stooq, StockWatch i Bankier są zastępowane lokalnym serwerem HTTP (osobny proces), który
+# serwuje strony zapisane w katalogu --fixtures, a w razie ich braku deterministyczne strony
+# z benchmarks/fixtures.py. Układ katalogu (np. strony zrzucone z cache scrapera):
+#   stooq/{ticker}.csv
+#   stockwatch/{slug},notowania,dane-finansowe.aspx  oraz  stockwatch/{slug},notowania,wskazniki.aspx
+#   bankier/wig_{liczba spółek}.html  (osobna strona dla każdego wszechświata)
+# --record KATALOG zapisuje w tym układzie wygenerowane strony dla wszystkich wszechświatów
+# (--unit x --scales); notowania i strony spółek mniejszych wszechświatów to podzbiory największego.
+#
+# Każdy pomiar jest wykonywany dla wszechświata 1x, 10x i 100x (--unit tickerów/spółek na 1x);
+# wynikiem jest najlepszy czas z --repeat powtórzeń. Wyniki trafiają do pliku JSON (--save),
+# a --compare porównuje je z zapisanym przebiegiem: czas dłuższy niż próg (--threshold lub
+# THRESHOLDS dla pomiarów zależnych od sieci) oznacza regresję i kod wyjścia 1.
+#
+# Użycie:
+#   python benchmarks/suite.py [--scales 1 10 100] [--only stooq_csv_parse db_save_upsert]
+#                              [--save wyniki.json] [--compare baseline.json] [--threshold 1.25]
+
+import argparse
+import contextlib
+import io
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, 'scrapers'), os.path.dirname(os.path.abspath(__file__))]
+
+import fixtures  # noqa: E402
+
+DEFAULT_SCALES = (1, 10, 100)
+DEFAULT_UNIT = 5                # 100x = 500 tickerów, mniej więcej cały WIG z indeksami
+STOOQ_DAYS = 2500               # Około 10 lat notowań na ticker
+DEFAULT_THRESHOLD = 1.25
+# Pomiary przez lokalny serwer HTTP są bardziej zaszumione
+THRESHOLDS = {'stooq_fetch_e2e': 1.5, 'stockwatch_fetch_parse': 1.5, 'bankier_wig': 1.5}
+MIN_SECONDS = 0.02              # Krótszych pomiarów nie uznajemy za regresję (szum zegara)
+FETCH_WORKERS = 8
+
+
+# === LOKALNY SERWER ===
+
+def _fixture_body(fixtures_dir, kind, name, generate):
+    if fixtures_dir:
+        path = os.path.join(fixtures_dir, kind, name)
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                return f.read()
+    return generate().encode('utf-8')
+
+
+def serve(fixtures_dir, port_queue):
+    """Serwer HTTP udający Stooq (/q/d/l/), StockWatch (/gpw/) i Bankier (/bankier/wig)."""
+    @lru_cache(maxsize=None)
+    def body_for(path, ticker):
+        if path == '/q/d/l/':
+            return _fixture_body(fixtures_dir, 'stooq', f'{ticker}.csv', lambda: fixtures.stooq_csv(ticker.upper(), STOOQ_DAYS))
+        if path.startswith('/gpw/'):
+            name = path[len('/gpw/'):]
+            slug, _, page = name.partition(',')
+            if page == 'notowania,dane-finansowe.aspx':
+                return _fixture_body(fixtures_dir, 'stockwatch', name, lambda: fixtures.stockwatch_finance_page(slug))
+            if page == 'notowania,wskazniki.aspx':
+                return _fixture_body(fixtures_dir, 'stockwatch', name, lambda: fixtures.stockwatch_indicators_page(slug))
+        if path == '/bankier/wig':
+            count = int(ticker or DEFAULT_UNIT)
+            return _fixture_body(fixtures_dir, 'bankier', f'wig_{count}.html',
+                                 lambda: fixtures.bankier_wig_page(fixtures.company_names(count)))
+        return None
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            url = urlsplit(self.path)
+            query = parse_qs(url.query)
+            key = query.get('s', query.get('count', ['']))[0]
+            body = body_for(unquote(url.path), key)
+            if body is None:
+                self.send_response(404)
+                body = b'Nie ma takiego symbolu'
+            else:
+                self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; charset=utf-8' if url.path == '/q/d/l/' else 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    port_queue.put(server.server_address[1])
+    server.serve_forever()
+
+
+@contextlib.contextmanager
+def standin_server(fixtures_dir=None):
+    queue = multiprocessing.Queue()
+    process = multiprocessing.Process(target=serve, args=(fixtures_dir, queue), daemon=True)
+    process.start()
+    try:
+        yield f'http://127.0.0.1:{queue.get(timeout=30)}'
+    finally:
+        process.terminate()
+        process.join()
+
+
+def record_fixtures(directory, tickers, companies, sizes):
+    """Zapisuje wygenerowane strony w układzie katalogu --fixtures (skład WIG dla każdej liczby spółek z `sizes`)."""
+    import data
+    for kind in ('stooq', 'stockwatch', 'bankier'):
+        os.makedirs(os.path.join(directory, kind), exist_ok=True)
+    for ticker in tickers:
+        with open(os.path.join(directory, 'stooq', f'{ticker.lower()}.csv'), 'w', encoding='utf-8') as f:
+            f.write(fixtures.stooq_csv(ticker, STOOQ_DAYS))
+    for _, _, slug in companies:
+        for kind, generate in (('finance', fixtures.stockwatch_finance_page), ('indicators', fixtures.stockwatch_indicators_page)):
+            with open(os.path.join(directory, 'stockwatch', slug + data.PAGE_SOURCES[kind][0]), 'w', encoding='utf-8') as f:
+                f.write(generate(slug))
+    for count in sizes:
+        with open(os.path.join(directory, 'bankier', f'wig_{count}.html'), 'w', encoding='utf-8') as f:
+            f.write(fixtures.bankier_wig_page(fixtures.company_names(count)))
+
+
+# === POMIARY ===
+# Każdy pomiar to para funkcji: przygotowanie(ctx, n) -> stan (poza pomiarem czasu, wołane
+# przed każdym powtórzeniem) oraz przebieg(stan) -> liczba przetworzonych elementów.
+
+class Context:
+    """Wspólne dane pomiarów: adres serwera, katalog roboczy i wyniki wcześniejszych etapów."""
+    def __init__(self, base_url, work_dir):
+        self.base_url = base_url
+        self.work_dir = work_dir
+        self._cache = {}
+
+    def tickers(self, n):
+        return [f'T{i:04d}' for i in range(n)]
+
+    def companies(self, n):
+        import data
+        return [(name, ticker, data.company_slug({'Nazwa': name})) for name, ticker in fixtures.company_names(n)]
+
+    def fresh_dir(self):
+        return tempfile.mkdtemp(dir=self.work_dir)
+
+    def cached(self, key, build):
+        if key not in self._cache:
+            self._cache[key] = build()
+        return self._cache[key]
+
+    def csv_texts(self, n):
+        def build():
+            import requests
+            with requests.Session() as session:
+                return [session.get(f'{self.base_url}/q/d/l/', params={'s': t.lower(), 'i': 'd'}).text for t in self.tickers(n)]
+        return self.cached(('csv', n), build)
+
+    def raw_companies(self, n):
+        def build():
+            import data
+            from http_client import create_session
+            session = create_session(pool_size=1)
+            return [
+                (name, ticker,
+                 data.get_company_indicators(slug, *data.PAGE_SOURCES['finance'], session=session),
+                 data.get_company_indicators(slug, *data.PAGE_SOURCES['indicators'], session=session))
+                for name, ticker, slug in self.companies(n)
+            ]
+        return self.cached(('companies', n), build)
+
+
+def setup_fetch(ctx, n):
+    import data_fetcher
+    data_fetcher.DATA_DIR = ctx.fresh_dir()
+    return ctx.tickers(n)
+
+
+def run_fetch(tickers):
+    import data_fetcher
+    limiter = data_fetcher.HostLimiter(max_concurrent=FETCH_WORKERS, min_interval=0)
+    with contextlib.redirect_stdout(io.StringIO()):
+        results = data_fetcher.fetch_all(tickers, workers=FETCH_WORKERS, limiter=limiter)
+    if len(results[data_fetcher.STATUS_OK]) != len(tickers):
+        raise RuntimeError(f"fetch_all: {({s: len(t) for s, t in results.items()})}")
+    return len(tickers)
+
+
+def run_parse(texts):
+    import data_fetcher
+    for text in texts:
+        data_fetcher.parse_stooq_csv(text)
+    return len(texts)
+
+
+def setup_export(ctx, n):
+    import data_fetcher
+    frames = ctx.cached(('frames', n), lambda: [data_fetcher.parse_stooq_csv(t) for t in ctx.csv_texts(n)])
+    return ctx.fresh_dir(), list(zip(ctx.tickers(n), frames))
+
+
+def run_export(state):
+    import price_store
+    data_dir, frames = state
+    for ticker, df in frames:
+        price_store.save_bars(ticker, df, data_dir)
+    return len(frames)
+
+
+def setup_stockwatch(ctx, n):
+    from http_client import create_session
+    return create_session(pool_size=1), ctx.companies(n)
+
+
+def run_stockwatch(state):
+    import data
+    session, companies = state
+    for _, _, slug in companies:
+        for source, col_name in data.PAGE_SOURCES.values():
+            if data.get_company_indicators(slug, source, col_name, session=session) is None:
+                raise RuntimeError(f"Brak tabeli dla {slug}")
+    session.close()
+    return len(companies)
+
+
+def setup_bankier(ctx, n):
+    return f'{ctx.base_url}/bankier/wig?count={n}', n
+
+
+def run_bankier(state):
+    import data
+    url, n = state
+    df = data.get_wig_companies(url)
+    if df is None or len(df) != n:
+        raise RuntimeError("Nie znaleziono tabeli składu WIG")
+    return n
+
+
+def setup_process(ctx, n):
+    # process_indicators_dataframe modyfikuje ramkę wejściową - każde powtórzenie dostaje kopie
+    return [(name, ticker, finance.copy(), ind.copy()) for name, ticker, finance, ind in ctx.raw_companies(n)]
+
+
+def run_process(companies):
+    import data
+    import pandas as pd
+    frames = []
+    for name, ticker, finance, ind in companies:
+        df = data.process_indicators_dataframe(finance, ind)
+        df.insert(0, 'Ticker', ticker)
+        df.insert(0, 'Spółka', name)
+        frames.append(df)
+    return len(pd.concat(frames, ignore_index=True))
+
+
+def run_batch(companies):
+    import data
+    return len(data.process_indicators_batch(companies))
+
+
+def summary_frame(ctx, n):
+    import data
+    return ctx.cached(('summary', n), lambda: data.process_indicators_batch(ctx.raw_companies(n)))
+
+
+def setup_db_full(ctx, n):
+    from sqlalchemy import create_engine
+    engine = create_engine(f"sqlite:///{os.path.join(ctx.fresh_dir(), 'bench.db')}")
+    return engine, summary_frame(ctx, n), True
+
+
+def setup_db_upsert(ctx, n):
+    """Tabela z poprzedniego przebiegu, w której zmienia się co dziesiąty kurs i dochodzi nowy kwartał."""
+    import data
+    import pandas as pd
+    engine, df, _ = setup_db_full(ctx, n)
+    data.save_dataframe_to_db(df, engine, 'wig_indicators_summary', full_rebuild=True)
+    updated = df.copy()
+    updated.loc[updated.index[::10], 'Kurs'] = updated['Kurs'].iloc[::10] + 1
+    new_quarter = df.drop_duplicates('Ticker').assign(**{'Kwartał': 'Q1 2025'})
+    return engine, pd.concat([updated, new_quarter], ignore_index=True), False
+
+
+def run_db(state):
+    import data
+    engine, df, full_rebuild = state
+    stats = data.save_dataframe_to_db(df, engine, 'wig_indicators_summary', full_rebuild=full_rebuild)
+    engine.dispose()
+    if stats is None:
+        raise RuntimeError("save_dataframe_to_db nie zapisało danych")
+    return len(df)
+
+
+BENCHMARKS = {
+    # nazwa: (przygotowanie, przebieg, jednostka)
+    'stooq_fetch_e2e': (setup_fetch, run_fetch, 'ticker'),
+    'stooq_csv_parse': (lambda ctx, n: ctx.csv_texts(n), run_parse, 'ticker'),
+    'price_store_save': (setup_export, run_export, 'ticker'),
+    'stockwatch_fetch_parse': (setup_stockwatch, run_stockwatch, 'spółka'),
+    'bankier_wig': (setup_bankier, run_bankier, 'spółka'),
+    'process_indicators': (setup_process, run_process, 'wiersz'),
+    'process_indicators_batch': (setup_process, run_batch, 'wiersz'),
+    'db_save_full': (setup_db_full, run_db, 'wiersz'),
+    'db_save_upsert': (setup_db_upsert, run_db, 'wiersz'),
+}
+
+
+def measure(ctx, name, n, repeat):
+    setup, run, unit = BENCHMARKS[name]
+    best, items = None, 0
+    for _ in range(repeat):
+        state = setup(ctx, n)
+        start = time.perf_counter()
+        items = run(state)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return {'n': n, 'items': items, 'unit': unit, 'seconds': round(best, 6),
+            'per_item_ms': round(best * 1000 / max(items, 1), 4)}
+
+
+# === RAPORT I PORÓWNANIE ===
+
+def run_metadata():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = None
+    import numpy
+    import pandas
+    return {
+        'commit': commit or None,
+        'python': platform.python_version(),
+        'pandas': pandas.__version__,
+        'numpy': numpy.__version__,
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+
+
+def compare(results, baseline, threshold=None):
+    """Lista (pomiar, skala, czas bazowy, czas, stosunek, regresja) dla pomiarów obecnych w obu przebiegach."""
+    rows = []
+    for name, scales in results.items():
+        for scale, result in scales.items():
+            base = baseline.get(name, {}).get(scale)
+            if base is None:
+                continue
+            ratio = result['seconds'] / base['seconds'] if base['seconds'] else float('inf')
+            limit = threshold or THRESHOLDS.get(name, DEFAULT_THRESHOLD)
+            regressed = ratio > limit and result['seconds'] >= MIN_SECONDS
+            rows.append((name, scale, base['seconds'], result['seconds'], ratio, regressed))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pomiary pobierania, parsowania, przetwarzania i zapisu na lokalnych danych testowych.")
+    parser.add_argument('--scales', type=int, nargs='+', default=list(DEFAULT_SCALES))
+    parser.add_argument('--unit', type=int, default=DEFAULT_UNIT, help="Liczba tickerów/spółek dla skali 1x.")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--only', nargs='+', choices=list(BENCHMARKS), help="Uruchom tylko wybrane pomiary.")
+    parser.add_argument('--fixtures', help="Katalog z zapisanymi stronami (stooq/, stockwatch/, bankier/).")
+    parser.add_argument('--record', help="Zapisz wygenerowane strony do katalogu i zakończ.")
+    parser.add_argument('--save', help="Plik JSON na wyniki.")
+    parser.add_argument('--compare', help="Plik JSON z wynikami bazowymi.")
+    parser.add_argument('--threshold', type=float,
+                        help=f"Dopuszczalny stosunek czasu do bazowego (domyślnie z THRESHOLDS lub {DEFAULT_THRESHOLD}).")
+    args = parser.parse_args(argv)
+
+    work_dir = tempfile.mkdtemp(prefix='pinwestycji-bench-')
+    logging.disable(logging.CRITICAL)
+    import data
+    import data_fetcher
+    n_max = args.unit * max(args.scales)
+    if args.record:
+        ctx = Context(None, work_dir)
+        record_fixtures(args.record, ctx.tickers(n_max), ctx.companies(n_max), [args.unit * s for s in args.scales])
+        print(f"Zapisano strony dla {n_max} tickerów i spółek w {args.record}")
+        return 0
+
+    results = {}
+    try:
+        with standin_server(args.fixtures) as base_url:
+            data_fetcher.STOOQ_URL = f'{base_url}/q/d/l/'
+            data.STOCKWATCH_URL = f'{base_url}/gpw/'
+            ctx = Context(base_url, work_dir)
+            print(f"{'pomiar':<26}{'skala':>6}{'elementy':>10}{'czas s':>10}{'ms/el.':>10}")
+            for name in args.only or BENCHMARKS:
+                for scale in args.scales:
+                    result = measure(ctx, name, args.unit * scale, args.repeat)
+                    results.setdefault(name, {})[str(scale)] = result
+                    print(f"{name:<26}{scale:>5}x{result['items']:>10}{result['seconds']:>10.3f}{result['per_item_ms']:>10.3f}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {'meta': {**run_metadata(), 'unit': args.unit, 'repeat': args.repeat}, 'results': results}
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+    if not args.compare:
+        return 0
+    with open(args.compare) as f:
+        baseline = json.load(f)
+    if baseline.get('meta', {}).get('unit') != args.unit:
+        print(f"Uwaga: przebieg bazowy ma inny rozmiar 1x ({baseline.get('meta', {}).get('unit')})")
+    rows = compare(results, baseline.get('results', {}), args.threshold)
+    print(f"\n{'pomiar':<26}{'skala':>6}{'bazowy s':>10}{'teraz s':>10}{'stosunek':>10}")
+    for name, scale, base, current, ratio, regressed in rows:
+        print(f"{name:<26}{scale:>5}x{base:>10.3f}{current:>10.3f}{ratio:>10.2f}{'  REGRESJA' if regressed else ''}")
+    regressions = sum(row[-1] for row in rows)
+    print(f"Regresje: {regressions} z {len(rows)} porównanych pomiarów.")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
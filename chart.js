@@ -20,6 +20,30 @@ document.addEventListener('DOMContentLoaded', function() {
     const INDICATOR_LOOKBACK_PERIOD = 250; // Bezpieczny bufor dla wskaźników (np. SMA 200)
     // === KONIEC NOWEGO KODU ===
 
+    // === PARTYCJE ROCZNE (data/{TICKER}/manifest.json + data/{TICKER}/{ROK}.json) ===
+    let currentTicker = null;
+    let currentManifest = null;          // null = stary format z jednym plikiem data/{TICKER}.json
+    let loadedPartitionYears = new Set();
+    let isLoadingOlderData = false;
+    const SCROLL_LOAD_THRESHOLD = 10;    // Ile świec od lewej krawędzi uruchamia doładowanie starszych danych
+
+    // === WSKAŹNIKI PRZELICZONE NA SERWERZE (data/{TICKER}/{ROK}.ind.json, patrz indicators.py) ===
+    // Kolumny { time: [...], series: { sma20: [...], rsi14: [...], ... }, years: Set } scalone z wczytanych lat;
+    // `years` to lata, których plik udało się pobrać (brakujący rok wymusza liczenie w przeglądarce).
+    // Używane dla interwału dziennego; dla W/M i niestandardowych okresów liczymy w przeglądarce.
+    let indicatorData = null;
+
+    // === WERSJE PLIKÓW (data/manifest.json, patrz artifacts.py) ===
+    // Skrót treści każdego pliku trafia do adresu jako ?v=hash - takie adresy przeglądarka może
+    // trzymać w cache bezterminowo, a niezmieniony ticker nie jest pobierany ponownie.
+    let dataManifest = null;
+    let screenerMap = null;              // data/screener.json (patrz screener.py): ticker -> wiersz skanera
+
+    // === ŚWIECE W/M I PRZEGLĄD HISTORII (data/{TICKER}/W.json, M.json, overview.json, patrz rollups.py) ===
+    let rollupData = {};                 // { W: [...], M: [...], overview: [...] } - wczytywane przy pierwszym użyciu
+    let displayedSource = 'D';           // Skąd pochodzą świece na wykresie: 'D', 'W', 'M' lub 'overview'
+    const OVERVIEW_MIN_BARS = 4000;      // Od tylu świec dziennych w zakresie rysujemy przegląd zamiast pełnej historii
+
     // === GŁÓWNE WYKRESY ===
     const chartContainer = document.getElementById('tvchart');
     const mainChart = LightweightCharts.createChart(chartContainer, {
@@ -561,12 +585,21 @@ function updateHistoryButtonsUI() {
      * @param {string} interval - 'D', 'W' lub 'M'.
      */
     // Plik: chart.js -> setChartInterval (ZASTĄP CAŁĄ FUNKCJĘ)
-    window.setChartInterval = function(interval) {
+    window.setChartInterval = async function(interval) {
         if (activeInterval === interval) return;
     
         activeInterval = interval;
         document.getElementById('intervalButton').textContent = `Interwał (${interval})`;
     
+        // Świece W/M z serwera (albo partycje dzienne do agregacji w przeglądarce)
+        if (selectedStartDate) {
+            try {
+                await prepareRange(selectedStartDate, selectedEndDate);
+            } catch (error) {
+                console.error('Błąd przygotowania danych dla interwału:', error);
+            }
+        }
+        if (activeInterval !== interval) return; // W międzyczasie wybrano inny interwał
         // Zamiast bezpośrednio aktualizować, wywołujemy nową centralną funkcję
         filterAndDisplayData(); 
     }
@@ -862,7 +895,7 @@ function updateHistoryButtonsUI() {
     
         const lastDate = moment.unix(rawDailyData[rawDailyData.length - 1].time);
         const fiveYearsAgo = lastDate.clone().subtract(5, 'years'); // Używamy .clone() dla bezpieczeństwa
-        const firstDate = moment.unix(rawDailyData[0].time);
+        const firstDate = getFirstAvailableDate();
     
         selectedStartDate = firstDate.isAfter(fiveYearsAgo) ? firstDate : fiveYearsAgo;
         selectedEndDate = lastDate.clone(); // Klonujemy również tutaj dla pewności
@@ -898,21 +931,313 @@ function updateHistoryButtonsUI() {
                 "monthNames": ["Styczeń", "Luty", "Marzec", "Kwiecień", "Maj", "Czerwiec", "Lipiec", "Sierpień", "Wrzesień", "Październik", "Listopad", "Grudzień"],
                 "firstDay": 1
             }
-        }, function(start, end) {
+        }, async function(start, end) {
             selectedStartDate = start;
             selectedEndDate = end;
-            filterAndDisplayData();
             $('#dateRangePicker span').html(start.format('DD/MM/YYYY') + ' - ' + end.format('DD/MM/YYYY'));
+            // Doładuj świece W/M, przegląd lub starsze partycje, zanim przerysujemy wykres
+            await prepareRange(start, end);
+            filterAndDisplayData();
         });
     
         $('#dateRangePicker span').html(selectedStartDate.format('DD/MM/YYYY') + ' - ' + selectedEndDate.format('DD/MM/YYYY'));
     }
 
+    /**
+     * Najstarsza dostępna data tickera - z manifestu, nawet jeśli starsze partycje nie są jeszcze wczytane.
+     */
+    function getFirstAvailableDate() {
+        if (currentManifest && currentManifest.first_time) {
+            return moment.unix(currentManifest.first_time);
+        }
+        return moment.unix(rawDailyData[0].time);
+    }
+
+    /**
+     * Wczytuje (raz) tabelę skanera: kurs, zmiany, stopy zwrotu i min/max 52 tygodni wszystkich tickerów.
+     */
+    async function loadScreener() {
+        if (screenerMap) return screenerMap;
+        screenerMap = new Map();
+        try {
+            const response = await fetch('./data/screener.json', { cache: 'no-cache' });
+            if (!response.ok) return screenerMap;
+            const table = await response.json();
+            table.data.forEach(values => {
+                const row = {};
+                table.columns.forEach((column, i) => { row[column] = values[i]; });
+                screenerMap.set(row.ticker, row);
+            });
+        } catch (error) {
+            console.warn('Nie udało się wczytać data/screener.json:', error);
+        }
+        return screenerMap;
+    }
+
+    async function loadDataManifest() {
+        try {
+            const response = await fetch('./data/manifest.json', { cache: 'no-cache' });
+            if (response.ok) dataManifest = await response.json();
+        } catch (error) {
+            console.warn('Brak data/manifest.json - pliki będą pobierane bez wersji.', error);
+        }
+    }
+
+    /**
+     * Adres pliku z katalogu data/ z wersją z manifestu (o ile jest znana).
+     * @param {string} path - ścieżka względem data/, np. 'WIG/2024.json'
+     * @param {string} [version] - skrót treści pliku
+     */
+    function dataUrl(path, version) {
+        return version ? `./data/${path}?v=${version}` : `./data/${path}`;
+    }
+
+    function tickerFileUrl(ticker, file) {
+        const entry = currentManifest && currentManifest.files && currentManifest.files[file];
+        return dataUrl(`${ticker}/${file}`, entry && entry.hash);
+    }
+
+    /**
+     * Pobiera wskaźniki z serwera dla podanych lat; brak pliku nie jest błędem
+     * (wskaźniki zostaną wtedy policzone w przeglądarce).
+     */
+    async function fetchIndicatorYears(ticker, years) {
+        if (!currentManifest || !currentManifest.indicators) return;
+        const chunks = await Promise.all(years.map(async year => {
+            try {
+                const response = await fetch(tickerFileUrl(ticker, `${year}.ind.json`));
+                return response.ok ? response.json() : null;
+            } catch (error) {
+                return null;
+            }
+        }));
+        if (ticker !== currentTicker) return;
+
+        const loadedYears = new Set(indicatorData ? indicatorData.years : []);
+        years.forEach((year, i) => { if (chunks[i]) loadedYears.add(year); });
+        const parts = chunks.filter(Boolean);
+        if (indicatorData) parts.push({ time: indicatorData.time, ...indicatorData.series });
+        parts.sort((a, b) => a.time[0] - b.time[0]);
+        const merged = { time: [], series: {}, years: loadedYears };
+        currentManifest.indicators.forEach(name => { merged.series[name] = []; });
+        parts.forEach(part => {
+            merged.time.push(...part.time);
+            currentManifest.indicators.forEach(name => merged.series[name].push(...(part[name] || part.time.map(() => null))));
+        });
+        indicatorData = merged;
+    }
+
+    /**
+     * Seria wskaźnika z serwera w formacie {time, value} dla bieżących świec albo null,
+     * jeśli trzeba ją policzyć w przeglądarce (inny interwał, brak pliku, niepełny zakres).
+     */
+    function precomputedSeries(name) {
+        if (displayedSource !== 'D' || !indicatorData || candlestickData.length === 0) return null;
+        const values = indicatorData.series[name];
+        const times = indicatorData.time;
+        const from = candlestickData[0].time;
+        const to = candlestickData[candlestickData.length - 1].time;
+        if (!values || times.length === 0 || times[0] > from || times[times.length - 1] < to) return null;
+        // Każdy rok z partycją w zakresie musi pochodzić z pliku - luka po nieudanym pobraniu dałaby dziurę w serii
+        const firstYear = new Date(from * 1000).getUTCFullYear();
+        const lastYear = new Date(to * 1000).getUTCFullYear();
+        const missingYear = (currentManifest.partitions || []).some(
+            p => p.year >= firstYear && p.year <= lastYear && !indicatorData.years.has(p.year));
+        if (missingYear) return null;
+
+        const result = [];
+        for (let i = 0; i < times.length; i++) {
+            if (times[i] < from || times[i] > to || values[i] === null) continue;
+            result.push({ time: times[i], value: values[i] });
+        }
+        return result;
+    }
+
+    function getMovingAverage(type, period) {
+        if (type === 'SMA') return precomputedSeries(`sma${period}`) || calculateSMA(candlestickData, period);
+        if (type === 'EMA') return precomputedSeries(`ema${period}`) || calculateEMA(candlestickData, period);
+        return calculateWMA(candlestickData, period);
+    }
+
+    function getRSI() {
+        return precomputedSeries('rsi14') || calculateRSI(candlestickData);
+    }
+
+    function getMACD() {
+        const macd = precomputedSeries('macd');
+        const signal = precomputedSeries('macd_signal');
+        const histogram = precomputedSeries('macd_hist');
+        if (macd && signal && histogram) return { macd, signal, histogram };
+        return calculateMACD(candlestickData);
+    }
+
+    function getOBV() {
+        return precomputedSeries('obv') || calculateOBV(candlestickData);
+    }
+
+    /**
+     * Wczytuje (raz na ticker) świece W/M lub przegląd historii wygenerowane na serwerze.
+     * @returns {Array|null} - null, gdy ticker ich nie ma (stary format) lub pobranie się nie udało.
+     */
+    async function loadRollup(name) {
+        if (!currentManifest || !currentManifest.rollups || !currentManifest.rollups[name]) return null;
+        if (rollupData[name]) return rollupData[name];
+        const ticker = currentTicker;
+        try {
+            const response = await fetch(tickerFileUrl(ticker, currentManifest.rollups[name]));
+            if (!response.ok) return null;
+            const data = await response.json();
+            if (ticker === currentTicker) rollupData[name] = data;
+            return data;
+        } catch (error) {
+            console.error(`Błąd pobierania ${name} dla ${ticker}:`, error);
+            return null;
+        }
+    }
+
+    /**
+     * Szacowana liczba świec dziennych w zakresie - z manifestu, bez wczytywania partycji.
+     */
+    function estimateDailyBars(start, end) {
+        if (!currentManifest) return 0;
+        return currentManifest.partitions
+            .filter(p => p.year >= start.year() && p.year <= end.year())
+            .reduce((sum, p) => sum + p.rows, 0);
+    }
+
+    function useOverview(start, end) {
+        return activeInterval === 'D' && estimateDailyBars(start, end) >= OVERVIEW_MIN_BARS;
+    }
+
+    /**
+     * Przygotowuje dane dla zakresu: świece W/M lub przegląd z serwera, a gdy ich nie ma -
+     * brakujące partycje dzienne (z zapasem na INDICATOR_LOOKBACK_PERIOD).
+     */
+    async function prepareRange(start, end) {
+        if (activeInterval !== 'D' && await loadRollup(activeInterval)) return;
+        if (useOverview(start, end) && await loadRollup('overview')) return;
+        await ensurePartitionsLoaded(start.year() - 1);
+    }
+
+    async function fetchPartition(ticker, partition) {
+        const response = await fetch(tickerFileUrl(ticker, partition.file));
+        if (!response.ok) {
+            throw new Error(`Błąd pobierania partycji ${partition.file} dla ${ticker}: ${response.statusText}`);
+        }
+        return response.json();
+    }
+
+    /**
+     * Wczytuje manifest i najnowszą partycję tickera. Dla tickerów bez partycji
+     * (stary format) wczytuje cały plik data/{TICKER}.json.
+     */
+    async function loadInitialHistory(ticker) {
+        currentTicker = ticker;
+        currentManifest = null;
+        indicatorData = null;
+        rollupData = {};
+        loadedPartitionYears = new Set();
+
+        const entry = dataManifest && dataManifest.tickers && dataManifest.tickers[ticker];
+        const legacyFile = `${ticker}.json`;
+        const manifestResponse = entry && entry.file === legacyFile
+            ? { ok: false }
+            : await fetch(dataUrl(`${ticker}/manifest.json`, entry && entry.hash));
+        if (!manifestResponse.ok) {
+            const stooqResponse = await fetch(dataUrl(legacyFile, entry && entry.file === legacyFile ? entry.hash : null));
+            if (!stooqResponse.ok) {
+                throw new Error(`Błąd pobierania danych Stooq dla ${ticker}: ${stooqResponse.statusText}`);
+            }
+            return stooqResponse.json();
+        }
+
+        currentManifest = await manifestResponse.json();
+        const partitions = currentManifest.partitions || [];
+        if (partitions.length === 0) return [];
+
+        const latest = partitions[partitions.length - 1];
+        const [data] = await Promise.all([fetchPartition(ticker, latest), fetchIndicatorYears(ticker, [latest.year])]);
+        loadedPartitionYears.add(latest.year);
+        return data;
+    }
+
+    /**
+     * Dociąga brakujące partycje od roku `fromYear` wzwyż i scala je z rawDailyData.
+     * @returns {boolean} - true, jeśli dane zostały uzupełnione.
+     */
+    async function ensurePartitionsLoaded(fromYear) {
+        if (!currentManifest) return false;
+        const ticker = currentTicker;
+        const missing = currentManifest.partitions.filter(p => p.year >= fromYear && !loadedPartitionYears.has(p.year));
+        if (missing.length === 0) return false;
+
+        // Rezerwujemy lata od razu, żeby równoległe wywołania nie pobierały ich drugi raz
+        missing.forEach(p => loadedPartitionYears.add(p.year));
+        let chunks;
+        try {
+            [chunks] = await Promise.all([
+                Promise.all(missing.map(p => fetchPartition(ticker, p))),
+                fetchIndicatorYears(ticker, missing.map(p => p.year))
+            ]);
+        } catch (error) {
+            missing.forEach(p => loadedPartitionYears.delete(p.year));
+            throw error;
+        }
+        if (ticker !== currentTicker) return false; // W międzyczasie wybrano inny ticker
+
+        rawDailyData = chunks.flat().concat(rawDailyData).sort((a, b) => a.time - b.time);
+        return true;
+    }
+
+    /**
+     * Wywoływana, gdy użytkownik przewinie wykres do lewej krawędzi danych:
+     * poszerza zakres o rok wstecz, doładowując w razie potrzeby starszą partycję.
+     */
+    async function extendRangeOnScroll() {
+        if (isLoadingOlderData || rawDailyData.length === 0 || !selectedStartDate) return;
+        const firstDate = getFirstAvailableDate();
+        if (!selectedStartDate.isAfter(firstDate)) return;
+
+        isLoadingOlderData = true;
+        try {
+            const visibleRange = mainChart.timeScale().getVisibleRange();
+            const newStart = moment.max(selectedStartDate.clone().subtract(1, 'year'), firstDate);
+            await prepareRange(newStart, selectedEndDate);
+
+            selectedStartDate = newStart;
+            const picker = $('#dateRangePicker').data('daterangepicker');
+            if (picker) picker.setStartDate(selectedStartDate);
+            $('#dateRangePicker span').html(selectedStartDate.format('DD/MM/YYYY') + ' - ' + selectedEndDate.format('DD/MM/YYYY'));
+
+            filterAndDisplayData(visibleRange);
+        } catch (error) {
+            console.error('Błąd podczas doładowywania starszych danych:', error);
+        } finally {
+            isLoadingOlderData = false;
+        }
+    }
+
+    mainChart.timeScale().subscribeVisibleLogicalRangeChange(range => {
+        if (range && range.from < SCROLL_LOAD_THRESHOLD) {
+            extendRangeOnScroll();
+        }
+    });
+
     /**
      * Centralna funkcja, która filtruje dane wg daty, agreguje wg interwału i aktualizuje wykres.
+     * @param {Object} [visibleRange] - Zakres {from, to} do przywrócenia zamiast wybranego w kalendarzu.
      */
-    function filterAndDisplayData() {
+    function filterAndDisplayData(visibleRange) {
         if (!rawDailyData || rawDailyData.length === 0) return;
+
+        // Gotowe świece W/M lub przegląd całej historii - bez agregacji w przeglądarce
+        const source = activeInterval !== 'D' ? activeInterval
+            : (useOverview(selectedStartDate, selectedEndDate) ? 'overview' : null);
+        if (source && rollupData[source]) {
+            displayRollup(source, rollupData[source], visibleRange);
+            return;
+        }
+        displayedSource = activeInterval;
     
         // 1. Znajdź indeks pierwszej daty w naszym zakresie
         const startIndex = rawDailyData.findIndex(d => d.time >= selectedStartDate.unix());
@@ -939,11 +1264,28 @@ function updateHistoryButtonsUI() {
         updateAllCharts(aggregatedData);
         
         // 6. Ustaw widoczny zakres na wykresie
-        mainChart.timeScale().setVisibleRange({
+        mainChart.timeScale().setVisibleRange(visibleRange || {
             from: selectedStartDate.unix(),
             to: selectedEndDate.unix(),
         });
     }
+
+    /**
+     * Rysuje świece W/M lub przegląd historii z serwera dla wybranego zakresu dat.
+     */
+    function displayRollup(source, bars, visibleRange) {
+        const from = selectedStartDate.unix();
+        const to = selectedEndDate.unix();
+        let startIndex = bars.findIndex(d => d.time >= from);
+        if (startIndex === -1) startIndex = bars.length;
+        // Świece przed zakresem tylko jako zapas dla wskaźników liczonych w przeglądarce
+        const effectiveStartIndex = Math.max(0, startIndex - INDICATOR_LOOKBACK_PERIOD);
+        const filteredData = bars.slice(effectiveStartIndex).filter(d => d.time <= to);
+
+        displayedSource = source;
+        updateAllCharts(filteredData);
+        mainChart.timeScale().setVisibleRange(visibleRange || { from, to });
+    }
     // Plik: chart.js (w sekcji LOGIKA APLIKACJI)
 
     // === POCZĄTEK NOWEGO KODU - AGREGACJA DANYCH ===
@@ -1129,7 +1471,7 @@ function updateHistoryButtonsUI() {
          * Wypełnia tabelę składników indeksu WIG danymi z companyList
          * i dodaje logikę klikania wierszy.
          */
-        function populateWigTable() {
+        async function populateWigTable() {
             // Upewnijmy się, że odwołujemy się do właściwych elementów DOM
             const indexCompSection = document.getElementById('indexCompositionSection');
             const indexCompTableBody = document.getElementById('indexCompositionTableBody');
@@ -1145,6 +1487,10 @@ function updateHistoryButtonsUI() {
                 company && company.nazwa && company.ticker && company.udzial
             );
         
+            const screener = await loadScreener();
+            const formatNumber = (value, digits = 2) => (value === null || value === undefined) ? '-' : value.toFixed(digits);
+            const formatPercent = value => (value === null || value === undefined) ? '-' : `${(value * 100).toFixed(2)}%`;
+
             indexCompTitle.textContent = `Skład Indeksu WIG (${validCompanyList.length} spółek)`;
             indexCompTableBody.innerHTML = ''; // Wyczyść stare dane
         
@@ -1165,6 +1511,20 @@ function updateHistoryButtonsUI() {
                 tr.appendChild(tdNazwa);
                 tr.appendChild(tdTicker);
                 tr.appendChild(tdUdzial);
+
+                // Kolumny z tabeli skanera
+                const row = screener.get(company.ticker.toUpperCase()) || {};
+                [
+                    formatNumber(row.close),
+                    formatPercent(row.change_pct),
+                    formatPercent(row.ret_1m),
+                    formatPercent(row.ret_1r),
+                    `${formatNumber(row.low_52w)} / ${formatNumber(row.high_52w)}`
+                ].forEach(text => {
+                    const td = document.createElement('td');
+                    td.textContent = text;
+                    tr.appendChild(td);
+                });
         
                 // === Logika kliknięcia (Zadanie 2) ===
                 tr.addEventListener('click', (e) => {
@@ -1251,15 +1611,8 @@ function updateHistoryButtonsUI() {
         // === KONIEC ZMIAN ===
     
         try {
-            const stooqResponse = await fetch(`./data/${ticker.toUpperCase()}.json`);
-            
-            if (!stooqResponse.ok) {
-                throw new Error(`Błąd pobierania danych Stooq dla ${ticker}: ${stooqResponse.statusText}`);
-            }
-    
-            // Plik: chart.js -> loadChartData (NOWA WERSJA)
-            // ...
-            const stooqData = await stooqResponse.json();
+            // Najpierw tylko najnowsza partycja - wykres rysuje się od razu
+            const stooqData = await loadInitialHistory(ticker);
             if (stooqData.length === 0) {
                 alert(`Brak danych historycznych dla spółki ${ticker}.`);
                 return;
@@ -1274,6 +1627,11 @@ function updateHistoryButtonsUI() {
             // Inicjalizuj kalendarz i ustaw domyślny widok
             initializeDateRangePicker();
             filterAndDisplayData(); // To wywoła widok dla domyślnych dat z kalendarza
+
+            // W tle dociągamy partycje potrzebne dla domyślnego zakresu (5 lat + bufor wskaźników)
+            ensurePartitionsLoaded(selectedStartDate.year() - 1).then(loaded => {
+                if (loaded) filterAndDisplayData();
+            }).catch(error => console.error(`Błąd doładowywania historii dla ${ticker}:`, error));
             
             // Ustaw domyślny tekst przycisku interwału, ale bez ponownego przeliczania
             document.getElementById('intervalButton').textContent = `Interwał (D)`;
@@ -1849,13 +2207,13 @@ function updateHistoryButtonsUI() {
     
             switch (indicator.type) {
                 case 'SMA':
-                    data = calculateSMA(candlestickData, indicator.settings.period);
+                    data = getMovingAverage('SMA', indicator.settings.period);
                     console.log(`SMA (${indicator.settings.period}) punkty:`, data.length);
                     indicator.series.setData(data);
                     break;
     
                 case 'EMA':
-                    data = calculateEMA(candlestickData, indicator.settings.period);
+                    data = getMovingAverage('EMA', indicator.settings.period);
                     console.log(`EMA (${indicator.settings.period}) punkty:`, data.length);
                     indicator.series.setData(data);
                     break;
@@ -1877,13 +2235,13 @@ function updateHistoryButtonsUI() {
                     break;
     
                 case 'RSI':
-                    data = calculateRSI(candlestickData);
+                    data = getRSI();
                     console.log("RSI punkty:", data.length);
                     indicator.series.setData(data);
                     break;
     
                 case 'MACD':
-                    data = calculateMACD(candlestickData);
+                    data = getMACD();
                     console.log(`MACD aktualizacja: macd=${data.macd.length}, signal=${data.signal.length}, hist=${data.histogram.length}`);
                     indicator.series.macd.setData(data.macd);
                     indicator.series.signal.setData(data.signal);
@@ -1891,7 +2249,7 @@ function updateHistoryButtonsUI() {
                     break;
     
                 case 'OBV':
-                    data = calculateOBV(candlestickData);
+                    data = getOBV();
                     console.log("OBV punkty:", data.length);
                     indicator.series.setData(data);
                     break;
@@ -1931,10 +2289,7 @@ function updateHistoryButtonsUI() {
             return;
         }
         const id = `${type}-${period}`;
-        let data;
-        if(type === 'SMA') data = calculateSMA(candlestickData, period);
-        if(type === 'EMA') data = calculateEMA(candlestickData, period);
-        if(type === 'WMA') data = calculateWMA(candlestickData, period);
+        const data = getMovingAverage(type, period);
 
         addIndicator(id, type, { period }, data);
     });
@@ -1950,9 +2305,9 @@ function updateHistoryButtonsUI() {
             if (e.target.checked) {
                 let data;
                 if (type === 'Volume') data = candlestickData;
-                if (type === 'RSI') data = calculateRSI(candlestickData);
-                if (type === 'MACD') data = calculateMACD(candlestickData);
-                if (type === 'OBV') data = calculateOBV(candlestickData);
+                if (type === 'RSI') data = getRSI();
+                if (type === 'MACD') data = getMACD();
+                if (type === 'OBV') data = getOBV();
     
                 addIndicator(id, type, {}, data);
             } else {
@@ -2075,7 +2430,8 @@ function updateHistoryButtonsUI() {
     // === Inicjalizacja ===
     Promise.all([
         loadCompanyData(),    // Wczytaj listę spółek
-        loadForecastData()    // Wczytaj dane prognostyczne (WSKAŹNIKI)
+        loadForecastData(),   // Wczytaj dane prognostyczne (WSKAŹNIKI)
+        loadDataManifest()    // Wersje plików z data/ (adresy ?v=hash)
     ]).then(() => {
         // Obie funkcje zakończyły wczytywanie, dopiero teraz:
         loadChartData('WIG'); // Załaduj domyślny wykres
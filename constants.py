@@ -0,0 +1,6 @@
+# Plik: constants.py
+# Stałe wspólne dla data_fetcher.py (pobieranie) i app.py (serwer API).
+# Moduł nie importuje niczego, więc serwer API nie ładuje przez niego kodu pobierania danych.
+
+# Lista indeksów, które mają być pobierane statycznie
+INDEX_TICKERS = ['WIG', 'WIG20', 'MWIG40', 'SWIG80', 'WIG-UKRAIN'] # Dodaj tutaj wszystkie potrzebne indeksy
@@ -2,14 +2,53 @@
 
 import pandas as pd
 import requests
+import argparse
 import io
-import json
 import os
-from datetime import datetime
+import random
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from datetime import date, datetime
+from urllib.parse import urlparse
+from requests.adapters import HTTPAdapter
+
+import artifacts
+import indicators
+import metrics
+import price_store
+import rollups
+import screener
+from constants import INDEX_TICKERS
 
 # === KONFIGURACJA ===
-# Lista indeksów, które mają być pobierane statycznie
-INDEX_TICKERS = ['WIG', 'WIG20', 'MWIG40', 'SWIG80', 'WIG-UKRAIN'] # Dodaj tutaj wszystkie potrzebne indeksy
+# Adres bazowy Stooq. Zmienna środowiskowa STOOQ_URL pozwala wskazać lokalny serwer testowy.
+STOOQ_URL = os.environ.get('STOOQ_URL', 'https://stooq.pl/q/d/l/')
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+# Ustawienia pobierania współbieżnego
+MAX_WORKERS = 8               # Liczba wątków pobierających (1 = tryb sekwencyjny)
+MAX_PER_HOST = 4              # Maksymalna liczba równoległych zapytań do jednego hosta
+MIN_REQUEST_INTERVAL = 0.1    # Minimalny odstęp (s) między startami zapytań do jednego hosta
+REQUEST_TIMEOUT = (5, 30)     # Timeout (połączenie, odczyt) w sekundach
+MAX_RETRIES = 3               # Liczba ponownych prób po błędzie sieci / 429 / 5xx
+RETRY_BACKOFF = 1.0           # Bazowe opóźnienie (s) dla wykładniczego wycofania z losowym rozrzutem
+RETRY_MAX_DELAY = 30.0        # Górna granica (s) pojedynczego oczekiwania, także dla nagłówka Retry-After
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Aktualizacje przyrostowe: domyślnie pobieramy tylko brakujące dni, a pełną historię
+# co FULL_REFRESH_DAYS dni (rozłożone między tickery), żeby wyłapać korekty wsteczne.
+FULL_REFRESH_DAYS = 7
+
+# Statusy zwracane przez fetch_and_save_stooq_data
+STATUS_OK = 'ok'
+STATUS_UNCHANGED = 'unchanged' # Dane pobrane poprawnie, ale plik nie wymagał zmian
+STATUS_SKIPPED = 'skipped'    # Stooq nie zna symbolu lub zwrócił pusty plik
+STATUS_FAILED = 'failed'      # Błąd sieci, HTTP lub przetwarzania
 
 # Lista tickerów musi być znana - musimy ją pobrać z Twojego wig_companies.csv
 def get_all_tickers(csv_path='wig_companies.csv'):
@@ -37,67 +76,280 @@ if not os.path.exists(DATA_DIR):
     os.makedirs(DATA_DIR)
 
 
+# === WARSTWA HTTP: sesja z pulą połączeń, limity per host, ponowienia ===
+
+class HostLimiter:
+    """
+    Ogranicza liczbę równoległych zapytań do jednego hosta oraz minimalny
+    odstęp między kolejnymi zapytaniami (prosty limit częstotliwości).
+    Obiekt jest współdzielony przez wszystkie wątki pobierające.
+    """
+    def __init__(self, max_concurrent=MAX_PER_HOST, min_interval=MIN_REQUEST_INTERVAL):
+        self.max_concurrent = max_concurrent
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._semaphores = {}
+        self._next_start = {}
+
+    def _semaphore(self, host):
+        with self._lock:
+            if host not in self._semaphores:
+                self._semaphores[host] = threading.BoundedSemaphore(self.max_concurrent)
+            return self._semaphores[host]
+
+    @contextmanager
+    def slot(self, host):
+        """Blokuje do momentu, aż dla danego hosta zwolni się miejsce i minie wymagany odstęp."""
+        with self._semaphore(host):
+            with self._lock:
+                now = time.monotonic()
+                start = max(now, self._next_start.get(host, now))
+                self._next_start[host] = start + self.min_interval
+            if start > now:
+                time.sleep(start - now)
+            yield
+
+
+def create_session(pool_size=MAX_WORKERS):
+    """Tworzy sesję HTTP z pulą połączeń keep-alive współdzieloną przez wątki."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=0)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers.update(HEADERS)
+    return session
+
+
+def _retry_delay(attempt, response=None):
+    """Wykładnicze wycofanie z losowym rozrzutem; respektuje nagłówek Retry-After do RETRY_MAX_DELAY."""
+    if response is not None:
+        retry_after = response.headers.get('Retry-After', '')
+        if retry_after.isdigit():
+            # Rozrzut tylko w górę - serwer prosił o co najmniej tyle sekund
+            return min(float(retry_after), RETRY_MAX_DELAY) + random.uniform(0, RETRY_BACKOFF)
+    return min(RETRY_BACKOFF * (2 ** attempt), RETRY_MAX_DELAY) * random.uniform(0.5, 1.5)
+
+
+def fetch_with_retry(session, url, params=None, limiter=None, timeout=REQUEST_TIMEOUT, retries=MAX_RETRIES):
+    """
+    Wykonuje GET z timeoutem i ponowieniami dla błędów sieci oraz statusów z RETRY_STATUSES.
+    Zwraca ostatnią odpowiedź (także z błędnym statusem) lub rzuca wyjątek requests.
+    """
+    host = urlparse(url).netloc
+    for attempt in range(retries + 1):
+        response = None
+        if attempt:
+            metrics.count(retries=1)
+        try:
+            if limiter is not None:
+                with limiter.slot(host):
+                    response = session.get(url, params=params, timeout=timeout)
+            else:
+                response = session.get(url, params=params, timeout=timeout)
+            metrics.count(status=response.status_code)
+            if response.status_code not in RETRY_STATUSES or attempt == retries:
+                return response
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+            if attempt == retries:
+                raise
+        # Czekamy poza slotem limitera, żeby nie blokować innych wątków
+        time.sleep(_retry_delay(attempt, response))
+
+
 # Funkcja pobierająca (przeniesiona i zmodyfikowana z app.py)
-def fetch_and_save_stooq_data(ticker):
+def fetch_and_save_stooq_data(ticker, session=None, limiter=None, incremental=False, written=None):
+    """
+    Pobiera dzienne notowania tickera ze Stooq i zapisuje je w partycjach rocznych
+    data/{TICKER}/{ROK}.json (patrz price_store). W trybie przyrostowym pobiera tylko
+    zakres od ostatniej zapisanej świecy. Na dysk trafiają wyłącznie partycje,
+    których zawartość faktycznie się zmieniła.
+    Ścieżki zapisanych plików są dopisywane do listy `written` (o ile ją podano).
+    Zwraca jeden ze statusów: STATUS_OK, STATUS_UNCHANGED, STATUS_SKIPPED, STATUS_FAILED.
+    """
+    with metrics.track(ticker):
+        return _fetch_and_save(ticker, session, limiter, incremental, [] if written is None else written)
+
+
+def _fetch_and_save(ticker, session, limiter, incremental, written):
     print(f"Pobieranie danych dla: {ticker}...")
     try:
-        stooq_url = f"https://stooq.pl/q/d/l/?s={ticker.lower()}&i=d"
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        response = requests.get(stooq_url, headers=headers)
+        if session is None:
+            session = create_session(pool_size=1)
+
+        params = {'s': ticker.lower(), 'i': 'd'}
+        last_time = price_store.last_time(ticker, DATA_DIR) if incremental else None
+        delta = last_time is not None
+        if delta:
+            # Pobieramy także ostatni zapisany dzień - mógł zostać zapisany w trakcie sesji
+            params['d1'] = pd.to_datetime(last_time, unit='s').strftime('%Y%m%d')
+            params['d2'] = date.today().strftime('%Y%m%d')
+
+        with metrics.stage('download'):
+            response = fetch_with_retry(session, STOOQ_URL, params=params, limiter=limiter)
+            metrics.count(bytes_in=len(response.content))
         
-        if response.status_code != 200 or "Nie ma takiego symbolu" in response.text:
+        if response.status_code != 200:
+            print(f"Błąd HTTP {response.status_code} dla symbolu: {ticker}")
+            return STATUS_FAILED
+        if "Nie ma takiego symbolu" in response.text:
             print(f"Ostrzeżenie: Nie znaleziono danych dla symbolu: {ticker}")
-            return False
+            return STATUS_SKIPPED
 
-        csv_data = io.StringIO(response.text)
-        df = pd.read_csv(csv_data)
+        # Parsowanie i zapis odbywają się już poza slotem limitera,
+        # więc inne wątki w tym czasie pobierają kolejne tickery.
+        with metrics.stage('parse'):
+            df = parse_stooq_csv(response.text)
+        metrics.count(rows=len(df))
         
         if df.empty:
+            if delta:
+                print(f"Brak nowych notowań dla: {ticker}")
+                return STATUS_UNCHANGED
             print(f"Ostrzeżenie: Brak danych dla symbolu: {ticker}")
-            return False
+            return STATUS_SKIPPED
 
-        # Przetwarzanie danych
-        df.rename(columns={'Data': 'time', 'Otwarcie': 'open', 'Najwyzszy': 'high','Najnizszy': 'low', 'Zamkniecie': 'close', 'Wolumen': 'volume'}, inplace=True)
-        # Konwersja czasu na timestampy - kluczowe dla Lightweight Charts!
-        df['time'] = pd.to_datetime(df['time']).apply(lambda x: int(x.timestamp()))
-        df.sort_values('time', inplace=True)
-        
-        # Konwersja i usuwanie NaN
-        for col in ['open', 'high', 'low', 'close', 'volume']:
-            df[col] = pd.to_numeric(df[col], errors='coerce')
-        df.dropna(subset=['open', 'high', 'low', 'close'], inplace=True)
-        
-        # Zapis do pliku JSON
-        data_json = df.to_dict('records')
-        file_path = os.path.join(DATA_DIR, f'{ticker.upper()}.json')
-        
-        with open(file_path, 'w') as f:
-            json.dump(data_json, f)
-            
-        print(f"Zapisano dane dla {ticker} do {file_path}")
-        return True
+        with metrics.stage('save'):
+            written.extend(price_store.save_bars(ticker, df, DATA_DIR, replace=not delta))
+        if not written:
+            print(f"Bez zmian dla: {ticker}")
+            return STATUS_UNCHANGED
+        # Wskaźniki techniczne - przeliczany jest tylko ogon od pierwszej zmienionej świecy
+        with metrics.stage('indicators'):
+            written.extend(indicators.update_indicators(ticker, DATA_DIR))
+        # Świece W/M: przy pobraniu przyrostowym tylko od okresu pierwszej pobranej świecy
+        with metrics.stage('rollups'):
+            written.extend(rollups.update_rollups(ticker, DATA_DIR, since=int(df['time'].min()) if delta else None))
+        metrics.count(bytes_out=metrics.file_sizes(written))
+
+        print(f"Zapisano dane dla {ticker}: {', '.join(written)}")
+        return STATUS_OK
 
     except Exception as e:
         print(f"Błąd w fetch_and_save_stooq_data dla {ticker}: {e}")
+        return STATUS_FAILED
+
+
+def needs_full_refresh(ticker, every_days=FULL_REFRESH_DAYS, today=None):
+    """
+    Czy ticker powinien dziś zostać pobrany w całości.
+    Pełne odświeżenia są rozłożone równomiernie: każdy ticker raz na `every_days` dni
+    (0 = nigdy, 1 = codziennie).
+    """
+    if every_days <= 0:
         return False
+    today = today or date.today()
+    return (zlib.crc32(ticker.upper().encode()) + today.toordinal()) % every_days == 0
+
+
+def parse_stooq_csv(csv_text):
+    """Zamienia plik CSV ze Stooq na DataFrame w formacie Lightweight Charts."""
+    df = pd.read_csv(io.StringIO(csv_text))
+    if df.empty:
+        return df
+
+    # Przetwarzanie danych
+    df.rename(columns={'Data': 'time', 'Otwarcie': 'open', 'Najwyzszy': 'high','Najnizszy': 'low', 'Zamkniecie': 'close', 'Wolumen': 'volume'}, inplace=True)
+    # Konwersja czasu na timestampy - kluczowe dla Lightweight Charts!
+    df['time'] = pd.to_datetime(df['time']).apply(lambda x: int(x.timestamp()))
+    df.sort_values('time', inplace=True)
+    
+    # Konwersja i usuwanie NaN
+    for col in ['open', 'high', 'low', 'close', 'volume']:
+        df[col] = pd.to_numeric(df[col], errors='coerce')
+    df.dropna(subset=['open', 'high', 'low', 'close'], inplace=True)
+    return df
+
+
+def fetch_all(tickers, workers=MAX_WORKERS, limiter=None, incremental=False, refresh_every=FULL_REFRESH_DAYS,
+              written=None):
+    """
+    Pobiera dane dla wszystkich tickerów w puli wątków ze wspólną sesją HTTP.
+    W trybie przyrostowym tickery wskazane przez needs_full_refresh są pobierane w całości.
+    Słownik `written` (o ile go podano) dostaje {ticker: [ścieżki zapisanych plików]}.
+    Zwraca słownik {status: [tickery]}.
+    """
+    workers = max(1, workers)
+    session = create_session(pool_size=workers)
+    if limiter is None:
+        limiter = HostLimiter()
+    results = {STATUS_OK: [], STATUS_UNCHANGED: [], STATUS_SKIPPED: [], STATUS_FAILED: []}
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {}
+        for ticker in tickers:
+            delta = incremental and not needs_full_refresh(ticker, refresh_every)
+            files = None if written is None else written.setdefault(ticker, [])
+            futures[executor.submit(fetch_and_save_stooq_data, ticker, session, limiter, delta, files)] = ticker
+        for future in as_completed(futures):
+            results[future.result()].append(futures[future])
+
+    session.close()
+    for status in results:
+        results[status].sort()
+    return results
+
+
+def print_summary(results, elapsed):
+    print("=" * 60)
+    print(f"PODSUMOWANIE (czas: {elapsed:.1f} s)")
+    print(f"Zaktualizowano: {len(results[STATUS_OK])} {', '.join(results[STATUS_OK])}")
+    print(f"Bez zmian: {len(results[STATUS_UNCHANGED])}")
+    print(f"Pominięto: {len(results[STATUS_SKIPPED])} {', '.join(results[STATUS_SKIPPED])}")
+    print(f"Błędy: {len(results[STATUS_FAILED])} {', '.join(results[STATUS_FAILED])}")
+    print("=" * 60)
+
 
 # Główna funkcja wykonawcza
-def main():
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pobiera notowania GPW ze Stooq do katalogu data/.")
+    parser.add_argument('--workers', type=int, default=MAX_WORKERS, help="Liczba wątków pobierających (1 = sekwencyjnie).")
+    parser.add_argument('--per-host', type=int, default=MAX_PER_HOST, help="Maksymalna liczba równoległych zapytań do jednego hosta.")
+    parser.add_argument('--min-interval', type=float, default=MIN_REQUEST_INTERVAL, help="Minimalny odstęp (s) między zapytaniami do jednego hosta.")
+    parser.add_argument('--full-refresh', action='store_true', help="Pobierz pełną historię wszystkich tickerów.")
+    parser.add_argument('--refresh-every', type=int, default=FULL_REFRESH_DAYS, help="Pełne odświeżenie każdego tickera raz na N dni (0 = nigdy).")
+    parser.add_argument('--metrics', help="Zapisz pomiary etapów do pliku JSON (lub .prom - format Prometheusa).")
+    parser.add_argument('--profile-top', type=int, default=0, help="Zapisz stosy profilera próbkującego dla N najwolniejszych tickerów.")
+    parser.add_argument('--profile-dir', default='profiles', help="Katalog na stosy profilera (--profile-top).")
+    parser.add_argument('tickers', nargs='*', help="Opcjonalna lista tickerów (domyślnie wszystkie z wig_companies.csv).")
+    args = parser.parse_args(argv)
+    if args.profile_top and not args.metrics:
+        parser.error("--profile-top wymaga --metrics (stosy są zbierane przez rejestrator pomiarów).")
+
     print(f"Rozpoczęcie pobierania danych o: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     
     # 1. Pobieramy listę tickerów
-    tickers = get_all_tickers()
+    tickers = [t.upper() for t in args.tickers] or get_all_tickers()
     if not tickers:
         print("Nie znaleziono tickerów do przetworzenia. Zakończenie.")
-        return
+        return None
+
+    # 2. Pobieramy dane równolegle
+    if args.metrics:
+        metrics.start('stooq', profile_top=args.profile_top)
+    started = time.monotonic()
+    written = {}
+    with metrics.stage('fetch_all'):
+        results = fetch_all(tickers, workers=args.workers, limiter=HostLimiter(args.per_host, args.min_interval),
+                            incremental=not args.full_refresh, refresh_every=args.refresh_every, written=written)
+    print_summary(results, time.monotonic() - started)
+
+    # 3. Tabela skanera - przeliczane są tylko tickery ze zmienioną historią
+    with metrics.stage('screener'):
+        screener.update_screener(results[STATUS_OK], DATA_DIR)
+
+    # 4. Warianty .gz/.br i data/manifest.json ze skrótami - czytane są tylko pliki zapisane w tym przebiegu
+    with metrics.stage('publish'):
+        published = artifacts.publish_all(DATA_DIR, results[STATUS_OK], changed=written)
+    if published:
+        print(f"Zaktualizowano {os.path.join(DATA_DIR, artifacts.DATA_MANIFEST)}.")
 
-    # 2. Iterujemy i pobieramy dane
-    for ticker in tickers:
-        fetch_and_save_stooq_data(ticker)
+    recorder = metrics.stop()
+    if recorder is not None:
+        metrics.write(recorder, args.metrics, args.profile_dir)
+        print(f"Zapisano pomiary etapów w {args.metrics}.")
         
     print("Zakończono pobieranie danych.")
+    return results
 
 
 if __name__ == "__main__":
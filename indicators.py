@@ -0,0 +1,297 @@
+# Plik: indicators.py
+# Wskaźniki techniczne liczone po stronie serwera przy codziennym pobieraniu notowań.
+#
+# Wzory odpowiadają funkcjom calculateSMA/EMA/RSI/MACD/OBV z chart.js (łącznie z ich
+# szczegółami: EMA startuje od średniej z pierwszych `period` cen, RSI na pierwszym kroku
+# wygładza sumę, a nie średnią zysków/strat). Wyniki zapisujemy obok notowań:
+#   data/{TICKER}/indicators.bin    - kanoniczny zapis kolumnowy (format price_store) z pełną
+#                                     historią, stanem rekurencji RSI i danymi wejściowymi
+#   data/{TICKER}/{ROK}.ind.json    - serie dla frontendu: {"time": [...], "sma20": [...], ...},
+#                                     null tam, gdzie wskaźnik nie jest jeszcze określony
+# Po dopisaniu nowych świec przeliczany jest tylko ogon od pierwszej zmienionej świecy:
+# rekurencje (EMA, RSI, sygnał MACD, OBV) startują od zapisanej wartości poprzedniej świecy.
+
+import argparse
+import json
+import os
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+import price_store
+
+INDICATOR_FILE = 'indicators.bin'
+SMA_PERIODS = [10, 20, 50, 100, 200]
+EMA_PERIODS = [9, 12, 20, 26, 50, 100, 200]
+RSI_PERIOD = 14
+MACD_PERIODS = (12, 26, 9)      # Szybka EMA, wolna EMA, linia sygnału (jak w calculateMACD)
+EMA_BLOCK = 256                 # Długość bloku w wektorowym liczeniu rekurencji EMA
+
+# Kolumny pomocnicze w indicators.bin (nie trafiają do plików JSON)
+INPUT_COLUMNS = ['time', '_close', '_volume']
+STATE_COLUMNS = ['_rsi_gain', '_rsi_loss']
+
+
+def series_names():
+    """Nazwy serii udostępnianych frontendowi, w kolejności kolumn w plikach JSON."""
+    return ([f'sma{p}' for p in SMA_PERIODS] + [f'ema{p}' for p in EMA_PERIODS]
+            + [f'rsi{RSI_PERIOD}', 'macd', 'macd_signal', 'macd_hist', 'obv'])
+
+
+def indicator_path(ticker, data_dir=price_store.DATA_DIR):
+    return os.path.join(price_store.ticker_dir(ticker, data_dir), INDICATOR_FILE)
+
+
+def json_path(ticker, year, data_dir=price_store.DATA_DIR):
+    return os.path.join(price_store.ticker_dir(ticker, data_dir), f'{year}.ind.json')
+
+
+# === JĄDRA OBLICZENIOWE ===
+
+def ema_kernel(values, alpha, initial):
+    """
+    Rekurencja y[t] = alpha * x[t] + (1 - alpha) * y[t-1], y[-1] = initial, liczona blokami:
+    wewnątrz bloku długości EMA_BLOCK wynik to iloczyn dolnotrójkątnej macierzy wag
+    (1 - alpha)^(t - j) z wektorem cen plus wygaszony stan z poprzedniego bloku.
+    Wejście nie może zawierać NaN (zero razy NaN zepsułoby cały blok).
+    """
+    values = np.asarray(values, dtype='float64')
+    out = np.empty(len(values))
+    if len(values) == 0:
+        return out
+    decay = 1.0 - alpha
+    size = min(EMA_BLOCK, len(values))
+    powers = decay ** np.arange(size + 1)
+    lag = np.subtract.outer(np.arange(size), np.arange(size))
+    weights = np.where(lag >= 0, alpha * powers[np.clip(lag, 0, None)], 0.0)
+
+    previous = initial
+    for start in range(0, len(values), size):
+        block = values[start:start + size]
+        n = len(block)
+        out[start:start + n] = weights[:n, :n] @ block + powers[1:n + 1] * previous
+        previous = out[start + n - 1]
+    return out
+
+
+def sma(close, period, start=0):
+    """Średnia krocząca dla świec od indeksu `start`; NaN przed pierwszym pełnym oknem."""
+    out = np.full(len(close) - start, np.nan)
+    first = max(start, period - 1)
+    if first < len(close):
+        windows = sliding_window_view(close[first - period + 1:], period)
+        out[first - start:] = windows.sum(axis=1) / period
+    return out
+
+
+def ema(values, period, start=0, previous=None, offset=0):
+    """
+    EMA jak w calculateEMA: pierwsza wartość (indeks offset + period - 1) to średnia
+    z pierwszych `period` wartości, dalej rekurencja z k = 2 / (period + 1).
+    `offset` to indeks pierwszej określonej wartości wejścia (dla linii MACD),
+    `previous` - zapisana wartość EMA dla świecy start - 1.
+    """
+    seed = offset + period - 1
+    if start > seed and (previous is None or np.isnan(previous)):
+        return ema(values, period, 0, None, offset)[start:]
+    out = np.full(len(values) - start, np.nan)
+    if seed >= len(values):
+        return out
+    if start <= seed:
+        out[seed - start] = values[offset:seed + 1].sum() / period
+        first, previous = seed + 1, out[seed - start]
+    else:
+        first = start
+    out[first - start:] = ema_kernel(values[first:], 2.0 / (period + 1), previous)
+    return out
+
+
+def rsi(close, period=RSI_PERIOD, start=0, gain=None, loss=None):
+    """
+    RSI jak w calculateRSI. Do świecy `period` zyski i straty są sumowane, później
+    wygładzane wzorem (poprzednia * (period - 1) + bieżąca) / period - czyli EMA
+    z alpha = 1 / period startującą od sumy. Zwraca (rsi, wygładzone zyski, straty).
+    `gain`/`loss` to stan zapisany dla świecy start - 1.
+    """
+    n = len(close)
+    diff = np.diff(close, prepend=np.nan)
+    gains = np.where(diff > 0, diff, 0.0)
+    losses = np.where(diff < 0, -diff, 0.0)
+    avg_gain = np.full(n - start, np.nan)
+    avg_loss = np.full(n - start, np.nan)
+
+    if start <= period or gain is None:
+        head = min(period, n - 1)
+        if head >= 1:
+            avg_gain[max(1, start) - start:head + 1 - start] = np.cumsum(gains[1:head + 1])[max(1, start) - 1:]
+            avg_loss[max(1, start) - start:head + 1 - start] = np.cumsum(losses[1:head + 1])[max(1, start) - 1:]
+        first = period + 1
+        if first < n:
+            gain, loss = avg_gain[period - start], avg_loss[period - start]
+    else:
+        first = start
+    if first < n:
+        avg_gain[first - start:] = ema_kernel(gains[first:], 1.0 / period, gain)
+        avg_loss[first - start:] = ema_kernel(losses[first:], 1.0 / period, loss)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rs = np.where(avg_loss == 0, 100.0, avg_gain / avg_loss)
+    values = 100.0 - 100.0 / (1.0 + rs)
+    defined = np.arange(start, n) >= period
+    return np.where(defined, values, np.nan), avg_gain, avg_loss
+
+
+def obv(close, volume, start=0, previous=None):
+    """OBV jak w calculateOBV: wolumen dodawany przy wzroście, odejmowany przy spadku."""
+    diff = np.diff(close, prepend=np.nan)
+    signed = np.where(diff > 0, volume, np.where(diff < 0, -volume, 0.0))
+    out = np.full(len(close) - start, np.nan)
+    first = max(start, 1)
+    if first < len(close):
+        # Świeca 0 nie ma wartości OBV, więc suma bieżąca startuje od zera
+        base = previous if start >= 2 and previous is not None else 0.0
+        out[first - start:] = base + np.cumsum(signed[first:])
+    return out
+
+
+# === OBLICZANIE I ZAPIS ===
+
+def compute_indicators(close, volume, start=0, previous=None):
+    """
+    Liczy wszystkie serie dla świec od indeksu `start`.
+    `previous` to kolumny z indicators.bin (pełne, dla świec < start są niezmienione);
+    przy start = 0 liczymy od zera. Zwraca słownik pełnych kolumn (łącznie z pomocniczymi).
+    """
+    close = np.asarray(close, dtype='float64')
+    volume = np.asarray(volume, dtype='float64')
+    if previous is None:
+        start = 0
+
+    def last(name):
+        return previous[name][start - 1] if previous is not None and start > 0 else None
+
+    tail = {}
+    for period in SMA_PERIODS:
+        tail[f'sma{period}'] = sma(close, period, start)
+
+    fast, slow, signal = MACD_PERIODS
+    emas = {}
+    for period in sorted(set(EMA_PERIODS) | {fast, slow}):
+        # Okresy MACD spoza EMA_PERIODS nie mają zapisanego stanu - ema() liczy je od początku
+        emas[period] = ema(close, period, start, last(f'ema{period}') if period in EMA_PERIODS else None)
+        if period in EMA_PERIODS:
+            tail[f'ema{period}'] = emas[period]
+
+    tail[f'rsi{RSI_PERIOD}'], tail['_rsi_gain'], tail['_rsi_loss'] = rsi(
+        close, RSI_PERIOD, start, last('_rsi_gain'), last('_rsi_loss'))
+
+    # Linia MACD jest określona od świecy slow - 1, sygnał to EMA z tej linii
+    macd_tail = emas[fast] - emas[slow]
+    macd_line = np.concatenate([previous['macd'][:start], macd_tail]) if start else macd_tail
+    tail['macd'] = macd_tail
+    tail['macd_signal'] = ema(macd_line, signal, start, last('macd_signal'), offset=slow - 1)
+    tail['macd_hist'] = macd_tail - tail['macd_signal']
+    tail['obv'] = obv(close, volume, start, last('obv'))
+
+    result = {'time': None, '_close': close, '_volume': volume}
+    for name, values in tail.items():
+        result[name] = np.concatenate([previous[name][:start], values]) if start else values
+    return result
+
+
+def first_changed(previous, times, close, volume):
+    """Indeks pierwszej świecy różnej od danych, z których policzono `previous`."""
+    if previous is None:
+        return 0
+    n = min(len(times), len(previous['time']))
+
+    def differs(old, new):
+        return ~((old == new) | (np.isnan(old) & np.isnan(new)))
+
+    changed = (previous['time'][:n] != times[:n]) | differs(previous['_close'][:n], close[:n]) \
+        | differs(previous['_volume'][:n], volume[:n])
+    hits = np.flatnonzero(changed)
+    return int(hits[0]) if len(hits) else n
+
+
+def update_indicators(ticker, data_dir=price_store.DATA_DIR, full=False):
+    """
+    Aktualizuje wskaźniki tickera po zapisie notowań. Przelicza tylko świece od pierwszej
+    zmienionej i nadpisuje wyłącznie pliki JSON lat, których to dotyczy.
+    Zwraca listę zapisanych lub usuniętych plików (pusta = brak zmian).
+    """
+    manifest = price_store.load_manifest(ticker, data_dir)
+    if manifest is None:
+        return []
+    bars = price_store.read_range(ticker, data_dir=data_dir, as_frame=False)
+    if len(bars['time']) == 0:
+        return []
+    times = np.asarray(bars['time'], dtype='int64')
+    close = np.asarray(bars['close'], dtype='float64')
+    volume = np.asarray(bars['volume'], dtype='float64')
+
+    path = indicator_path(ticker, data_dir)
+    previous = None
+    if not full and os.path.exists(path):
+        previous = price_store.read_columns(path)
+        if set(previous) != set(INPUT_COLUMNS + STATE_COLUMNS + series_names()):
+            previous = None         # Zmieniony zestaw wskaźników - liczymy od nowa
+    start = first_changed(previous, times, close, volume)
+    if previous is not None and start == len(times) == len(previous['time']):
+        return []
+
+    columns = compute_indicators(close, volume, start, previous)
+    columns['time'] = times
+    names = INPUT_COLUMNS + STATE_COLUMNS + series_names()
+    price_store.write_columns(path, {name: columns[name] for name in names})
+    changed = [path]
+
+    years = times.astype('datetime64[s]').astype('datetime64[Y]').astype('int64') + 1970
+    first_year = int(years[min(start, len(times) - 1)])
+    known_years = {int(y) for y in np.unique(years)}
+    for year in sorted(known_years):
+        target = json_path(ticker, year, data_dir)
+        if year < first_year and os.path.exists(target):
+            continue
+        mask = years == year
+        export = {'time': times[mask].tolist()}
+        for name in series_names():
+            values = columns[name][mask]
+            export[name] = [None if np.isnan(v) else v for v in values.tolist()]
+        price_store.write_atomic(target, json.dumps(export, separators=(',', ':')))
+        changed.append(target)
+
+    for name in os.listdir(price_store.ticker_dir(ticker, data_dir)):
+        year = name.split('.')[0]
+        if name.endswith('.ind.json') and year.isdigit() and int(year) not in known_years:
+            os.remove(json_path(ticker, year, data_dir))
+            changed.append(json_path(ticker, year, data_dir))
+
+    if manifest.get('indicators') != series_names():
+        manifest['indicators'] = series_names()
+        price_store.save_manifest(ticker, manifest, data_dir)
+    return changed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Przelicza wskaźniki techniczne dla tickerów z katalogu data/.")
+    parser.add_argument('--data-dir', default=price_store.DATA_DIR)
+    parser.add_argument('--full', action='store_true', help="Przelicz całą historię zamiast samego ogona.")
+    parser.add_argument('tickers', nargs='*', help="Lista tickerów (domyślnie wszystkie z manifestem).")
+    args = parser.parse_args(argv)
+
+    tickers = [t.upper() for t in args.tickers] or sorted(
+        name for name in os.listdir(args.data_dir)
+        if os.path.exists(os.path.join(args.data_dir, name, price_store.MANIFEST_FILE)))
+    updated = 0
+    for ticker in tickers:
+        try:
+            if update_indicators(ticker, args.data_dir, full=args.full):
+                updated += 1
+        except Exception as e:
+            print(f"Błąd przeliczania wskaźników dla {ticker}: {e}")
+    print(f"Zaktualizowano wskaźniki dla {updated} z {len(tickers)} tickerów.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,304 @@
+# Plik: metrics.py
+# Lekkie pomiary etapów dla data_fetcher.py i scrapers/data.py.
+#
+# Dla każdego elementu (ticker, spółka) zbierane są czasy etapów (pobieranie, parsowanie,
+# zapis...), bajty pobrane i zapisane, liczba wierszy, ponowienia oraz statusy HTTP.
+# Na koniec przebiegu powstaje podsumowanie z histogramami czasów etapów, zapisywane jako
+# JSON albo plik tekstowy Prometheusa (rozszerzenie .prom, np. dla node_exporter textfile).
+#
+#   recorder = metrics.start('stooq', profile_top=5)
+#   with metrics.track('PKO'):                 # element przypisany do bieżącego wątku
+#       with metrics.stage('download'):
+#           ...
+#       metrics.count(bytes_in=len(body), rows=len(df))
+#   metrics.stop()
+#   metrics.write(recorder, 'metrics.json')
+#
+# Bez wywołania start() wszystkie funkcje modułu sprowadzają się do jednego porównania
+# z None. Etapy wywołane poza track() trafiają do czasów całego przebiegu.
+# profile_top=N uruchamia profiler próbkujący (stosy wątków co SAMPLE_INTERVAL s) i zapisuje
+# stosy N najwolniejszych elementów w formacie "collapsed" (flamegraph.pl, speedscope).
+# cProfile nie nadaje się tu, bo od Pythona 3.12 nie pozwala profilować kilku wątków naraz.
+
+import contextlib
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+
+# Granice przedziałów histogramów czasu (s), jak kubełki histogramu Prometheusa
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+COUNTERS = ('bytes_in', 'bytes_out', 'rows', 'retries')
+PERCENTILES = (50, 90, 99)
+SAMPLE_INTERVAL = 0.005
+MAX_STACK_DEPTH = 64
+PROMETHEUS_PREFIX = 'pinwestycji'
+
+_recorder = None
+_NULL = contextlib.nullcontext()
+
+
+class Recorder:
+    """Wyniki pomiarów jednego przebiegu; bezpieczny przy użyciu z wielu wątków."""
+    def __init__(self, pipeline, profile_top=0):
+        self.pipeline = pipeline
+        self.profile_top = profile_top
+        self.started = time.time()
+        self.duration = None
+        self.items = {}
+        self.run_stages = {}
+        self.http_status = Counter()
+        self.samples = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._active = {}
+        self._sampler = None
+        self._t0 = time.perf_counter()
+
+    def _item(self, key):
+        item = self.items.get(key)
+        if item is None:
+            item = self.items[key] = {'seconds': 0.0, 'stages': {}, **dict.fromkeys(COUNTERS, 0), 'status': None}
+        return item
+
+    @contextlib.contextmanager
+    def track(self, key):
+        previous = getattr(self._local, 'key', None)
+        thread = threading.get_ident()
+        self._local.key = key
+        self._active[thread] = key
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self._local.key = previous
+            if previous is None:
+                self._active.pop(thread, None)
+            else:
+                self._active[thread] = previous
+            with self._lock:
+                self._item(key)['seconds'] += elapsed
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            key = getattr(self._local, 'key', None)
+            with self._lock:
+                stages = self.run_stages if key is None else self._item(key)['stages']
+                stages[name] = stages.get(name, 0.0) + elapsed
+
+    def count(self, values):
+        key = getattr(self._local, 'key', None)
+        with self._lock:
+            status = values.pop('status', None)
+            if status is not None:
+                self.http_status[status] += 1
+            if key is None:
+                return
+            item = self._item(key)
+            if status is not None:
+                item['status'] = status
+            for name, value in values.items():
+                item[name] += value
+
+    def merge(self, items):
+        """Dołącza wyniki zebrane w innym procesie (słownik z Recorder.items)."""
+        with self._lock:
+            for key, other in items.items():
+                item = self._item(key)
+                item['seconds'] += other['seconds']
+                for name, seconds in other['stages'].items():
+                    item['stages'][name] = item['stages'].get(name, 0.0) + seconds
+                for name in COUNTERS:
+                    item[name] += other[name]
+                item['status'] = other['status'] or item['status']
+
+    # === PROFILER PRÓBKUJĄCY ===
+
+    def start_sampler(self):
+        self._sampler_stop = threading.Event()
+        self._sampler = threading.Thread(target=self._sample_loop, name='metrics-sampler', daemon=True)
+        self._sampler.start()
+
+    def _sample_loop(self):
+        own = threading.get_ident()
+        while not self._sampler_stop.wait(SAMPLE_INTERVAL):
+            frames = sys._current_frames()
+            for thread, key in list(self._active.items()):
+                frame = frames.get(thread)
+                if frame is None or thread == own:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < MAX_STACK_DEPTH:
+                    code = frame.f_code
+                    stack.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})')
+                    frame = frame.f_back
+                self.samples.setdefault(key, Counter())[';'.join(reversed(stack))] += 1
+
+    def finish(self):
+        self.duration = time.perf_counter() - self._t0
+        if self._sampler is not None:
+            self._sampler_stop.set()
+            self._sampler.join()
+            self._sampler = None
+
+    # === PODSUMOWANIE ===
+
+    def slowest(self, count=None):
+        ranked = sorted(self.items.items(), key=lambda kv: -kv[1]['seconds'])
+        return ranked[:count] if count is not None else ranked
+
+    def summary(self):
+        stages = {}
+        for item in self.items.values():
+            for name, seconds in item['stages'].items():
+                stages.setdefault(name, []).append(seconds)
+        return {
+            'pipeline': self.pipeline,
+            'started': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.started)),
+            'timestamp': int(self.started),
+            'duration': self.duration,
+            'items': len(self.items),
+            'totals': {name: sum(item[name] for item in self.items.values()) for name in COUNTERS},
+            'http_status': {str(status): n for status, n in sorted(self.http_status.items())},
+            'run_stages': dict(self.run_stages),
+            'stages': {name: histogram(values) for name, values in sorted(stages.items())},
+            'slowest': [{'key': key, **item} for key, item in self.slowest(max(self.profile_top, 10))],
+        }
+
+
+def histogram(values):
+    """Liczność, suma, percentyle i skumulowane kubełki BUCKETS dla listy czasów."""
+    values = sorted(values)
+    n = len(values)
+    result = {'count': n, 'sum': sum(values), 'max': values[-1] if values else 0.0}
+    for p in PERCENTILES:
+        result[f'p{p}'] = values[min(n - 1, int(n * p / 100))] if values else 0.0
+    result['buckets'] = {str(bound): sum(1 for v in values if v <= bound) for bound in BUCKETS}
+    return result
+
+
+# === INTERFEJS MODUŁU ===
+
+def start(pipeline, profile_top=0):
+    """Włącza pomiary w bieżącym procesie i zwraca nowy Recorder."""
+    global _recorder
+    _recorder = Recorder(pipeline, profile_top)
+    if profile_top:
+        _recorder.start_sampler()
+    return _recorder
+
+
+def stop():
+    """Wyłącza pomiary; zwraca zakończony Recorder (lub None, gdy pomiary były wyłączone)."""
+    global _recorder
+    recorder, _recorder = _recorder, None
+    if recorder is not None:
+        recorder.finish()
+    return recorder
+
+
+def enabled():
+    return _recorder is not None
+
+
+def track(key):
+    """Przypisuje pomiary bieżącego wątku do elementu `key` (ticker, spółka)."""
+    return _NULL if _recorder is None else _recorder.track(key)
+
+
+def stage(name):
+    """Mierzy czas etapu bieżącego elementu (poza track() - etapu całego przebiegu)."""
+    return _NULL if _recorder is None else _recorder.stage(name)
+
+
+def count(**values):
+    """Dodaje liczniki (bytes_in, bytes_out, rows, retries) i zapisuje status HTTP (status=...)."""
+    if _recorder is not None:
+        _recorder.count(values)
+
+
+def file_sizes(paths):
+    """Łączny rozmiar zapisanych plików (0, gdy pomiary są wyłączone - bez zbędnych stat())."""
+    if _recorder is None:
+        return 0
+    return sum(os.path.getsize(p) for p in paths if os.path.exists(p))
+
+
+def merge(items):
+    if _recorder is not None and items:
+        _recorder.merge(items)
+
+
+# === ZAPIS ===
+
+def write(recorder, path, profile_dir=None):
+    """Zapisuje podsumowanie (JSON lub .prom) i stosy najwolniejszych elementów do `profile_dir`."""
+    summary = recorder.summary()
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    # Plik tymczasowy + os.replace - scraper Prometheusa (textfile collector) nie odczyta połowy pliku
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        if path.endswith('.prom'):
+            f.write(to_prometheus(summary))
+        else:
+            json.dump({**summary, 'per_item': recorder.items}, f, indent=1, ensure_ascii=False)
+    os.replace(tmp_path, path)
+    if recorder.profile_top and profile_dir:
+        write_profiles(recorder, profile_dir)
+
+
+def write_profiles(recorder, profile_dir):
+    """Stosy N najwolniejszych elementów: {katalog}/{element}.folded (linia: "stos liczba_próbek")."""
+    os.makedirs(profile_dir, exist_ok=True)
+    written = []
+    for key, _ in recorder.slowest(recorder.profile_top):
+        samples = recorder.samples.get(key)
+        if not samples:
+            continue
+        path = os.path.join(profile_dir, re.sub(r'[^\w.-]', '_', str(key)) + '.folded')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.writelines(f'{stack} {n}\n' for stack, n in samples.most_common())
+        written.append(path)
+    return written
+
+
+def _labels(**labels):
+    return '{' + ','.join(f'{name}="{value}"' for name, value in labels.items()) + '}'
+
+
+def to_prometheus(summary):
+    """Podsumowanie w formacie tekstowym Prometheusa."""
+    p, pipeline = PROMETHEUS_PREFIX, summary['pipeline']
+    lines = [
+        f'# HELP {p}_stage_seconds Czas etapu na element (ticker, spółka).',
+        f'# TYPE {p}_stage_seconds histogram',
+    ]
+    for name, hist in summary['stages'].items():
+        for bound, n in hist['buckets'].items():
+            lines.append(f'{p}_stage_seconds_bucket{_labels(pipeline=pipeline, stage=name, le=bound)} {n}')
+        lines.append(f'{p}_stage_seconds_bucket{_labels(pipeline=pipeline, stage=name, le="+Inf")} {hist["count"]}')
+        lines.append(f'{p}_stage_seconds_sum{_labels(pipeline=pipeline, stage=name)} {hist["sum"]:.6f}')
+        lines.append(f'{p}_stage_seconds_count{_labels(pipeline=pipeline, stage=name)} {hist["count"]}')
+    lines += [f'# HELP {p}_run_stage_seconds Czas etapu całego przebiegu.', f'# TYPE {p}_run_stage_seconds gauge']
+    lines += [f'{p}_run_stage_seconds{_labels(pipeline=pipeline, stage=name)} {s:.6f}' for name, s in summary['run_stages'].items()]
+    for name, value in summary['totals'].items():
+        lines += [f'# TYPE {p}_{name}_total counter', f'{p}_{name}_total{_labels(pipeline=pipeline)} {value}']
+    lines.append(f'# TYPE {p}_http_responses_total counter')
+    lines += [f'{p}_http_responses_total{_labels(pipeline=pipeline, status=s)} {n}' for s, n in summary['http_status'].items()]
+    lines += [f'# TYPE {p}_items gauge', f'{p}_items{_labels(pipeline=pipeline)} {summary["items"]}']
+    lines += [f'# TYPE {p}_run_duration_seconds gauge',
+              f'{p}_run_duration_seconds{_labels(pipeline=pipeline)} {summary["duration"] or 0:.6f}',
+              f'# TYPE {p}_run_timestamp_seconds gauge',
+              f'{p}_run_timestamp_seconds{_labels(pipeline=pipeline)} {summary["timestamp"]}']
+    return '\n'.join(lines) + '\n'
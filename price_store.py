@@ -0,0 +1,309 @@
+# Plik: price_store.py
+# Magazyn notowań podzielony na partycje roczne:
+#   data/{TICKER}/manifest.json  - mały opis tickera (zakres dat, lista partycji)
+#   data/{TICKER}/{ROK}.bin      - kanoniczny zapis kolumnowy (patrz niżej)
+#   data/{TICKER}/{ROK}.json     - świece w formacie Lightweight Charts, generowane z pliku .bin
+# Codzienna aktualizacja dotyka tylko partycji bieżącego roku i manifestu.
+#
+# Format .bin (little-endian):
+#   8 B   magic b'PWCOL1\0\0'
+#   4 B   uint32 długość nagłówka (wyrównana do 64 B)
+#   4 B   uint32 liczba kolumn
+#   8 B   uint64 liczba wierszy
+#   24 B  na kolumnę: nazwa (16 B ASCII, dopełniona zerami) + dtype numpy (8 B, np. '<i8')
+#   dalej kolumny jedna po drugiej, każda jako ciągła tablica o stałej szerokości.
+
+import json
+import os
+import struct
+
+import numpy as np
+import pandas as pd
+
+DATA_DIR = 'data'
+MANIFEST_FILE = 'manifest.json'
+PRICE_COLUMNS = ['time', 'open', 'high', 'low', 'close', 'volume']
+PRICE_DTYPES = {'time': '<i8', 'open': '<f8', 'high': '<f8', 'low': '<f8', 'close': '<f8', 'volume': '<f8'}
+
+MAGIC = b'PWCOL1\0\0'
+_HEADER = struct.Struct('<8sIIQ')
+_COLUMN = struct.Struct('<16s8s')
+_ALIGN = 64
+
+
+def ticker_dir(ticker, data_dir=DATA_DIR):
+    return os.path.join(data_dir, ticker.upper())
+
+
+def legacy_path(ticker, data_dir=DATA_DIR):
+    """Ścieżka do starego, monolitycznego pliku data/{TICKER}.json."""
+    return os.path.join(data_dir, f'{ticker.upper()}.json')
+
+
+def partition_path(ticker, year, data_dir=DATA_DIR, ext='json'):
+    return os.path.join(ticker_dir(ticker, data_dir), f'{year}.{ext}')
+
+
+def write_atomic(path, body):
+    """
+    Zapisuje body (str lub bytes) przez plik tymczasowy i os.replace - serwer statyczny
+    i frontend nigdy nie zobaczą uciętego pliku. Zwraca liczbę zapisanych znaków/bajtów.
+    """
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb' if isinstance(body, bytes) else 'w') as f:
+        f.write(body)
+    os.replace(tmp_path, path)
+    return len(body)
+
+
+# === FORMAT KOLUMNOWY ===
+
+def write_columns(path, columns, dtypes=None):
+    """Zapisuje słownik {nazwa: tablica} w formacie kolumnowym (zapis atomowy)."""
+    dtypes = dtypes or {}
+    arrays = {name: np.ascontiguousarray(values, dtype=dtypes.get(name)) for name, values in columns.items()}
+    nrows = len(next(iter(arrays.values()))) if arrays else 0
+    header_len = -(-(_HEADER.size + _COLUMN.size * len(arrays)) // _ALIGN) * _ALIGN
+
+    header = bytearray(header_len)
+    _HEADER.pack_into(header, 0, MAGIC, header_len, len(arrays), nrows)
+    for i, (name, values) in enumerate(arrays.items()):
+        if len(values) != nrows:
+            raise ValueError(f"Kolumna {name} ma {len(values)} wierszy zamiast {nrows}.")
+        _COLUMN.pack_into(header, _HEADER.size + i * _COLUMN.size, name.encode('ascii'), values.dtype.str.encode('ascii'))
+
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(header)
+        for values in arrays.values():
+            f.write(values.tobytes())
+    os.replace(tmp_path, path)
+
+
+def read_columns(path):
+    """
+    Mapuje plik kolumnowy do pamięci i zwraca słownik {nazwa: np.ndarray}.
+    Tablice są widokami tylko do odczytu na zmapowany plik - bez kopiowania danych.
+    """
+    if os.path.getsize(path) <= _HEADER.size:
+        raise ValueError(f"Plik {path} jest zbyt krótki.")
+    mm = np.memmap(path, dtype=np.uint8, mode='r')
+    magic, header_len, ncols, nrows = _HEADER.unpack_from(mm, 0)
+    if magic != MAGIC:
+        raise ValueError(f"Plik {path} nie jest w formacie {MAGIC!r}.")
+
+    columns = {}
+    offset = header_len
+    for i in range(ncols):
+        name, dtype = _COLUMN.unpack_from(mm, _HEADER.size + i * _COLUMN.size)
+        dtype = np.dtype(dtype.rstrip(b'\0').decode('ascii'))
+        columns[name.rstrip(b'\0').decode('ascii')] = np.ndarray((nrows,), dtype=dtype, buffer=mm, offset=offset)
+        offset += nrows * dtype.itemsize
+    return columns
+
+
+def columns_to_frame(columns):
+    """Buduje DataFrame na tablicach z read_columns bez kopiowania."""
+    return pd.DataFrame(columns, copy=False)
+
+
+def read_range(ticker, start=None, end=None, data_dir=DATA_DIR, as_frame=True):
+    """
+    Zwraca notowania z przedziału [start, end] (znaczniki czasu w sekundach, None = bez limitu).
+    Granice są wyszukiwane binarnie w kolumnie `time`. Gdy zakres mieści się w jednej
+    partycji, wynik to widok na zmapowany plik (bez kopii); w przeciwnym razie
+    wycinki partycji są sklejane.
+    """
+    manifest = load_manifest(ticker, data_dir)
+    if manifest is None:
+        raise FileNotFoundError(f"Brak manifestu dla tickera {ticker}.")
+
+    pieces = []
+    for p in manifest['partitions']:
+        if (start is not None and p['last_time'] < start) or (end is not None and p['first_time'] > end):
+            continue
+        columns = read_columns(partition_path(ticker, p['year'], data_dir, 'bin'))
+        times = columns['time']
+        lo = 0 if start is None else np.searchsorted(times, start, side='left')
+        hi = len(times) if end is None else np.searchsorted(times, end, side='right')
+        pieces.append({name: values[lo:hi] for name, values in columns.items()})
+
+    if len(pieces) == 1:
+        result = pieces[0]
+    else:
+        result = {
+            name: np.concatenate([piece[name] for piece in pieces]) if pieces else np.empty(0, dtype=dtype)
+            for name, dtype in PRICE_DTYPES.items()
+        }
+    return columns_to_frame(result) if as_frame else result
+
+
+def load_manifest(ticker, data_dir=DATA_DIR):
+    """Zwraca manifest tickera lub None, jeśli ticker nie ma jeszcze partycji."""
+    path = os.path.join(ticker_dir(ticker, data_dir), MANIFEST_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_manifest(ticker, manifest, data_dir=DATA_DIR):
+    """Zapisuje manifest tickera atomowo - czytelnik (app.py, frontend) nie zobaczy uciętego pliku."""
+    path = os.path.join(ticker_dir(ticker, data_dir), MANIFEST_FILE)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, path)
+    return path
+
+
+def last_time(ticker, data_dir=DATA_DIR):
+    """Czas ostatniej zapisanej świecy (z manifestu lub starego pliku) albo None."""
+    manifest = load_manifest(ticker, data_dir)
+    if manifest is not None:
+        return manifest['last_time']
+    legacy = _read_json_bars(legacy_path(ticker, data_dir))
+    if legacy is None or legacy.empty:
+        return None
+    return int(legacy['time'].iloc[-1])
+
+
+def load_bars(ticker, data_dir=DATA_DIR, years=None):
+    """
+    Wczytuje notowania tickera jako DataFrame (wszystkie lata lub tylko podane).
+    Obsługuje również stary format data/{TICKER}.json. Zwraca None, gdy brak danych.
+    """
+    manifest = load_manifest(ticker, data_dir)
+    if manifest is None:
+        df = _read_json_bars(legacy_path(ticker, data_dir))
+        if df is not None and years is not None:
+            df = df[_years(df).isin(years)].reset_index(drop=True)
+        return df
+
+    frames = [
+        _read_partition(ticker, p['year'], data_dir)
+        for p in manifest['partitions']
+        if years is None or p['year'] in years
+    ]
+    frames = [f for f in frames if f is not None]
+    if not frames:
+        return pd.DataFrame(columns=PRICE_COLUMNS)
+    return pd.concat(frames, ignore_index=True)
+
+
+def save_bars(ticker, df, data_dir=DATA_DIR, replace=True):
+    """
+    Zapisuje notowania w partycjach rocznych i aktualizuje manifest.
+
+    replace=True  - df to pełna historia; partycje spoza df są usuwane.
+    replace=False - df to tylko nowe świece; są one dołączane do istniejących partycji.
+
+    Nadpisywane są wyłącznie partycje, których zawartość się zmieniła.
+    Stary plik data/{TICKER}.json jest przy okazji migrowany i usuwany.
+    Zwraca listę zapisanych lub usuniętych plików (pusta = brak zmian).
+    """
+    manifest = load_manifest(ticker, data_dir)
+    changed = []
+    legacy_file = None
+
+    if manifest is None:
+        manifest = {'ticker': ticker.upper(), 'partitions': []}
+        if os.path.exists(legacy_path(ticker, data_dir)):
+            legacy_file = legacy_path(ticker, data_dir)
+            if not replace:
+                df = merge_bars(_read_json_bars(legacy_file), df)
+            replace = True
+
+    os.makedirs(ticker_dir(ticker, data_dir), exist_ok=True)
+    known = {p['year']: p for p in manifest['partitions']}
+    partitions = dict(known) if not replace else {}
+
+    for year, part in df.groupby(_years(df), sort=True):
+        year = int(year)
+        existing = _read_partition(ticker, year, data_dir) if year in known else None
+        if existing is not None and not replace:
+            part = merge_bars(existing, part)
+        part = part[PRICE_COLUMNS].reset_index(drop=True)
+        partitions[year] = {
+            'year': year,
+            'file': f'{year}.json',
+            'bin': f'{year}.bin',
+            'rows': len(part),
+            'first_time': int(part['time'].iloc[0]),
+            'last_time': int(part['time'].iloc[-1]),
+        }
+        bin_path = partition_path(ticker, year, data_dir, 'bin')
+        if existing is not None and bars_equal(existing, part) and os.path.exists(bin_path):
+            continue
+        write_columns(bin_path, {col: part[col].to_numpy() for col in PRICE_COLUMNS}, PRICE_DTYPES)
+        changed.append(bin_path)
+        changed.append(export_json(ticker, year, data_dir))
+
+    for year in set(known) - set(partitions):
+        for ext in ('bin', 'json'):
+            path = partition_path(ticker, year, data_dir, ext)
+            if os.path.exists(path):
+                os.remove(path)
+                changed.append(path)
+
+    if changed or legacy_file:
+        ordered = [partitions[y] for y in sorted(partitions)]
+        manifest.update({
+            'partitions': ordered,
+            'rows': sum(p['rows'] for p in ordered),
+            'first_time': ordered[0]['first_time'] if ordered else None,
+            'last_time': ordered[-1]['last_time'] if ordered else None,
+        })
+        save_manifest(ticker, manifest, data_dir)
+
+    # Stary plik usuwamy dopiero po zapisaniu partycji i manifestu - błąd wcześniej go nie gubi
+    if legacy_file:
+        os.remove(legacy_file)
+        changed.append(legacy_file)
+    return changed
+
+
+def export_json(ticker, year, data_dir=DATA_DIR):
+    """Generuje partycję JSON dla frontendu z kanonicznego pliku .bin i zwraca jej ścieżkę."""
+    columns = read_columns(partition_path(ticker, year, data_dir, 'bin'))
+    names = list(columns)
+    rows = zip(*(columns[name].tolist() for name in names))
+    path = partition_path(ticker, year, data_dir)
+    write_atomic(path, json.dumps([dict(zip(names, row)) for row in rows]))
+    return path
+
+
+def merge_bars(existing, new):
+    """Łączy historię z nowymi świecami; przy powtórzonym `time` wygrywa nowa świeca."""
+    merged = pd.concat([existing[PRICE_COLUMNS], new[PRICE_COLUMNS]], ignore_index=True)
+    merged.drop_duplicates(subset='time', keep='last', inplace=True)
+    merged.sort_values('time', inplace=True)
+    return merged.reset_index(drop=True)
+
+
+def bars_equal(left, right):
+    """Porównuje dwie historie niezależnie od typów kolumn (int/float) i indeksu."""
+    if len(left) != len(right):
+        return False
+    left = left[PRICE_COLUMNS].astype('float64').reset_index(drop=True)
+    right = right[PRICE_COLUMNS].astype('float64').reset_index(drop=True)
+    return left.equals(right)
+
+
+def _years(df):
+    return pd.to_datetime(df['time'], unit='s').dt.year
+
+
+def _read_partition(ticker, year, data_dir):
+    """Wczytuje partycję z pliku .bin, a dla partycji sprzed wprowadzenia formatu - z JSON."""
+    bin_path = partition_path(ticker, year, data_dir, 'bin')
+    if os.path.exists(bin_path):
+        return columns_to_frame(read_columns(bin_path))
+    return _read_json_bars(partition_path(ticker, year, data_dir))
+
+
+def _read_json_bars(path):
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return pd.DataFrame(json.load(f), columns=PRICE_COLUMNS)
@@ -0,0 +1,154 @@
+# Plik: rollups.py
+# Świece tygodniowe i miesięczne oraz przegląd długiej historii, generowane przy pobieraniu notowań.
+#
+#   data/{TICKER}/W.bin, M.bin     - kanoniczne świece W/M w formacie kolumnowym price_store
+#   data/{TICKER}/W.json, M.json   - te same świece w formacie Lightweight Charts
+#   data/{TICKER}/overview.json    - co najwyżej OVERVIEW_POINTS świec dla widoku całej historii
+#
+# Podział na okresy jest taki sam jak w aggregateDataToInterval z chart.js: tydzień zaczyna się
+# w poniedziałek (UTC), miesiąc to rok + miesiąc (UTC); świeca okresu ma czas pierwszej świecy
+# dziennej, open pierwszej, close ostatniej, high/low to maksimum/minimum, volume to suma.
+# Przegląd łączy po `krok` kolejnych świec dziennych w jedną (krok = ceil(liczba świec /
+# OVERVIEW_POINTS)), więc zachowuje skrajne high/low całej historii.
+# Przy aktualizacji przyrostowej przeliczane są tylko okresy od tego, w którym wypada pierwsza
+# nowa świeca - wcześniejsze świece W/M pozostają bez zmian.
+
+import argparse
+import json
+import os
+
+import numpy as np
+
+import price_store
+
+ROLLUP_INTERVALS = ('W', 'M')
+OVERVIEW_POINTS = 1000
+OVERVIEW_FILE = 'overview.json'
+SECONDS_PER_DAY = 86400
+
+
+def rollup_path(ticker, interval, data_dir=price_store.DATA_DIR, ext='json'):
+    return os.path.join(price_store.ticker_dir(ticker, data_dir), f'{interval}.{ext}')
+
+
+def bucket_keys(times, interval):
+    """Klucz okresu dla każdej świecy: dzień poniedziałku (W) lub numer miesiąca od 1970 (M)."""
+    times = np.asarray(times, dtype='int64')
+    if interval == 'W':
+        days = times // SECONDS_PER_DAY
+        return days - (days + 3) % 7          # 1970-01-01 to czwartek
+    if interval == 'M':
+        return times.astype('datetime64[s]').astype('datetime64[M]').astype('int64')
+    raise ValueError(f"Nieznany interwał: {interval}")
+
+
+def bucket_start(key, interval):
+    """Początek okresu (sekundy UTC) dla klucza z bucket_keys."""
+    if interval == 'W':
+        return int(key) * SECONDS_PER_DAY
+    return int(np.datetime64(int(key), 'M').astype('datetime64[s]').astype('int64'))
+
+
+def aggregate(columns, starts):
+    """Łączy świece dzienne w grupy zaczynające się od indeksów `starts` (rosnąco, starts[0] = 0)."""
+    if len(columns['time']) == 0:
+        return {name: np.empty(0, dtype=dtype) for name, dtype in price_store.PRICE_DTYPES.items()}
+    ends = np.append(starts[1:], len(columns['time'])) - 1
+    return {
+        'time': np.asarray(columns['time'])[starts],
+        'open': np.asarray(columns['open'])[starts],
+        'high': np.maximum.reduceat(columns['high'], starts),
+        'low': np.minimum.reduceat(columns['low'], starts),
+        'close': np.asarray(columns['close'])[ends],
+        'volume': np.add.reduceat(np.asarray(columns['volume'], dtype='float64'), starts),
+    }
+
+
+def rollup(columns, interval):
+    """Świece tygodniowe ('W') lub miesięczne ('M') z kolumn świec dziennych."""
+    keys = bucket_keys(columns['time'], interval)
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]]) if len(keys) else np.empty(0, dtype='int64')
+    return aggregate(columns, starts)
+
+
+def overview(columns, points=OVERVIEW_POINTS):
+    """Przegląd historii o stałym rozmiarze: grupy po ceil(n / points) kolejnych świec."""
+    n = len(columns['time'])
+    step = max(1, -(-n // points))
+    return aggregate(columns, np.arange(0, n, step))
+
+
+# === ZAPIS ===
+
+def _write_if_changed(path, columns):
+    """Zapisuje .bin i .json, o ile zawartość się zmieniła. Zwraca listę zapisanych plików."""
+    bin_path = path + '.bin'
+    if os.path.exists(bin_path):
+        old = price_store.read_columns(bin_path)
+        if all(np.array_equal(old[name], columns[name], equal_nan=name != 'time') for name in price_store.PRICE_COLUMNS):
+            return []
+    price_store.write_columns(bin_path, columns, price_store.PRICE_DTYPES)
+    names = price_store.PRICE_COLUMNS
+    rows = zip(*(np.asarray(columns[name]).tolist() for name in names))
+    # json.dumps korzysta z kodera w C, json.dump koduje strumieniowo w Pythonie
+    price_store.write_atomic(path + '.json', json.dumps([dict(zip(names, row)) for row in rows]))
+    return [bin_path, path + '.json']
+
+
+def update_rollups(ticker, data_dir=price_store.DATA_DIR, since=None):
+    """
+    Aktualizuje świece W/M i przegląd tickera. `since` to czas pierwszej nowej lub zmienionej
+    świecy dziennej - przeliczane są tylko okresy od tego, w którym wypada; None = od początku.
+    Zwraca listę zapisanych plików (pusta = brak zmian).
+    """
+    manifest = price_store.load_manifest(ticker, data_dir)
+    if manifest is None or not manifest['partitions']:
+        return []
+    changed = []
+
+    for interval in ROLLUP_INTERVALS:
+        base = os.path.join(price_store.ticker_dir(ticker, data_dir), interval)
+        existing = None
+        if since is not None and os.path.exists(base + '.bin'):
+            existing = price_store.read_columns(base + '.bin')
+        if existing is None:
+            result = rollup(price_store.read_range(ticker, data_dir=data_dir, as_frame=False), interval)
+        else:
+            key = bucket_keys([since], interval)[0]
+            keep = np.searchsorted(bucket_keys(existing['time'], interval), key, side='left')
+            tail = rollup(price_store.read_range(ticker, bucket_start(key, interval), data_dir=data_dir, as_frame=False), interval)
+            result = {name: np.concatenate([existing[name][:keep], tail[name]]) for name in price_store.PRICE_COLUMNS}
+        changed += _write_if_changed(base, result)
+
+    daily = price_store.read_range(ticker, data_dir=data_dir, as_frame=False)
+    changed += _write_if_changed(os.path.join(price_store.ticker_dir(ticker, data_dir), 'overview'), overview(daily))
+
+    files = {interval: f'{interval}.json' for interval in ROLLUP_INTERVALS}
+    files['overview'] = OVERVIEW_FILE
+    if manifest.get('rollups') != files:
+        manifest['rollups'] = files
+        price_store.save_manifest(ticker, manifest, data_dir)
+    return changed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generuje świece W/M i przegląd historii dla tickerów z katalogu data/.")
+    parser.add_argument('--data-dir', default=price_store.DATA_DIR)
+    parser.add_argument('tickers', nargs='*', help="Lista tickerów (domyślnie wszystkie z manifestem).")
+    args = parser.parse_args(argv)
+
+    tickers = [t.upper() for t in args.tickers] or sorted(
+        name for name in os.listdir(args.data_dir)
+        if os.path.exists(os.path.join(args.data_dir, name, price_store.MANIFEST_FILE)))
+    updated = 0
+    for ticker in tickers:
+        try:
+            if update_rollups(ticker, args.data_dir):
+                updated += 1
+        except Exception as e:
+            print(f"Błąd generowania świec W/M dla {ticker}: {e}")
+    print(f"Zaktualizowano świece W/M dla {updated} z {len(tickers)} tickerów.")
+
+
+if __name__ == '__main__':
+    main()
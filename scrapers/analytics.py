@@ -0,0 +1,433 @@
+# Plik: analytics.py
+# Odpowiednik procedur MySQL Calculate_Wig_Annual_Summary i GenerateForecasts
+# (katalog mysql_procedure/) liczony w pandas/NumPy, bez tabel tymczasowych.
+#
+# Wyniki mają być identyczne z procedurami, dlatego odwzorowujemy semantykę MySQL:
+#   - CAST(REPLACE(x, ' ', '') AS SIGNED/UNSIGNED/DECIMAL/DOUBLE) - liczba z początku napisu,
+#     pusty lub nieliczbowy napis daje 0, NULL zostaje NULL-em,
+#   - dzielenie liczb DECIMAL - wynik ze skalą dzielnej + 4 (div_precision_increment),
+#     zaokrąglany "połówką w górę"; ROUND() na DECIMAL również "połówką w górę",
+#   - ROUND() na DOUBLE - rint(x * 10^d) / 10^d (tak jak np.round),
+#   - AVG() na DOUBLE - zwykła suma w kolejności klucza głównego (Ticker, Rok).
+# Arytmetyka DECIMAL jest dokładna: liczby całkowite Pythona przeskalowane o 10^skala.
+#
+# AnalyticsEngine przechowuje wyniki i odciski danych każdego tickera, więc po kolejnym
+# scrapowaniu przelicza tylko tickery, których dane kwartalne się zmieniły.
+
+import argparse
+import csv
+import hashlib
+import logging
+import os
+import pickle
+import re
+import sys
+
+import numpy as np
+import pandas as pd
+
+ANNUAL_COLUMNS = ['Spółka', 'Ticker', 'Rok', 'EPS', 'C/Z', 'Procentowa zmiana EPS r/r',
+                  'Zysk netto', 'Liczba akcji', 'Kurs']
+FORECAST_COLUMNS = ['Spółka', 'Ticker', 'Średnia stopa wzrostu EPS r/r', 'Średni wskaźnik C/Z',
+                    'Prognoza EPS na kolejny rok', 'Prognoza ceny akcji na następny rok',
+                    'EPS za poprzedni rok', 'Aktualny EPS', 'Obliczona Średnia z Ostatnich lat']
+INPUT_COLUMNS = ['Spółka', 'Ticker', 'Kwartał', 'Liczba akcji', 'Zysk netto', 'Kurs']
+FORECAST_YEARS = 5
+STATE_VERSION = 1           # Podbij przy zmianie formatu stanu AnalyticsEngine (patrz save/load)
+
+_QUARTER = r'^Q[1-4][0-9]{4}$'
+_SPACE = '\t\n\v\f\r'
+_RE_INT = re.compile(rf'^[{_SPACE}]*([+-]?\d+)')
+_RE_DECIMAL = re.compile(rf'^[{_SPACE}]*([+-]?)(\d*)(?:\.(\d*))?')
+_RE_DOUBLE = re.compile(rf'^[{_SPACE}]*([+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)')
+
+
+# === RZUTOWANIA I ZAOKRĄGLENIA W STYLU MYSQL ===
+
+def _mysql_text(value):
+    """Tekst, na którym działa REPLACE(x, ' ', '') - także dla kolumn liczbowych."""
+    if isinstance(value, (float, np.floating)):
+        text = repr(float(value))
+        return text[:-2] if text.endswith('.0') else text
+    return str(value).replace(' ', '')
+
+
+def _cast(values, parse):
+    """Stosuje parse() do wartości niepustych; NULL (None/NaN) pozostaje None."""
+    values = pd.Series(values)
+    result = pd.Series(None, index=values.index, dtype=object)
+    present = values.notna()
+    result[present] = [parse(_mysql_text(v)) for v in values[present]]
+    return result
+
+
+def _to_int(text):
+    match = _RE_INT.match(text)
+    return int(match.group(1)) if match else 0
+
+
+def mysql_signed(values):
+    """CAST(REPLACE(x, ' ', '') AS SIGNED)."""
+    return _cast(values, _to_int)
+
+
+def mysql_unsigned(values):
+    """CAST(REPLACE(x, ' ', '') AS UNSIGNED) - liczby ujemne są zawijane modulo 2^64."""
+    return _cast(values, lambda text: _to_int(text) % 2 ** 64)
+
+
+def mysql_decimal0(values):
+    """CAST(REPLACE(x, ' ', '') AS DECIMAL(20,0)) - część ułamkowa zaokrąglana połówką w górę."""
+    def parse(text):
+        sign, whole, fraction = _RE_DECIMAL.match(text).groups()
+        if not whole and not fraction:
+            return 0
+        value = int(whole or 0) + (1 if fraction and fraction[0] >= '5' else 0)
+        return -value if sign == '-' else value
+    return _cast(values, parse)
+
+
+def mysql_double(values):
+    """CAST(REPLACE(x, ' ', '') AS DOUBLE) jako float64 (NULL -> NaN)."""
+    def parse(text):
+        match = _RE_DOUBLE.match(text)
+        return float(match.group(1)) if match else 0.0
+    return _cast(values, parse).astype('float64')
+
+
+def div_half_up(numerator, denominator):
+    """Iloraz liczb całkowitych zaokrąglony połówką w górę (od zera), jak dzielenie DECIMAL w MySQL."""
+    numerator = np.asarray(numerator, dtype=object)
+    denominator = np.asarray(denominator, dtype=object)
+    quotient = (2 * np.abs(numerator) + np.abs(denominator)) // (2 * np.abs(denominator))
+    return np.where((numerator < 0) != (denominator < 0), -quotient, quotient)
+
+
+def mysql_double_text(value):
+    """CAST(double AS CHAR) - najkrótszy zapis, bez '.0' dla liczb całkowitych."""
+    return _mysql_text(value)
+
+
+# === CALCULATE_WIG_ANNUAL_SUMMARY ===
+
+def annual_summary(indicators):
+    """
+    Odpowiednik procedury Calculate_Wig_Annual_Summary.
+    indicators: wiersze tabeli wig_indicators_summary (kolumny INPUT_COLUMNS).
+    Zwraca DataFrame o kolumnach ANNUAL_COLUMNS (tabela wig_annual_summary).
+    """
+    df = indicators[indicators['Kwartał'].astype(object).str.match(_QUARTER, case=False, na=False)]
+    if df.empty:
+        return pd.DataFrame(columns=ANNUAL_COLUMNS)
+
+    quarter = df['Kwartał'].astype(object)
+    is_q4 = quarter.str.upper().str.startswith('Q4')
+    keys = [df['Spółka'], df['Ticker'], quarter.str[-4:].rename('Rok')]
+    valid = df['Liczba akcji'].notna() & df['Zysk netto'].notna() & df['Kurs'].notna()
+
+    grouped = pd.DataFrame({
+        'valid': valid,
+        'profit': mysql_signed(df['Zysk netto']).fillna(0) * 1000,
+        'shares': mysql_unsigned(df['Liczba akcji']).where(is_q4, None),
+        'price': mysql_double(df['Kurs']).where(is_q4),
+    }).groupby(keys, dropna=False, sort=True)
+    years = pd.DataFrame({
+        'valid': grouped['valid'].sum(),
+        'profit': grouped['profit'].sum(),
+        'shares': grouped['shares'].max(),
+        'price': grouped['price'].max(),
+    })
+    years = years[years['valid'] == 4].reset_index()
+    if years.empty:
+        return pd.DataFrame(columns=ANNUAL_COLUMNS)
+    years['Rok'] = years['Rok'].astype(int)
+
+    # current_year_eps: DECIMAL ze skalą 4, przechowywany jako liczba całkowita * 10^4 (None = NULL)
+    shares = years['shares'].to_numpy(dtype=object)
+    has_eps = pd.notna(shares) & (shares != 0)
+    eps = np.full(len(years), None, dtype=object)
+    eps[has_eps] = div_half_up(years['profit'].to_numpy(dtype=object)[has_eps] * 10 ** 4, shares[has_eps])
+    years['eps'] = eps
+
+    previous = years[['Ticker', 'Rok', 'eps']].rename(columns={'eps': 'prev_eps'})
+    previous['Rok'] = previous['Rok'] + 1
+    years = years.merge(previous, on=['Ticker', 'Rok'], how='left')
+
+    result = pd.DataFrame({
+        'Spółka': years['Spółka'],
+        'Ticker': years['Ticker'],
+        'Rok': years['Rok'],
+        'EPS': _decimal_round(years['eps'], 4, 2),
+        'C/Z': _price_to_earnings(years['price'], years['eps']),
+        'Procentowa zmiana EPS r/r': _eps_growth(years['eps'], years['prev_eps']),
+        'Zysk netto': years['profit'].astype('Int64'),
+        'Liczba akcji': years['shares'].astype('Int64'),
+        'Kurs': years['price'].astype('float64'),
+    })
+    return result.sort_values(['Ticker', 'Rok'], kind='stable').reset_index(drop=True)
+
+
+def _decimal_round(scaled, scale, digits):
+    """ROUND(DECIMAL o skali `scale`, digits) jako float64 (NULL -> NaN)."""
+    values = scaled.to_numpy(dtype=object)
+    present = pd.notna(values)
+    result = np.full(len(values), np.nan)
+    factor = 10 ** (scale - digits)
+    result[present] = (div_half_up(values[present], factor) / 10 ** digits).astype('float64')
+    return result
+
+
+def _price_to_earnings(price, eps):
+    """ROUND(Kurs Q4 / current_year_eps, 2) - dzielenie DOUBLE, zero w mianowniku daje NULL."""
+    values = eps.to_numpy(dtype=object)
+    present = pd.notna(values) & (values != 0) & price.notna().to_numpy()
+    result = np.full(len(values), np.nan)
+    result[present] = np.round(price.to_numpy()[present] / (values[present] / 10 ** 4).astype('float64'), 2)
+    return result
+
+
+def _eps_growth(current, previous):
+    """
+    Procentowa zmiana EPS r/r wg wyrażenia CASE z procedury (logika trójwartościowa SQL,
+    COALESCE(..., 0) dla NULL). Argumenty: DECIMAL ze skalą 4 jako liczby całkowite.
+    """
+    cur = current.to_numpy(dtype=object)
+    prev = previous.to_numpy(dtype=object)
+    has_prev = pd.notna(prev)
+    has_cur = pd.notna(cur)
+    cur = np.where(has_cur, cur, 0)
+    prev = np.where(has_prev, prev, 1)
+    negative_prev = has_prev & (prev < 0)
+
+    # Dzielenie DECIMAL: skala 4 / skala 4 -> skala 8; mnożenie przez 100 nie zmienia skali
+    after_loss = has_cur & negative_prev & (cur >= 0)
+    both_loss = has_cur & negative_prev & (cur < 0)
+    regular = has_cur & has_prev & ~negative_prev & (prev != 0)
+
+    growth8 = np.zeros(len(cur), dtype=object)
+    growth8[after_loss] = (div_half_up(cur[after_loss] * 10 ** 8, np.abs(prev[after_loss])) + 10 ** 8) * 100
+    growth8[both_loss] = div_half_up((cur[both_loss] - prev[both_loss]) * 10 ** 8, np.abs(prev[both_loss])) * 100
+    growth8[regular] = div_half_up((cur[regular] - prev[regular]) * 10 ** 8, prev[regular]) * 100
+    return _decimal_round(pd.Series(growth8), 8, 2)
+
+
+# === GENERATEFORECASTS ===
+
+def latest_eps(indicators):
+    """
+    Sumaryczny zysk netto i liczba akcji z 4 ostatnich wierszy każdego tickera (temp_latest_eps).
+    Kolejność wierszy wejścia odpowiada kolumnie id w wig_indicators_with_id (ostatni = najnowszy).
+    """
+    rows = indicators.groupby('Ticker', sort=False, dropna=False).tail(4)
+    profit = mysql_decimal0(rows['Zysk netto']).fillna(0)
+    shares = mysql_unsigned(rows['Liczba akcji']).fillna(0)
+    is_last = ~rows['Ticker'].duplicated(keep='last')
+    return pd.DataFrame({
+        'Ticker': rows['Ticker'][is_last].to_numpy(),
+        'TotalNetProfit': (profit.groupby(rows['Ticker'], sort=False, dropna=False).sum() * 1000).to_numpy(),
+        'LatestShareCount': shares[is_last].to_numpy(),
+    })
+
+
+def forecasts(annual, latest, start_year, end_year):
+    """
+    Odpowiednik procedury GenerateForecasts(start_year, end_year).
+    annual: wynik annual_summary, latest: wynik latest_eps.
+    Zwraca DataFrame o kolumnach FORECAST_COLUMNS (tabela wig_company_forecasts).
+    """
+    window = annual[(annual['Rok'] >= start_year) & (annual['Rok'] <= end_year)]
+    window = window.sort_values(['Ticker', 'Rok'], kind='stable')
+    if window.empty:
+        return pd.DataFrame(columns=FORECAST_COLUMNS)
+
+    groups = window.groupby(['Ticker', 'Spółka'], sort=True, dropna=False)
+    stats = pd.DataFrame({
+        'avg_growth': groups['Procentowa zmiana EPS r/r'].agg(_sequential_mean),
+        'avg_pe': groups['C/Z'].agg(_sequential_mean),
+        'last_eps': window['EPS'].where(window['Rok'] == end_year).groupby(
+            [window['Ticker'], window['Spółka']], sort=True, dropna=False).max(),
+    }).reset_index()
+
+    latest = latest.drop_duplicates('Ticker').set_index('Ticker').reindex(stats['Ticker'])
+    share_count = latest['LatestShareCount'].to_numpy(dtype=object)
+    has_shares = pd.notna(share_count) & (share_count > 0)
+    current_eps = np.zeros(len(stats))
+    if has_shares.any():
+        eps4 = div_half_up(latest['TotalNetProfit'].to_numpy(dtype=object)[has_shares] * 10 ** 4, share_count[has_shares])
+        current_eps[has_shares] = (div_half_up(eps4, 100) / 100).astype('float64')
+
+    forecast_eps = stats['last_eps'] * (1 + stats['avg_growth'] / 100)
+    forecast_price = forecast_eps * stats['avg_pe']
+    not_available = (forecast_eps <= 0) | (stats['avg_pe'] <= 0)
+    price_text = np.where(not_available, 'N/A', None).astype(object)
+    computable = ~not_available & forecast_price.notna()
+    price_text[computable.to_numpy()] = [mysql_double_text(v) for v in np.round(forecast_price[computable], 2)]
+
+    result = pd.DataFrame({
+        'Spółka': stats['Spółka'],
+        'Ticker': stats['Ticker'],
+        'Średnia stopa wzrostu EPS r/r': np.round(stats['avg_growth'], 2),
+        'Średni wskaźnik C/Z': np.round(stats['avg_pe'], 2),
+        'Prognoza EPS na kolejny rok': np.round(forecast_eps, 2),
+        'Prognoza ceny akcji na następny rok': price_text,
+        'EPS za poprzedni rok': stats['last_eps'],
+        'Aktualny EPS': current_eps,
+        'Obliczona Średnia z Ostatnich lat': end_year - start_year + 1,
+    })
+    return result.reset_index(drop=True)
+
+
+def _sequential_mean(values):
+    """AVG() z MySQL: suma kolejnych wartości DOUBLE (bez NULL) podzielona przez ich liczbę."""
+    total, count = 0.0, 0
+    for value in values:
+        if value == value:
+            total += value
+            count += 1
+    return total / count if count else np.nan
+
+
+# === SILNIK PRZYROSTOWY ===
+
+def ticker_fingerprints(indicators):
+    """Odcisk danych każdego tickera (zależny od wartości i kolejności jego wierszy)."""
+    rows = indicators[INPUT_COLUMNS].astype(object).assign(_position=indicators.groupby('Ticker', sort=False).cumcount())
+    hashes = pd.util.hash_pandas_object(rows, index=False).to_numpy()
+    order = np.argsort(indicators['Ticker'].to_numpy(dtype=object).astype(str), kind='stable')
+    tickers = indicators['Ticker'].to_numpy(dtype=object)[order]
+    starts = np.flatnonzero(np.r_[True, tickers[1:] != tickers[:-1]]) if len(tickers) else np.array([], dtype=int)
+    combined = np.bitwise_xor.reduceat(hashes[order], starts) if len(starts) else []
+    return dict(zip(tickers[starts], (int(h) for h in combined)))
+
+
+class AnalyticsEngine:
+    """
+    Przechowuje wig_annual_summary, dane do "Aktualnego EPS" i wyliczone prognozy.
+    update() porównuje odciski tickerów i przelicza wyłącznie te, których wiersze
+    kwartalne się zmieniły (lub zniknęły); reszta wyników jest używana ponownie.
+    """
+    def __init__(self):
+        self.fingerprints = {}
+        self.annual = pd.DataFrame(columns=ANNUAL_COLUMNS)
+        self.latest = pd.DataFrame(columns=['Ticker', 'TotalNetProfit', 'LatestShareCount'])
+        self._forecasts = {}
+
+    def update(self, indicators):
+        """Wczytuje aktualne wiersze wig_indicators_summary; zwraca zbiór przeliczonych tickerów."""
+        indicators = indicators[indicators['Ticker'].notna()]
+        fingerprints = ticker_fingerprints(indicators)
+        changed = {t for t, h in fingerprints.items() if self.fingerprints.get(t) != h}
+        stale = changed | (set(self.fingerprints) - set(fingerprints))
+        if not stale:
+            return changed
+
+        subset = indicators[indicators['Ticker'].isin(changed)]
+        annual = annual_summary(subset)
+        self.annual = _replace_rows(self.annual, annual, stale, ['Ticker', 'Rok'])
+        self.latest = _replace_rows(self.latest, latest_eps(subset), stale, ['Ticker'])
+        for (start_year, end_year), cached in self._forecasts.items():
+            fresh = forecasts(annual, self.latest, start_year, end_year)
+            self._forecasts[start_year, end_year] = _replace_rows(cached, fresh, stale, ['Ticker'])
+        self.fingerprints = fingerprints
+        logging.info(f"Przeliczono wskaźniki roczne dla {len(changed)} tickerów ({len(stale) - len(changed)} usuniętych).")
+        return changed
+
+    def forecasts(self, start_year, end_year):
+        key = (start_year, end_year)
+        if key not in self._forecasts:
+            self._forecasts[key] = forecasts(self.annual, self.latest, start_year, end_year)
+        return self._forecasts[key]
+
+    def save(self, path):
+        """Zapisuje stan atomowo, z wersją formatu i skrótem kodu modułu."""
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump({'version': STATE_VERSION, 'code': code_version(), 'state': self.__dict__}, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Wczytuje stan zapisany przez save(). Stan z innej wersji formatu lub policzony innym
+        kodem (zmienione wzory, kolumny) jest odrzucany - wszystkie tickery zostaną przeliczone.
+        """
+        engine = cls()
+        if not os.path.exists(path):
+            return engine
+        try:
+            with open(path, 'rb') as f:
+                saved = pickle.load(f)
+        except Exception as e:
+            logging.warning(f"Nie udało się wczytać stanu z {path} ({e}) - przeliczam wszystkie tickery.")
+            return engine
+        if not isinstance(saved, dict) or saved.get('version') != STATE_VERSION or saved.get('code') != code_version():
+            logging.info(f"Stan w {path} pochodzi z innej wersji kodu - przeliczam wszystkie tickery.")
+            return engine
+        engine.__dict__.update(saved['state'])
+        return engine
+
+
+def code_version():
+    """Skrót źródła tego modułu - każda zmiana wzorów unieważnia zapisany stan silnika."""
+    with open(__file__, 'rb') as f:
+        return hashlib.blake2b(f.read(), digest_size=8).hexdigest()
+
+
+def _replace_rows(current, fresh, tickers, sort_by):
+    kept = current[~current['Ticker'].isin(tickers)]
+    frames = [f for f in (kept, fresh) if not f.empty]
+    if not frames:
+        return current.iloc[0:0]
+    return pd.concat(frames, ignore_index=True).sort_values(sort_by, kind='stable').reset_index(drop=True)
+
+
+# === URUCHOMIENIE ===
+
+def load_indicators(engine):
+    """
+    Wczytuje dane kwartalne z bazy. Gdy istnieje wig_indicators_with_id, kolejność wierszy
+    wyznacza kolumna id (jak w GenerateForecasts), w przeciwnym razie kolejność tabeli.
+    """
+    from sqlalchemy import inspect
+    if inspect(engine).has_table('wig_indicators_with_id'):
+        df = pd.read_sql('SELECT * FROM wig_indicators_with_id ORDER BY id', engine)
+    else:
+        df = pd.read_sql_table('wig_indicators_summary', engine)
+    return df[INPUT_COLUMNS]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Podsumowanie roczne i prognozy spółek WIG (odpowiednik procedur MySQL).")
+    parser.add_argument('--start-year', type=int, help="Pierwszy rok okna średnich (domyślnie koniec okna - 4).")
+    parser.add_argument('--end-year', type=int, help="Ostatni rok okna (domyślnie ostatni pełny rok w danych).")
+    parser.add_argument('--input', help="Plik CSV z danymi kwartalnymi zamiast tabeli w bazie.")
+    parser.add_argument('--state', default=os.path.join('.cache', 'analytics_state.pkl'),
+                        help="Plik ze stanem silnika (wyniki z poprzedniego uruchomienia).")
+    parser.add_argument('--output', default='wig_company_forecasts.csv', help="Plik CSV z prognozami.")
+    parser.add_argument('--save-db', action='store_true', help="Zapisz też tabele wig_annual_summary i wig_company_forecasts w bazie.")
+    args = parser.parse_args(argv)
+
+    from data import create_database_engine, save_dataframe_to_db
+    db = None if args.input and not args.save_db else create_database_engine()
+    indicators = pd.read_csv(args.input) if args.input else load_indicators(db)
+
+    engine = AnalyticsEngine.load(args.state)
+    engine.update(indicators)
+    end_year = args.end_year or int(engine.annual['Rok'].max())
+    start_year = args.start_year or end_year - FORECAST_YEARS + 1
+    result = engine.forecasts(start_year, end_year)
+
+    os.makedirs(os.path.dirname(args.state) or '.', exist_ok=True)
+    engine.save(args.state)
+    result.to_csv(args.output, index=False, quoting=csv.QUOTE_ALL)
+    logging.info(f"Zapisano prognozy {len(result)} spółek ({start_year}-{end_year}) do {args.output}.")
+    if args.save_db:
+        save_dataframe_to_db(engine.annual, db, 'wig_annual_summary', key_columns=['Ticker', 'Rok'])
+        save_dataframe_to_db(result, db, 'wig_company_forecasts', key_columns=['Ticker'])
+
+
+if __name__ == '__main__':
+    # Uruchomienie jako skrypt: data.py korzysta z modułów w katalogu głównym repozytorium (metrics.py)
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    main()
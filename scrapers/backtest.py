@@ -0,0 +1,242 @@
+# Plik: backtest.py
+# Historyczny test prognozy ceny z GenerateForecasts (analytics.forecasts): prognoza EPS
+# (EPS z ostatniego roku okna * (1 + średnia zmiana EPS r/r)) razy średni wskaźnik C/Z okna.
+#
+# Zamiast uruchamiać procedurę osobno dla każdego okna i tickera, wskaźniki roczne
+# (analytics.annual_summary) są układane w tablice [ticker x rok], a średnie liczone
+# jednocześnie dla wszystkich okien o końcu w każdym roku danych (pętla tylko po latach okna).
+# Prognozę dla okna kończącego się w roku R porównujemy z ostatnim zamknięciem roku R+1
+# z magazynu notowań (data/, patrz price_store); kursem bazowym jest ostatnie zamknięcie roku R.
+# Wyniki są zgodne z analytics.forecasts dla tego samego okna (średnie sumowane po kolei).
+#
+# Uwaga: dane za rok R są publikowane dopiero w I kwartale R+1, więc kurs bazowy z końca roku R
+# wyprzedza moment, w którym prognoza byłaby dostępna - trafność kierunku jest przez to zawyżona.
+#
+# Uruchomienie (z katalogu głównego repozytorium):
+#   python scrapers/backtest.py --input kwartaly.csv [--lengths 3 5 7] [--workers 4]
+
+import argparse
+import logging
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+if __name__ == '__main__':
+    # Uruchomienie jako skrypt: magazyn notowań (price_store.py) leży w katalogu głównym repozytorium
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import analytics
+import price_store     # z katalogu głównego repozytorium
+
+WINDOW_LENGTHS = (analytics.FORECAST_YEARS,)
+MIN_YEARS = 1                   # Jak GenerateForecasts: średnia z lat dostępnych w oknie
+HIT_TOLERANCE = 0.2             # Prognoza trafiona, gdy |prognoza / kurs rzeczywisty - 1| <= 20%
+ERROR_QUANTILES = (0.1, 0.25, 0.5, 0.75, 0.9)
+WORKERS = os.cpu_count() or 2
+
+RESULT_COLUMNS = ['Ticker', 'Spółka', 'Okno', 'Rok', 'Prognoza', 'Kurs bazowy', 'Kurs rzeczywisty',
+                  'Błąd', 'Błąd log', 'Trafiony kierunek', 'W tolerancji']
+
+
+# === TABLICE [TICKER x ROK] ===
+
+def annual_arrays(annual):
+    """
+    Wskaźniki roczne jako tablice [ticker x rok] (brak roku = NaN).
+    Zwraca (tickery, nazwy spółek, lata, {'eps', 'pe', 'growth'}).
+    Dla tickera z kilkoma nazwami spółki używany jest ostatni wiersz danego roku.
+    """
+    annual = annual.drop_duplicates(['Ticker', 'Rok'], keep='last')
+    tickers, ticker_index = np.unique(annual['Ticker'].astype(str).to_numpy(), return_inverse=True)
+    names = annual.groupby(ticker_index)['Spółka'].last().to_numpy()
+    rok = annual['Rok'].to_numpy(dtype='int64')
+    years = np.arange(rok.min(), rok.max() + 1)
+    arrays = {}
+    for key, column in (('eps', 'EPS'), ('pe', 'C/Z'), ('growth', 'Procentowa zmiana EPS r/r')):
+        values = np.full((len(tickers), len(years)), np.nan)
+        values[ticker_index, rok - years[0]] = annual[column].to_numpy(dtype='float64')
+        arrays[key] = values
+    return tickers, names, years, arrays
+
+
+def window_means(values, length):
+    """
+    Średnie wartości niepustych w oknach `length` lat kończących się w każdym roku
+    (lata sprzed początku danych traktowane jak brakujące). Zwraca (średnie, liczności).
+    """
+    padded = np.concatenate([np.full((len(values), length - 1), np.nan), values], axis=1)
+    totals = np.zeros(values.shape)
+    counts = np.zeros(values.shape, dtype='int64')
+    # Jak AVG() w MySQL: wartości okna dodawane po kolei, od najstarszego roku. ndarray.sum()
+    # sumuje parami (od 8 elementów), co dawałoby wyniki różniące się na ostatnich bitach
+    for offset in range(length):
+        window_year = padded[:, offset:offset + values.shape[1]]
+        present = ~np.isnan(window_year)
+        totals += np.where(present, window_year, 0.0)
+        counts += present
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(counts > 0, totals / counts, np.nan), counts
+
+
+def window_forecasts(arrays, length, min_years=MIN_YEARS):
+    """
+    Prognozy ceny (zaokrąglone do 0.01) dla okien `length` lat kończących się w każdym roku:
+    tablica [ticker x rok końca okna], NaN gdy prognoza niedostępna ('N/A' lub NULL w procedurze).
+    """
+    avg_growth, growth_years = window_means(arrays['growth'], length)
+    avg_pe, pe_years = window_means(arrays['pe'], length)
+    forecast_eps = arrays['eps'] * (1 + avg_growth / 100)
+    price = forecast_eps * avg_pe
+    with np.errstate(invalid='ignore'):
+        available = (forecast_eps > 0) & (avg_pe > 0) & (np.minimum(growth_years, pe_years) >= min_years)
+    return np.where(available, np.round(price, 2), np.nan)
+
+
+# === KURSY ZAMKNIĘCIA ===
+
+def year_end_closes(ticker, data_dir=price_store.DATA_DIR):
+    """Ostatnie zamknięcie każdego roku notowań tickera: (lata, kursy); puste tablice, gdy brak danych."""
+    if price_store.load_manifest(ticker, data_dir) is not None:
+        bars = price_store.read_range(ticker, data_dir=data_dir, as_frame=False)
+        times, close = np.asarray(bars['time'], dtype='int64'), np.asarray(bars['close'], dtype='float64')
+    else:
+        df = price_store.load_bars(ticker, data_dir)
+        if df is None or df.empty:
+            return np.empty(0, dtype='int64'), np.empty(0)
+        times, close = df['time'].to_numpy(dtype='int64'), df['close'].to_numpy(dtype='float64')
+    if len(times) == 0:
+        return np.empty(0, dtype='int64'), np.empty(0)
+    years = times.astype('datetime64[s]').astype('datetime64[Y]').astype('int64') + 1970
+    last = np.flatnonzero(np.r_[years[1:] != years[:-1], True])
+    return years[last], close[last]
+
+
+def _year_end_closes_batch(tickers, data_dir):
+    return [year_end_closes(ticker, data_dir) for ticker in tickers]
+
+
+def close_matrix(tickers, years, data_dir=price_store.DATA_DIR, workers=WORKERS):
+    """
+    Zamknięcia na koniec roku jako tablica [ticker x rok] dla lat `years` i roku następnego.
+    Pliki notowań są czytane równolegle w `workers` procesach (1 = w bieżącym procesie).
+    """
+    tickers = list(tickers)
+    if workers > 1 and len(tickers) > 1:
+        batches = [tickers[i::workers] for i in range(workers)]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(_year_end_closes_batch, batches, [data_dir] * workers))
+        closes = [None] * len(tickers)
+        for i, part in enumerate(parts):
+            closes[i::workers] = part
+    else:
+        closes = _year_end_closes_batch(tickers, data_dir)
+
+    matrix = np.full((len(tickers), len(years) + 1), np.nan)
+    for row, (close_years, values) in enumerate(closes):
+        column = close_years - years[0]
+        inside = (column >= 0) & (column < matrix.shape[1])
+        matrix[row, column[inside]] = values[inside]
+    return matrix
+
+
+# === OCENA ===
+
+def evaluate(forecast, closes, tickers, names, years, length):
+    """
+    Porównuje prognozy [ticker x rok końca okna] z zamknięciami roku następnego.
+    Zwraca DataFrame (RESULT_COLUMNS) z jednym wierszem na prognozę z dostępnym kursem.
+    """
+    base, actual = closes[:, :-1], closes[:, 1:]
+    valid = np.isfinite(forecast) & np.isfinite(actual) & np.isfinite(base) & (actual > 0)
+    rows, columns = np.nonzero(valid)
+    predicted, base, actual = forecast[valid], base[valid], actual[valid]
+    return pd.DataFrame({
+        'Ticker': tickers[rows],
+        'Spółka': names[rows],
+        'Okno': length,
+        'Rok': years[columns],
+        'Prognoza': predicted,
+        'Kurs bazowy': base,
+        'Kurs rzeczywisty': actual,
+        'Błąd': predicted / actual - 1,
+        'Błąd log': np.log(predicted / actual),
+        'Trafiony kierunek': np.sign(predicted - base) == np.sign(actual - base),
+        'W tolerancji': np.abs(predicted / actual - 1) <= HIT_TOLERANCE,
+    }, columns=RESULT_COLUMNS)
+
+
+def run_backtest(indicators, data_dir=price_store.DATA_DIR, lengths=WINDOW_LENGTHS, min_years=MIN_YEARS, workers=WORKERS):
+    """
+    Backtest prognozy dla wszystkich tickerów, okien o długościach `lengths` i lat końca okna.
+    indicators: wiersze wig_indicators_summary (kolumny analytics.INPUT_COLUMNS).
+    Zwraca DataFrame z kolumnami RESULT_COLUMNS.
+    """
+    annual = analytics.annual_summary(indicators[indicators['Ticker'].notna()])
+    if annual.empty:
+        return pd.DataFrame(columns=RESULT_COLUMNS)
+    tickers, names, years, arrays = annual_arrays(annual)
+    closes = close_matrix(tickers, years, data_dir, workers)
+    frames = [evaluate(window_forecasts(arrays, length, min_years), closes, tickers, names, years, length)
+              for length in lengths]
+    return pd.concat(frames, ignore_index=True).sort_values(['Okno', 'Ticker', 'Rok'], ignore_index=True)
+
+
+def summarize(results, by):
+    """Rozkład błędów i odsetek trafień w grupach (np. 'Ticker', 'Rok', ['Okno', 'Rok'])."""
+    grouped = results.assign(abs_error=results['Błąd'].abs()).groupby(by, sort=True)
+    error = grouped['Błąd']
+    summary = pd.DataFrame({
+        'Prognozy': grouped.size(),
+        'Średni błąd': error.mean(),
+        'Średni |błąd|': grouped['abs_error'].mean(),
+        'Średni błąd log': grouped['Błąd log'].mean(),
+        **{f'Błąd q{int(q * 100)}': error.quantile(q) for q in ERROR_QUANTILES},
+        'Trafiony kierunek': grouped['Trafiony kierunek'].mean(),
+        'W tolerancji': grouped['W tolerancji'].mean(),
+    })
+    return summary.reset_index()
+
+
+# === URUCHOMIENIE ===
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Historyczny test prognozy ceny (EPS r/r x C/Z) dla wszystkich tickerów i okien lat.")
+    parser.add_argument('--input', help="Plik CSV z danymi kwartalnymi zamiast tabeli w bazie.")
+    parser.add_argument('--data-dir', default=price_store.DATA_DIR, help="Katalog z notowaniami dziennymi.")
+    parser.add_argument('--lengths', type=int, nargs='+', default=list(WINDOW_LENGTHS), help="Długości okien w latach.")
+    parser.add_argument('--min-years', type=int, default=MIN_YEARS, help="Minimalna liczba lat z danymi w oknie.")
+    parser.add_argument('--workers', type=int, default=WORKERS, help="Liczba procesów czytających notowania.")
+    parser.add_argument('--output', default='backtest_forecasts.csv', help="Plik CSV z wynikami dla każdej prognozy.")
+    parser.add_argument('--by-ticker', default='backtest_by_ticker.csv', help="Plik CSV z podsumowaniem dla tickerów.")
+    parser.add_argument('--by-year', default='backtest_by_year.csv', help="Plik CSV z podsumowaniem dla lat.")
+    args = parser.parse_args(argv)
+
+    if args.input:
+        indicators = pd.read_csv(args.input)
+    else:
+        from data import create_database_engine
+        indicators = analytics.load_indicators(create_database_engine())
+
+    results = run_backtest(indicators, args.data_dir, args.lengths, args.min_years, args.workers)
+    if results.empty:
+        logging.error("Brak prognoz z dostępnym kursem rzeczywistym.")
+        return results
+
+    results.to_csv(args.output, index=False)
+    summarize(results, ['Okno', 'Ticker']).to_csv(args.by_ticker, index=False)
+    by_year = summarize(results, ['Okno', 'Rok'])
+    by_year.to_csv(args.by_year, index=False)
+    logging.info(f"Zapisano {len(results)} prognoz ({results['Ticker'].nunique()} tickerów) do {args.output}.")
+
+    with pd.option_context('display.width', 200, 'display.max_columns', 20, 'display.float_format', '{:.3f}'.format):
+        print(summarize(results, 'Okno').to_string(index=False))
+        print(by_year.to_string(index=False))
+    return results
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    main()
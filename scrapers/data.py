@@ -5,46 +5,47 @@ import requests
 import pandas as pd
 import numpy as np
 import logging
-import time
 import os
 import re
+import sys
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
 from sqlalchemy import create_engine
 from urllib.parse import quote_plus
 
+if __name__ == "__main__":
+    # Uruchomienie jako skrypt: moduły wspólne (metrics.py) leżą w katalogu głównym repozytorium
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from http_client import DEFAULT_HEADERS, REQUEST_RATE, TokenBucket, create_session, fetch_text
+from page_cache import CACHE_DIR, CacheMiss, PageCache
+from html_tables import extract_table
+from db_loader import KEY_COLUMNS, load_dataframe
+import metrics     # z katalogu głównego repozytorium
+
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+# Adres bazowy StockWatch - zmienna środowiskowa pozwala wskazać lokalny serwer testowy
+STOCKWATCH_URL = os.environ.get('STOCKWATCH_URL', 'https://www.stockwatch.pl/gpw/')
+STOCKWATCH_HEADERS = {**DEFAULT_HEADERS, 'Referer': 'https://www.stockwatch.pl/'}
+
 # =================================================================================
 # CZĘŚĆ 1: Twoje funkcje do pobierania danych (bez zmian)
 # =================================================================================
 
-def get_wig_companies(url="https://www.bankier.pl/inwestowanie/profile/quote.html?symbol=WIG"):
+def get_wig_companies(url="https://www.bankier.pl/inwestowanie/profile/quote.html?symbol=WIG", session=None, cache=None):
     """
     Pobiera pełną tabelę ze składem indeksu WIG ze strony Bankier.pl.
     Zwraca pandas DataFrame z danymi lub None w przypadku błędu.
     """
-    # ... Twoja funkcja bez zmian ...
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-        'Accept-Language': 'pl-PL,pl;q=0.9,en-US;q=0.8,en;q=0.7',
-        'Referer': 'https://www.bankier.pl/'
-    }
+    headers = {**DEFAULT_HEADERS, 'Referer': 'https://www.bankier.pl/'}
     
     html_content = None
     try:
         logging.info(f"Pobieranie kodu HTML ze strony Bankier.pl: {url}")
-        response = requests.get(url, headers=headers, timeout=30)
-        response.raise_for_status()
-        html_content = response.text
-        
-        logging.info("Parsowanie kodu HTML za pomocą pandas.read_html.")
-        tables = pd.read_html(html_content, decimal=',', thousands='.', encoding='utf-8')
+        html_content = fetch_text(session or create_session(pool_size=1), url, headers=headers, timeout=30, cache=cache)
         
-        df_companies = None
-        for table in tables:
-            # Sprawdzamy, czy tabela zawiera kolumnę "Nazwa"
-            if 'Nazwa' in table.columns:
-                df_companies = table
-                break
+        logging.info("Wyszukiwanie tabeli ze składem indeksu (kolumna 'Nazwa').")
+        df_companies = extract_table(html_content, lambda columns: 'Nazwa' in columns, decimal=',', thousands='.')
         
         if df_companies is None:
             logging.error("Nie znaleziono tabeli ze składem WIG (brak kolumny 'Nazwa').")
@@ -53,6 +54,9 @@ def get_wig_companies(url="https://www.bankier.pl/inwestowanie/profile/quote.htm
         logging.info(f"Pomyślnie pobrano {len(df_companies)} spółek z indeksu WIG.")
         return df_companies
 
+    except CacheMiss:
+        logging.error(f"Brak strony Bankier.pl w cache (tryb offline): {url}")
+        return None
     except requests.exceptions.RequestException as e:
         logging.error(f"Wystąpił błąd podczas pobierania strony Bankier.pl: {e}")
         return None
@@ -61,52 +65,69 @@ def get_wig_companies(url="https://www.bankier.pl/inwestowanie/profile/quote.htm
         return None
 
 
-def get_company_indicators(slug, source, col_name):
+def get_company_indicators(slug, source, col_name, session=None, limiter=None, cache=None):
     """
     Pobiera dane o wskaźnikach finansowych dla konkretnej spółki ze strony StockWatch.pl.
     Zwraca pandas DataFrame z danymi lub None w przypadku błędu.
     """
-    # ... Twoja funkcja bez zmian ... https://www.stockwatch.pl/gpw/pkobp,notowania,dane-finansowe.aspx#analiza
-    url = f"https://www.stockwatch.pl/gpw/{slug}{source}"
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-        'Accept-Language': 'pl-PL,pl;q=0.9,en-US;q=0.8,en;q=0.7',
-        'Referer': 'https://www.stockwatch.pl/'
-    }
-    
-    html_content = None
+    # https://www.stockwatch.pl/gpw/pkobp,notowania,dane-finansowe.aspx#analiza
+    html_content = fetch_company_page(slug, source, session, limiter, cache)
+    if html_content is None:
+        return None
     try:
-        logging.info(f"Pobieranie danych o wskaźnikach z: {url}")
-        response = requests.get(url, headers=headers, timeout=15)
-        response.raise_for_status()
-        html_content = response.text
-        
-        tables = pd.read_html(html_content, header=0, decimal=',', thousands='.', encoding='utf-8')
-        
-        df_indicators = None
-        for table in tables:
-            cleaned_columns = [col.replace(' ', '').replace('>', '').strip() for col in table.columns]
-            table.columns = cleaned_columns
-            
-            if col_name in table.columns:
-                has_quarter_column = any(re.match(r'Q\d{1}\s*\d{4}', str(col)) for col in table.columns)
-                if has_quarter_column:
-                    df_indicators = table
-                    break
-        
-        if df_indicators is None:
-            logging.warning(f"Nie znaleziono tabeli z wskaźnikami dla spółki {slug}. Pomijam...")
-            return None
+        return parse_company_indicators(html_content, slug, col_name)
+    except Exception as e:
+        logging.error(f"Wystąpił błąd podczas parsowania strony dla {slug}: {e}. Pomijam...")
+        return None
 
-        logging.info(f"Pomyślnie pobrano {len(df_indicators)} wskaźników.")
-        return df_indicators
 
+def fetch_company_page(slug, source, session=None, limiter=None, cache=None):
+    """
+    Pobiera surowy HTML strony spółki ze StockWatch.pl (z zachowaniem limitu tempa
+    i z użyciem cache stron, jeśli został podany).
+    Zwraca tekst strony lub None w przypadku błędu.
+    """
+    url = f"{STOCKWATCH_URL}{slug}{source}"
+    try:
+        logging.info(f"Pobieranie danych o wskaźnikach z: {url}")
+        with metrics.track(slug), metrics.stage('download'):
+            return fetch_text(session or create_session(pool_size=1), url, limiter=limiter,
+                              headers=STOCKWATCH_HEADERS, timeout=15, cache=cache)
+    except CacheMiss:
+        logging.warning(f"Brak strony dla {slug} w cache (tryb offline). Pomijam...")
+        return None
     except requests.exceptions.HTTPError as e:
         logging.warning(f"Wystąpił błąd HTTP podczas pobierania danych dla {slug}: {e}. Prawdopodobnie strona nie istnieje. Pomijam...")
         return None
     except Exception as e:
-        logging.error(f"Wystąpił błąd podczas parsowania strony dla {slug}: {e}. Pomijam...")
+        logging.error(f"Wystąpił błąd podczas pobierania strony dla {slug}: {e}. Pomijam...")
+        return None
+
+
+def clean_column_name(col):
+    return col.replace(' ', '').replace('>', '').strip()
+
+
+def parse_company_indicators(html_content, slug, col_name):
+    """
+    Wyszukuje w kodzie HTML tabelę z kolumną `col_name` i kolumnami kwartałów.
+    Budowana jest wyłącznie ta jedna tabela (patrz html_tables.extract_table).
+    Zwraca pandas DataFrame lub None, jeśli tabeli nie znaleziono.
+    """
+    def is_indicators_table(columns):
+        cleaned_columns = [clean_column_name(col) for col in columns]
+        return col_name in cleaned_columns and any(re.match(r'Q\d{1}\s*\d{4}', col) for col in cleaned_columns)
+
+    df_indicators = extract_table(html_content, is_indicators_table, header=0, decimal=',', thousands='.')
+    if df_indicators is not None:
+        df_indicators.columns = [clean_column_name(col) for col in df_indicators.columns]
+    
+    if df_indicators is None:
+        logging.warning(f"Nie znaleziono tabeli z wskaźnikami dla spółki {slug}. Pomijam...")
         return None
+
+    logging.info(f"Pomyślnie pobrano {len(df_indicators)} wskaźników.")
+    return df_indicators
         
 import pandas as pd
 
@@ -234,12 +255,120 @@ def process_indicators_dataframe_add_price_column(df_one: pd.DataFrame, df_two:
         logging.error(f"Wystąpił nieoczekiwany błąd w funkcji: {e}")
         return pd.DataFrame(columns=['Liczba akcji', 'Zysk netto', 'Kwartał', 'Kurs'])
         
+SUMMARY_COLUMNS = ['Spółka', 'Ticker', 'Kwartał', 'Liczba akcji', 'Zysk netto', 'Kurs']
+FINANCE_ROWS = ['Liczba akcji', 'Zysk netto']
+
+
+def _stack_rows(frames, index_column, labels):
+    """
+    Łączy surowe tabele spółek w jedną ramkę i zostawia z niej tylko wiersze `labels`
+    (pierwsze wystąpienie każdego wiersza w danej spółce), z indeksem (spółka, wiersz).
+    Zwraca tę ramkę oraz zbiór spółek, w których wystąpiły wszystkie wymagane wiersze.
+    """
+    combined = pd.concat(frames)
+    combined = combined[combined[index_column].isin(labels)]
+    combined = combined.set_index(index_column, append=True).droplevel(1)
+    combined = combined[~combined.index.duplicated(keep='first')]
+    counts = combined.index.get_level_values(0).value_counts()
+    return combined, set(counts.index[counts == len(labels)])
+
+
+def _value_dtype(frames):
+    """
+    Wspólny typ kolumn kwartałów (bez kolumny z nazwami wierszy) wszystkich ramek, jak w pd.concat:
+    jednakowy typ zostaje, same liczby (int/float) łączą się wg np.result_type, inne mieszanki dają object.
+    """
+    dtypes = {dtype for df in frames for column, dtype in df.dtypes.items() if column != 'Dane/Okres'}
+    if len(dtypes) == 1:
+        return dtypes.pop()
+    if dtypes and all(isinstance(dtype, np.dtype) and dtype.kind in 'iuf' for dtype in dtypes):
+        return np.result_type(*dtypes)
+    return np.dtype(object)
+
+
+def process_indicators_batch(companies) -> pd.DataFrame:
+    """
+    Wsadowa wersja process_indicators_dataframe dla wszystkich spółek naraz.
+
+    Args:
+        companies: Iterowalna kolekcja krotek (nazwa spółki, ticker, surowy DataFrame
+                   z danymi finansowymi, surowy DataFrame ze wskaźnikami).
+    Returns:
+        DataFrame z kolumnami SUMMARY_COLUMNS - taki sam, jak wynik pd.concat
+        na wynikach process_indicators_dataframe dla kolejnych spółek.
+
+    Surowe ramki wszystkich spółek są łączone w jedną (MultiIndex: spółka, wiersz),
+    a wybór wierszy, transpozycja (stack) i dołączenie kursu wykonywane są jednorazowo.
+    Ramki wejściowe nie są modyfikowane. Spółki, dla których ścieżka pojedyncza
+    zwróciłaby pusty wynik, są pomijane.
+    """
+    companies = [
+        company for company in companies
+        if company[2] is not None and 'Dane/Okres' in company[2].columns and len(company[2].columns) > 1
+        and company[3] is not None and 'Wskażnik/Okres' in company[3].columns
+    ]
+    if not companies:
+        return pd.DataFrame(columns=SUMMARY_COLUMNS)
+
+    # Typ kolumn wynikowych taki, jaki dałaby transpozycja i konkatenacja ramek pojedynczych spółek.
+    # Złączenie tabel o różnych kwartałach dopełnia braki wartością NaN, co zamieniłoby liczby
+    # całkowite na zmiennoprzecinkowe - przy typie object ramki są więc konwertowane wcześniej.
+    finance_frames = {key: c[2] for key, c in enumerate(companies)}
+    if _value_dtype(finance_frames.values()) == object:
+        finance_frames = {key: df.astype(object) for key, df in finance_frames.items()}
+    finance, valid = _stack_rows(finance_frames, 'Dane/Okres', FINANCE_ROWS)
+    indicators, with_price = _stack_rows({key: c[3] for key, c in enumerate(companies)}, 'Wskażnik/Okres', ['Kurs'])
+    valid &= with_price
+    for key, (company_name, *_) in enumerate(companies):
+        if key not in valid:
+            logging.warning(f"Brak wierszy {FINANCE_ROWS + ['Kurs']} dla {company_name}. Pomijam...")
+    if not valid:
+        return pd.DataFrame(columns=SUMMARY_COLUMNS)
+
+    # Pary (spółka, kwartał) w kolejności, w jakiej występują w tabelach poszczególnych spółek
+    keys = sorted(valid)
+    quarters = [companies[key][2].columns.drop('Dane/Okres') for key in keys]
+    pairs = pd.MultiIndex.from_arrays([np.repeat(keys, [len(q) for q in quarters]), np.concatenate(quarters)])
+
+    value_dtype = _value_dtype(companies[key][2] for key in keys)
+    values = {
+        label: finance.xs(label, level=1).stack(future_stack=True).reindex(pairs).astype(value_dtype)
+        for label in FINANCE_ROWS
+    }
+
+    price = indicators.xs('Kurs', level=1).stack(future_stack=True)
+    price = pd.to_numeric(price, errors='coerce').round(2).reindex(pairs)
+
+    company_index = pairs.get_level_values(0)
+    result = pd.DataFrame({
+        'Spółka': np.asarray([c[0] for c in companies], dtype=object)[company_index],
+        'Ticker': np.asarray([c[1] for c in companies], dtype=object)[company_index],
+        'Kwartał': pairs.get_level_values(1),
+        **{label: series.to_numpy() for label, series in values.items()},
+        'Kurs': price.to_numpy(),
+    })
+    logging.info(f"Przetworzono wsadowo dane {len(keys)} spółek ({len(result)} wierszy).")
+    return result[SUMMARY_COLUMNS]
+
+
 # =================================================================================
-# CZĘŚĆ 3: Funkcje do obsługi bazy danych (bez zmian)
+# CZĘŚĆ 3: Funkcje do obsługi bazy danych
 # =================================================================================
+# Ustawienia puli połączeń (pool_pre_ping/pool_recycle chronią przed zerwanymi połączeniami MySQL)
+DB_POOL_OPTIONS = {'pool_size': 5, 'max_overflow': 5, 'pool_pre_ping': True, 'pool_recycle': 1800}
+
+
 def create_database_engine():
-    """Tworzy obiekt silnika bazy danych SQLAlchemy z użyciem zmiennych środowiskowych."""
+    """
+    Tworzy obiekt silnika bazy danych SQLAlchemy z użyciem zmiennych środowiskowych.
+    DB_URL pozwala wskazać dowolną bazę (np. sqlite:///gpw.db jako lokalny zamiennik MySQL).
+    """
     try:
+        if os.environ.get('DB_URL'):
+            logging.info(f"Próba połączenia z bazą danych: {os.environ['DB_URL']}")
+            options = {} if os.environ['DB_URL'].startswith('sqlite') else DB_POOL_OPTIONS
+            return create_engine(os.environ['DB_URL'], echo=False, **options)
+
         db_user = os.environ.get('DB_USER', 'admin') # dane fikcyjne musisz wprowadzić własne
         db_password = os.environ.get('DB_PASSWORD', '12345') # dane fikcyjne musisz wprowadzić własne
         db_host = os.environ.get('DB_HOST', 'localhost')
@@ -252,94 +381,192 @@ def create_database_engine():
 
         logging.info(f"Próba połączenia z bazą danych pod adresem: {db_host}:{db_port}/{db_name}")
 
-        engine = create_engine(connection_url, echo=False)
+        engine = create_engine(connection_url, echo=False, **DB_POOL_OPTIONS)
         return engine
 
     except Exception as e:
         logging.error(f"Błąd podczas tworzenia silnika bazy danych: {e}")
         return None
 
-def save_dataframe_to_db(df, engine, table_name):
+def save_dataframe_to_db(df, engine, table_name, key_columns=KEY_COLUMNS, full_rebuild=False):
     """
     Zapisuje dane DataFrame do bazy danych MySQL.
+    Wstawiane lub aktualizowane są tylko nowe i zmienione wiersze (klucz: key_columns),
+    a full_rebuild=True zastępuje całą tabelę atomową podmianą (patrz db_loader).
+    Zwraca słownik z liczbą wierszy wstawionych/zaktualizowanych/bez zmian lub None.
     """
     if df is None or df.empty or not engine:
         logging.warning("DataFrame jest pusty lub silnik bazy danych nie jest dostępny. Anulowano zapisywanie.")
-        return
+        return None
 
     try:
         logging.info(f"Zapisywanie {len(df)} rekordów do tabeli '{table_name}'...")
-        df.to_sql(name=table_name, con=engine, if_exists='replace', index=False)
+        stats = load_dataframe(df, engine, table_name, key_columns=key_columns, full_rebuild=full_rebuild)
         logging.info(f"Pomyślnie zapisano dane do bazy danych.")
+        return stats
         
     except Exception as e:
         logging.error(f"Wystąpił błąd podczas zapisywania danych do bazy danych: {e}")
+        return None
         
 # =================================================================================
-# CZĘŚĆ 4: Główna logika skryptu (ZAKTUALIZOWANA)
+# CZĘŚĆ 4: Równoległy potok: pobieranie (wątki) -> parsowanie i przetwarzanie (procesy)
+# =================================================================================
+PAGE_SOURCES = {
+    'finance': (',notowania,dane-finansowe.aspx', 'Dane/Okres'),
+    'indicators': (',notowania,wskazniki.aspx', 'Wskażnik/Okres'),
+}
+IO_WORKERS = 8                          # Wątki pobierające; faktyczne tempo wyznacza TokenBucket
+PARSE_WORKERS = os.cpu_count() or 2     # Procesy parsujące HTML i przekształcające dane
+
+
+def company_slug(row):
+    """Buduje identyfikator spółki w adresach StockWatch na podstawie kolumny 'Walor' lub 'Nazwa'."""
+    slug_base = row.get('Walor', row.get('Nazwa'))
+    return slug_base.lower().replace(' ', '').replace('.', '').replace('-', '')
+
+
+def parse_company_pages(company_name, slug, finance_html, indicators_html):
+    """
+    Parsuje obie strony spółki do surowych DataFrame'ów (dalsze przekształcenie
+    odbywa się wsadowo w process_indicators_batch).
+    Uruchamiana w puli procesów, więc nie blokuje wątków pobierających.
+    Zwraca krotkę (dane finansowe, wskaźniki) lub None.
+    """
+    try:
+        raw_data_of_finance_df = parse_company_indicators(finance_html, slug, PAGE_SOURCES['finance'][1])
+        raw_indicators_df = parse_company_indicators(indicators_html, slug, PAGE_SOURCES['indicators'][1])
+    except Exception as e:
+        logging.error(f"Wystąpił błąd podczas parsowania strony dla {slug}: {e}. Pomijam...")
+        return None
+
+    if raw_data_of_finance_df is None or raw_data_of_finance_df.empty or raw_indicators_df is None or raw_indicators_df.empty:
+        logging.warning(f"Surowy DataFrame dla {company_name} jest pusty. Pomijam...")
+        return None
+    return raw_data_of_finance_df, raw_indicators_df
+
+
+def parse_company_pages_measured(company_name, slug, finance_html, indicators_html):
+    """
+    parse_company_pages z pomiarem czasu i liczby wierszy w procesie parsującym.
+    Zwraca krotkę (wynik parse_company_pages, pomiary dla metrics.merge w procesie głównym).
+    Profiler próbkujący (--profile-top) obejmuje tylko proces główny.
+    """
+    recorder = metrics.start('stockwatch')
+    try:
+        with metrics.track(slug):
+            with metrics.stage('parse'):
+                result = parse_company_pages(company_name, slug, finance_html, indicators_html)
+            if result is not None:
+                metrics.count(rows=sum(len(df) for df in result))
+    finally:
+        metrics.stop()
+    return result, recorder.items
+
+
+def scrape_companies(companies_df, rate=REQUEST_RATE, io_workers=IO_WORKERS, parse_workers=PARSE_WORKERS, cache=None):
+    """
+    Pobiera i przetwarza dane wszystkich spółek.
+
+    Obie strony każdej spółki są pobierane równolegle przez pulę wątków ze wspólną sesją,
+    a tempo zapytań do serwisu ogranicza jeden TokenBucket (z adaptacyjnym zwalnianiem
+    po 429/5xx). Strony świeże w cache (PageCache) nie generują zapytań.
+    Gdy obie strony spółki są gotowe, parsowanie trafia do puli procesów.
+    Zwraca listę krotek (nazwa, ticker, surowe dane finansowe, surowe wskaźniki)
+    w kolejności spółek - wejście dla process_indicators_batch - oraz liczbę pominiętych spółek.
+    """
+    session = create_session(pool_size=io_workers, headers=STOCKWATCH_HEADERS)
+    limiter = TokenBucket(rate)
+    measure = metrics.enabled()
+    companies = [(row['Nazwa'], row.get('Ticker', row.get('Walor')), company_slug(row)) for _, row in companies_df.iterrows()]
+
+    pages = {}
+    processed = {}
+    with ThreadPoolExecutor(max_workers=io_workers) as io_pool, ProcessPoolExecutor(max_workers=parse_workers) as cpu_pool:
+        page_futures = {}
+        for i, (company_name, _, slug) in enumerate(companies):
+            logging.info(f"Pobieranie surowych wskaźników dla: {company_name}")
+            for kind, (source, _) in PAGE_SOURCES.items():
+                future = io_pool.submit(fetch_company_page, slug, source, session, limiter, cache)
+                page_futures[future] = (i, kind)
+
+        parse_futures = {}
+        for future in as_completed(page_futures):
+            i, kind = page_futures[future]
+            pages.setdefault(i, {})[kind] = future.result()
+            if len(pages[i]) < len(PAGE_SOURCES):
+                continue
+            html = pages.pop(i)
+            company_name, company_ticker, slug = companies[i]
+            if html['finance'] is None or html['indicators'] is None:
+                logging.warning(f"Surowy DataFrame dla {company_name} jest pusty. Pomijam...")
+                processed[i] = None
+                continue
+            parse = parse_company_pages_measured if measure else parse_company_pages
+            parse_futures[cpu_pool.submit(parse, company_name, slug, html['finance'], html['indicators'])] = i
+
+        for future in as_completed(parse_futures):
+            result = future.result()
+            if measure:
+                result, items = result
+                metrics.merge(items)
+            processed[parse_futures[future]] = result
+
+    session.close()
+    results = [companies[i][:2] + processed[i] for i in sorted(processed) if processed[i] is not None]
+    return results, len(companies) - len(results)
+
+
+# =================================================================================
+# CZĘŚĆ 5: Główna logika skryptu (ZAKTUALIZOWANA)
 # =================================================================================
 if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Pobiera wskaźniki finansowe spółek WIG ze StockWatch.pl.")
+    parser.add_argument('--rate', type=float, default=REQUEST_RATE, help="Maksymalna liczba zapytań na sekundę.")
+    parser.add_argument('--io-workers', type=int, default=IO_WORKERS, help="Liczba wątków pobierających.")
+    parser.add_argument('--parse-workers', type=int, default=PARSE_WORKERS, help="Liczba procesów parsujących.")
+    parser.add_argument('--cache-dir', default=CACHE_DIR, help="Katalog cache surowych stron.")
+    parser.add_argument('--no-cache', action='store_true', help="Pobieraj wszystkie strony z sieci, bez cache.")
+    parser.add_argument('--offline', action='store_true', help="Przetwarzaj wyłącznie strony zapisane w cache, bez dostępu do sieci.")
+    parser.add_argument('--full-rebuild', action='store_true', help="Zastąp całą tabelę w bazie zamiast aktualizować zmienione wiersze.")
+    parser.add_argument('--metrics', help="Zapisz pomiary etapów do pliku JSON (lub .prom - format Prometheusa).")
+    parser.add_argument('--profile-top', type=int, default=0, help="Zapisz stosy profilera próbkującego dla N najwolniejszych spółek.")
+    parser.add_argument('--profile-dir', default='profiles', help="Katalog na stosy profilera (--profile-top).")
+    args = parser.parse_args()
+    if args.profile_top and not args.metrics:
+        parser.error("--profile-top wymaga --metrics (stosy są zbierane przez rejestrator pomiarów).")
+    if args.metrics:
+        metrics.start('stockwatch', profile_top=args.profile_top)
+    cache = None if args.no_cache else PageCache(args.cache_dir, offline=args.offline)
+
     logging.info("="*80)
     logging.info("Rozpoczęto proces pobierania i przetwarzania wskaźników dla spółek WIG.")
     logging.info("="*80)
     
-    companies_df = get_wig_companies()
+    with metrics.stage('wig_companies'):
+        companies_df = get_wig_companies(cache=cache)
     
     if companies_df is not None and not companies_df.empty:
         engine = create_database_engine()
         if engine:
-            all_processed_dataframes = []  # Lista na przetworzone DataFrame'y
-            successful_scrapes = 0
-            failed_scrapes = 0
-            
-            for index, row in companies_df.iterrows():
-                logging.info("-"*80)
-                company_name = row['Nazwa']
-                # Upewniamy się, że kolumna Ticker istnieje
-                company_ticker = row.get('Ticker', row.get('Walor'))
-                
-                # Używamy kolumny 'Walor' lub 'Ticker' do stworzenia slug
-                slug_base = row.get('Walor', row.get('Nazwa', company_name))
-                company_slug = slug_base.lower().replace(' ', '').replace('.', '').replace('-', '')
-                
-                logging.info(f"Pobieranie surowych wskaźników dla: {company_name}")
-                # Krok 1: Pobierz surowy DataFrame
-                raw_data_of_finance_df = get_company_indicators(company_slug, ',notowania,dane-finansowe.aspx', 'Dane/Okres')
-                raw_indicators_df = get_company_indicators(company_slug, ',notowania,wskazniki.aspx', 'Wskażnik/Okres')
-                
-                if raw_data_of_finance_df is not None and not raw_data_of_finance_df.empty and raw_indicators_df is not None and not raw_indicators_df.empty:
-                    # Krok 2: Przetwórz DataFrame na format 'długi'
-                    processed_df = process_indicators_dataframe(raw_data_of_finance_df, raw_indicators_df)
-                    
-                    if not processed_df.empty:
-                        # Dodaj kolumny 'Spółka' i 'Ticker' do przetworzonego DataFrame
-                        processed_df['Spółka'] = company_name
-                        processed_df['Ticker'] = company_ticker
-                        
-                        all_processed_dataframes.append(processed_df)
-                        successful_scrapes += 1
-                        logging.info(f"Pomyślnie przetworzono dane dla: {company_name}")
-                    else:
-                        failed_scrapes += 1
-                        logging.warning(f"Przetworzony DataFrame dla {company_name} jest pusty. Pomijam...")
-                else:
-                    failed_scrapes += 1
-                    logging.warning(f"Surowy DataFrame dla {company_name} jest pusty. Pomijam...")
-                
-                time.sleep(2)
+            with metrics.stage('scrape'):
+                raw_companies, failed_scrapes = scrape_companies(
+                    companies_df, rate=args.rate, io_workers=args.io_workers, parse_workers=args.parse_workers, cache=cache)
             
             logging.info("="*80)
-            if all_processed_dataframes:
-                logging.info("Łączenie wszystkich ramek danych w jeden finalny DataFrame...")
-                # Krok 3: Stwórz jeden DataFrame z listy przetworzonych DataFrame'ów
-                master_df = pd.concat(all_processed_dataframes, ignore_index=True)
-                
-                # Ustawienie ostatecznej kolejności kolumn
-                column_order = ['Spółka', 'Ticker', 'Kwartał', 'Liczba akcji', 'Zysk netto', 'Kurs']
-                master_df = master_df.reindex(columns=column_order)
-                
+            logging.info("Przekształcanie danych wszystkich spółek w jeden finalny DataFrame...")
+            # Krok 3: Jedno wsadowe przekształcenie zamiast osobnego dla każdej spółki
+            with metrics.stage('reshape'):
+                master_df = process_indicators_batch(raw_companies)
+            successful_scrapes = len(master_df[['Spółka', 'Ticker']].drop_duplicates())
+            failed_scrapes += len(raw_companies) - successful_scrapes
+
+            if not master_df.empty:
                 # Krok 4: Zapisz przetworzone dane do bazy
-                save_dataframe_to_db(master_df, engine, 'wig_indicators_summary')
+                with metrics.stage('db_write'):
+                    save_dataframe_to_db(master_df, engine, 'wig_indicators_summary', full_rebuild=args.full_rebuild)
                 
             else:
                 logging.error("Nie udało się pobrać danych dla żadnej spółki.")
@@ -354,3 +581,8 @@ if __name__ == "__main__":
         logging.error("Pobieranie listy spółek WIG nie powiodło się.")
     
     logging.info("Proces zakończony.")
+
+    recorder = metrics.stop()
+    if recorder is not None:
+        metrics.write(recorder, args.metrics, args.profile_dir)
+        logging.info(f"Zapisano pomiary etapów w {args.metrics}.")
@@ -0,0 +1,206 @@
+# Plik: db_loader.py
+# Przyrostowy zapis tabel wynikowych do bazy (MySQL, a lokalnie SQLite).
+#
+# Tabela docelowa ma klucz główny (domyślnie Ticker, Kwartał). Przy każdym zapisie:
+#   1. wczytujemy obecną zawartość i porównujemy ją z nowymi danymi w pandas,
+#   2. do tabeli pośredniej ({tabela}_staging) trafiają tylko wiersze nowe lub zmienione
+#      (wstawiane wielowierszowymi INSERT-ami w paczkach),
+#   3. jedna instrukcja INSERT ... SELECT z upsertem dialektu przenosi je do tabeli docelowej.
+# Pełna przebudowa ładuje wszystko do {tabela}_new i podmienia tabele atomowo,
+# więc czytelnicy nigdy nie widzą pustej ani brakującej tabeli.
+# Wiersze, których nie ma w nowych danych, są zachowywane (poza pełną przebudową).
+
+import logging
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import (BigInteger, Boolean, Column, DateTime, Float, MetaData, String, Table, Text,
+                        delete, inspect, select, text, true, tuple_)
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+
+KEY_COLUMNS = ['Ticker', 'Kwartał']
+CHUNK_SIZE = 1000           # Wierszy na jeden wielowierszowy INSERT do tabeli pośredniej
+
+
+def load_dataframe(df, engine, table_name, key_columns=KEY_COLUMNS, full_rebuild=False, chunksize=CHUNK_SIZE):
+    """
+    Zapisuje DataFrame do tabeli `table_name` z kluczem `key_columns`.
+    full_rebuild=True zastępuje całą zawartość tabeli (podmiana atomowa).
+    Zwraca słownik z liczbą wierszy: inserted, updated, unchanged, deleted.
+    """
+    df = _unique_keys(df, key_columns)
+    value_columns = [c for c in df.columns if c not in key_columns]
+
+    if not full_rebuild and not _has_primary_key(engine, table_name, key_columns):
+        logging.info(f"Tabela '{table_name}' nie istnieje lub nie ma klucza {key_columns} - wykonuję pełną przebudowę.")
+        full_rebuild = True
+
+    existing = _read_existing(engine, table_name, df.columns, key_columns)
+    is_new, is_changed = diff_rows(df, existing, key_columns, value_columns)
+    stats = {
+        'inserted': int(is_new.sum()),
+        'updated': int(is_changed.sum()),
+        'unchanged': int(len(df) - is_new.sum() - is_changed.sum()),
+        'deleted': 0,
+    }
+
+    if full_rebuild:
+        stats['deleted'] = 0 if existing is None else len(existing) - (len(df) - stats['inserted'])
+        _rebuild(df, engine, table_name, key_columns, chunksize)
+    elif stats['inserted'] or stats['updated']:
+        _upsert(df[is_new | is_changed], engine, table_name, key_columns, chunksize)
+
+    logging.info(f"Tabela '{table_name}': wstawiono {stats['inserted']}, zaktualizowano {stats['updated']}, "
+                 f"bez zmian {stats['unchanged']}, usunięto {stats['deleted']} wierszy.")
+    return stats
+
+
+def diff_rows(df, existing, key_columns, value_columns):
+    """
+    Porównuje nowe wiersze z zawartością tabeli po kluczu.
+    Zwraca dwie maski zgodne z wierszami df: (wiersz nowy, wiersz zmieniony).
+    Porównywane są tylko wiersze obecne w tabeli; patrz _same_values.
+    """
+    if existing is None or existing.empty:
+        is_new = pd.Series(True, index=df.index)
+        return is_new, ~is_new
+
+    merged = df[key_columns + value_columns].reset_index(drop=True).merge(
+        existing, on=key_columns, how='left', suffixes=('', '_db'), indicator=True)
+    is_new = (merged['_merge'] == 'left_only').to_numpy()
+    # Złączenie dopełnia nowe klucze wartością NaN, przez co kolumny całkowite z bazy stają się
+    # zmiennoprzecinkowe - porównujemy więc osobno, tylko wiersze dopasowane
+    matched = merged[~is_new]
+    same = np.ones(len(matched), dtype=bool)
+    for column in value_columns:
+        if column + '_db' not in merged.columns:
+            same[:] = False
+            break
+        same &= _same_values(matched[column], matched[column + '_db'])
+    is_changed = np.zeros(len(merged), dtype=bool)
+    is_changed[~is_new] = ~same
+    return pd.Series(is_new, index=df.index), pd.Series(is_changed, index=df.index)
+
+
+def _same_values(new, old):
+    """
+    Równość wartości kolumny z DataFrame i z bazy (NULL == NULL). Liczby (int, Int64, float, bool)
+    porównujemy jako float64 - 1000 z kolumny BIGINT to to samo co 1000.0 po złączeniu;
+    pozostałe typy tekstowo, więc np. DOUBLE z bazy i napis z pandas dają równość.
+    """
+    both_null = (new.isna() & old.isna()).to_numpy()
+    if pd.api.types.is_numeric_dtype(new) and pd.api.types.is_numeric_dtype(old):
+        equal = new.to_numpy(dtype='float64', na_value=np.nan) == old.to_numpy(dtype='float64', na_value=np.nan)
+    else:
+        equal = (new.astype(object).astype(str) == old.astype(object).astype(str)).to_numpy()
+    return both_null | equal
+
+
+def _unique_keys(df, key_columns):
+    duplicated = df.duplicated(subset=key_columns, keep='last')
+    if duplicated.any():
+        logging.warning(f"Pominięto {int(duplicated.sum())} powtórzonych kluczy {key_columns} (zostaje ostatni wiersz).")
+        df = df[~duplicated]
+    return df
+
+
+def _has_primary_key(engine, table_name, key_columns):
+    inspector = inspect(engine)
+    if not inspector.has_table(table_name):
+        return False
+    return inspector.get_pk_constraint(table_name).get('constrained_columns') == list(key_columns)
+
+
+def _read_existing(engine, table_name, columns, key_columns):
+    """Wczytuje obecną zawartość tabeli (tylko kolumny obecne w nowych danych) lub None."""
+    if not inspect(engine).has_table(table_name):
+        return None
+    with engine.connect() as conn:
+        table = Table(table_name, MetaData(), autoload_with=conn)
+        present = [table.c[c] for c in columns if c in table.c]
+        if not all(c in table.c for c in key_columns):
+            return None
+        existing = pd.read_sql(select(*present), conn)
+    return existing.drop_duplicates(subset=key_columns, keep='last')
+
+
+def _sql_type(series, is_key):
+    if pd.api.types.is_bool_dtype(series):
+        return Boolean()
+    if pd.api.types.is_integer_dtype(series):
+        return BigInteger()
+    if pd.api.types.is_float_dtype(series):
+        return Float(precision=53)
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return DateTime()
+    return String(255) if is_key else Text()
+
+
+def _create_table(conn, df, table_name, key_columns):
+    """Tworzy tabelę z kluczem głównym; typy kolumn jak w DataFrame.to_sql."""
+    metadata = MetaData()
+    table = Table(table_name, metadata, *[
+        Column(column, _sql_type(df[column], column in key_columns), primary_key=column in key_columns,
+               autoincrement=False)
+        for column in df.columns
+    ])
+    table.create(conn)
+    return table
+
+
+def _drop_if_exists(conn, table_name):
+    conn.execute(text(f"DROP TABLE IF EXISTS {conn.dialect.identifier_preparer.quote(table_name)}"))
+
+
+def _upsert(changed, engine, table_name, key_columns, chunksize):
+    """Ładuje zmienione wiersze do tabeli pośredniej i przenosi je upsertem do tabeli docelowej."""
+    staging_name = f'{table_name}_staging'
+    with engine.begin() as conn:
+        _drop_if_exists(conn, staging_name)
+        staging = _create_table(conn, changed, staging_name, [])
+        changed.to_sql(staging_name, conn, if_exists='append', index=False, method='multi', chunksize=chunksize)
+        target = Table(table_name, MetaData(), autoload_with=conn)
+        columns = list(changed.columns)
+        rows = select(*[staging.c[c] for c in columns])
+        dialect = conn.dialect.name
+
+        if dialect == 'mysql':
+            stmt = mysql.insert(target).from_select(columns, rows)
+            stmt = stmt.on_duplicate_key_update({c: stmt.inserted[c] for c in columns if c not in key_columns})
+            conn.execute(stmt)
+        elif dialect in ('sqlite', 'postgresql'):
+            insert = sqlite.insert if dialect == 'sqlite' else postgresql.insert
+            # WHERE true jest wymagane przez SQLite przy INSERT ... SELECT ... ON CONFLICT
+            stmt = insert(target).from_select(columns, rows.where(true()))
+            stmt = stmt.on_conflict_do_update(index_elements=key_columns,
+                                              set_={c: stmt.excluded[c] for c in columns if c not in key_columns})
+            conn.execute(stmt)
+        else:
+            keys = select(*[staging.c[c] for c in key_columns])
+            conn.execute(delete(target).where(tuple_(*[target.c[c] for c in key_columns]).in_(keys)))
+            conn.execute(target.insert().from_select(columns, rows))
+        staging.drop(conn)
+
+
+def _rebuild(df, engine, table_name, key_columns, chunksize):
+    """Ładuje całość do {tabela}_new i podmienia ją z tabelą docelową."""
+    new_name, old_name = f'{table_name}_new', f'{table_name}_old'
+    with engine.begin() as conn:
+        quote = conn.dialect.identifier_preparer.quote
+        _drop_if_exists(conn, new_name)
+        _drop_if_exists(conn, old_name)
+        _create_table(conn, df, new_name, key_columns)
+        df.to_sql(new_name, conn, if_exists='append', index=False, method='multi', chunksize=chunksize)
+        exists = inspect(conn).has_table(table_name)
+
+        if conn.dialect.name == 'mysql':
+            # RENAME TABLE zamienia obie nazwy w jednej, atomowej operacji
+            renames = [f"{quote(table_name)} TO {quote(old_name)}"] if exists else []
+            renames.append(f"{quote(new_name)} TO {quote(table_name)}")
+            conn.execute(text("RENAME TABLE " + ", ".join(renames)))
+        else:
+            # SQLite i PostgreSQL mają transakcyjne DDL - podmiana jest widoczna dopiero po COMMIT
+            if exists:
+                conn.execute(text(f"ALTER TABLE {quote(table_name)} RENAME TO {quote(old_name)}"))
+            conn.execute(text(f"ALTER TABLE {quote(new_name)} RENAME TO {quote(table_name)}"))
+        _drop_if_exists(conn, old_name)
@@ -0,0 +1,154 @@
+# Plik: html_tables.py
+# Wyszukiwanie jednej, konkretnej tabeli w kodzie HTML bez budowania DataFrame'ów
+# dla wszystkich tabel na stronie (jak robi to pd.read_html).
+#
+# Dokument jest parsowany strumieniowo (lxml.etree.iterparse); każda zamknięta tabela
+# jest sprawdzana po komórkach nagłówka, a niepasujące tabele są od razu zwalniane.
+# Wiersze docelowej tabeli są wyciągane tą samą logiką co w pd.read_html (thead/tbody/tfoot,
+# colspan/rowspan, elementy ukryte) i konwertowane przez TextParser z pandas, więc wynik
+# - łącznie z obsługą formatu liczb decimal=',' / thousands='.' - jest identyczny.
+
+import io
+import re
+
+from lxml import etree
+from pandas.errors import EmptyDataError
+from pandas.io.parsers import TextParser
+
+_RE_WHITESPACE = re.compile(r"[\r\n]+|\s{2,}")
+_text_content = etree.XPath('string()')
+
+
+def iter_tables(html):
+    """
+    Zwraca kolejne elementy <table> w miarę parsowania dokumentu.
+    Tabele, które nie są zagnieżdżone w innych, są zwalniane po przejściu do następnej.
+    """
+    data = html.encode('utf-8') if isinstance(html, str) else html
+    for _, table in etree.iterparse(io.BytesIO(data), events=('end',), tag='table', html=True,
+                                    encoding='utf-8', recover=True, no_network=True):
+        yield table
+        if next(table.iterancestors('table'), None) is None:
+            table.clear(keep_tail=True)
+            while table.getprevious() is not None:
+                del table.getparent()[0]
+
+
+def table_sections(table, displayed_only=True):
+    """Zwraca (nagłówek, treść, stopka) tabeli jako listy wierszy tekstowych."""
+    if displayed_only:
+        for elem in table.xpath('.//style'):
+            _drop(elem)
+        for elem in table.xpath('.//*[@style]'):
+            if 'display:none' in elem.attrib.get('style', '').replace(' ', ''):
+                _drop(elem)
+    for br in table.iter('br'):
+        br.tail = '\n' + (br.tail or '')
+
+    head_rows = []
+    for thead in table.xpath('.//thead'):
+        head_rows.extend(thead.xpath('./tr'))
+        if thead.xpath('./td|./th'):
+            head_rows.append(thead)
+    body_rows = table.xpath('.//tbody//tr') + table.xpath('./tr')
+    foot_rows = table.xpath('.//tfoot//tr')
+
+    if not head_rows:
+        while body_rows and all(cell.tag == 'th' for cell in body_rows[0].xpath('./td|./th')):
+            head_rows.append(body_rows.pop(0))
+
+    head, remainder = _expand_rows(head_rows)
+    body, remainder = _expand_rows(body_rows, remainder, overflow=bool(foot_rows))
+    foot, _ = _expand_rows(foot_rows, remainder, overflow=False)
+    return head, body, foot
+
+
+def sections_to_frame(head, body, foot, header=None, **kwargs):
+    """Buduje DataFrame z wierszy tekstowych tak samo, jak robi to pd.read_html."""
+    rows = head + body
+    if head and header is None:
+        header = 0 if len(head) == 1 else [i for i, row in enumerate(head) if any(row)]
+    rows = rows + foot
+    width = max((len(row) for row in rows), default=0)
+    rows = [row + [''] * (width - len(row)) for row in rows]
+    with TextParser(rows, header=header, skiprows=0, **kwargs) as parser:
+        return parser.read()
+
+
+def extract_table(html, match_header, header=None, **kwargs):
+    """
+    Zwraca DataFrame pierwszej tabeli, której wiersz nagłówka spełnia match_header
+    (funkcja przyjmująca listę tekstów komórek), albo None, jeśli takiej tabeli nie ma.
+    Dodatkowe argumenty (np. decimal=',', thousands='.') trafiają do TextParser.
+    """
+    for table in iter_tables(html):
+        head, body, foot = table_sections(table)
+        rows = head + body
+        if not rows or not match_header(rows[0]):
+            continue
+        try:
+            return sections_to_frame(head, body, foot, header=header, **kwargs)
+        except EmptyDataError:
+            continue
+    return None
+
+
+def _expand_rows(rows, remainder=None, overflow=True):
+    """Rozwija colspan/rowspan - kopia logiki _expand_colspan_rowspan z pandas.io.html."""
+    all_texts = []
+    remainder = remainder if remainder is not None else []
+
+    for tr in rows:
+        texts = []
+        next_remainder = []
+        index = 0
+        for td in tr.xpath('./td|./th'):
+            while remainder and remainder[0][0] <= index:
+                prev_i, prev_text, prev_rowspan = remainder.pop(0)
+                texts.append(prev_text)
+                if prev_rowspan > 1:
+                    next_remainder.append((prev_i, prev_text, prev_rowspan - 1))
+                index += 1
+
+            text = _RE_WHITESPACE.sub(' ', _text_content(td).strip())
+            rowspan = int(td.get('rowspan') or 1)
+            colspan = int(td.get('colspan') or 1)
+            for _ in range(colspan):
+                texts.append(text)
+                if rowspan > 1:
+                    next_remainder.append((index, text, rowspan - 1))
+                index += 1
+
+        for prev_i, prev_text, prev_rowspan in remainder:
+            texts.append(prev_text)
+            if prev_rowspan > 1:
+                next_remainder.append((prev_i, prev_text, prev_rowspan - 1))
+        all_texts.append(texts)
+        remainder = next_remainder
+
+    if not overflow:
+        while remainder:
+            next_remainder = []
+            texts = []
+            for prev_i, prev_text, prev_rowspan in remainder:
+                texts.append(prev_text)
+                if prev_rowspan > 1:
+                    next_remainder.append((prev_i, prev_text, prev_rowspan - 1))
+            all_texts.append(texts)
+            remainder = next_remainder
+
+    return all_texts, remainder
+
+
+def _drop(elem):
+    """Usuwa element razem z poddrzewem, zachowując jego 'tail' (jak lxml.html drop_tree)."""
+    parent = elem.getparent()
+    if parent is None:
+        return
+    if elem.tail:
+        previous = elem.getprevious()
+        if previous is None:
+            parent.text = (parent.text or '') + elem.tail
+        else:
+            previous.tail = (previous.tail or '') + elem.tail
+    parent.remove(elem)
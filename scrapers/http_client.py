@@ -0,0 +1,141 @@
+# Plik: http_client.py
+# Wspólna warstwa HTTP dla scraperów: sesja z pulą połączeń, limiter typu token bucket
+# oraz adaptacyjne wycofanie po odpowiedziach 429/5xx.
+
+import logging
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import metrics     # z katalogu głównego repozytorium
+from page_cache import CacheMiss
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept-Language': 'pl-PL,pl;q=0.9,en-US;q=0.8,en;q=0.7',
+}
+
+REQUEST_RATE = 1.0          # Średnia liczba zapytań na sekundę (budżet "grzeczności")
+REQUEST_BURST = 2           # Ile zapytań może wyjść naraz po okresie bezczynności
+MAX_RETRIES = 3
+RETRY_BACKOFF = 2.0         # Bazowe opóźnienie (s) przy 429/5xx
+RETRY_MAX_DELAY = 60.0      # Górna granica (s) pojedynczego oczekiwania, także dla Retry-After
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """
+    Limiter typu token bucket współdzielony przez wątki.
+    Tempo jest adaptacyjne: penalize() po 429/5xx zmniejsza je o połowę,
+    a reward() po udanym zapytaniu stopniowo przywraca je do wartości początkowej.
+    """
+    def __init__(self, rate=REQUEST_RATE, burst=REQUEST_BURST, min_rate=None):
+        self.max_rate = rate
+        self.rate = rate
+        self.min_rate = min_rate or rate / 16
+        self.capacity = max(1, burst)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self):
+        """Blokuje wątek do czasu, aż dostępny będzie token."""
+        while True:
+            with self._lock:
+                self._refill(time.monotonic())
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def penalize(self):
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+            self._tokens = min(self._tokens, 0.0)
+        logging.warning(f"Serwer ogranicza zapytania - zmniejszam tempo do {self.rate:.2f} zapytań/s.")
+
+    def reward(self):
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 10)
+
+
+def create_session(pool_size=8, headers=None):
+    """Tworzy sesję HTTP z pulą połączeń keep-alive współdzieloną przez wątki."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=0)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers.update(headers or DEFAULT_HEADERS)
+    return session
+
+
+def fetch(session, url, limiter=None, headers=None, timeout=15, retries=MAX_RETRIES):
+    """
+    Pobiera stronę z zachowaniem limitu tempa. Po 429/5xx oraz błędach sieci
+    zwalnia limiter i ponawia zapytanie z wykładniczym opóźnieniem.
+    Zwraca obiekt odpowiedzi; dla pozostałych błędów HTTP rzuca requests.HTTPError.
+    """
+    for attempt in range(retries + 1):
+        if attempt:
+            metrics.count(retries=1)
+        if limiter is not None:
+            limiter.acquire()
+        response = None
+        try:
+            response = session.get(url, headers=headers, timeout=timeout)
+            metrics.count(status=response.status_code, bytes_in=len(response.content))
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+            if attempt == retries:
+                raise
+        if response is not None and response.status_code not in RETRY_STATUSES:
+            if limiter is not None:
+                limiter.reward()
+            response.raise_for_status()
+            return response
+        if response is not None and attempt == retries:
+            response.raise_for_status()
+        if limiter is not None:
+            limiter.penalize()
+        time.sleep(_retry_delay(attempt, response))
+
+
+def fetch_text(session, url, limiter=None, headers=None, timeout=15, cache=None):
+    """
+    Zwraca treść strony jako tekst, korzystając z PageCache (jeśli podany):
+    świeży wpis jest zwracany bez zapytania, przeterminowany jest odświeżany
+    zapytaniem warunkowym, a w trybie offline brak wpisu kończy się CacheMiss.
+    """
+    if cache is None:
+        return fetch(session, url, limiter=limiter, headers=headers, timeout=timeout).text
+
+    meta = cache.lookup(url)
+    if meta is not None and (cache.offline or cache.is_fresh(meta)):
+        return cache.read_text(meta)
+    if cache.offline:
+        raise CacheMiss(url)
+
+    request_headers = dict(headers or {})
+    if meta is not None:
+        request_headers.update(cache.conditional_headers(meta))
+    response = fetch(session, url, limiter=limiter, headers=request_headers, timeout=timeout)
+    if response.status_code == 304 and meta is not None:
+        return cache.read_text(cache.revalidated(meta))
+    cache.store(url, response)
+    return response.text
+
+
+def _retry_delay(attempt, response=None):
+    if response is not None:
+        retry_after = response.headers.get('Retry-After', '')
+        if retry_after.isdigit():
+            # Rozrzut tylko w górę - serwer prosił o co najmniej tyle sekund
+            return min(float(retry_after), RETRY_MAX_DELAY) + random.uniform(0, RETRY_BACKOFF)
+    return min(RETRY_BACKOFF * (2 ** attempt), RETRY_MAX_DELAY) * random.uniform(0.5, 1.5)
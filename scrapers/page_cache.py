@@ -0,0 +1,117 @@
+# Plik: page_cache.py
+# Dyskowy cache surowych odpowiedzi HTTP dla scraperów.
+#
+# Układ katalogu:
+#   {katalog}/bodies/{sha256 treści}.gz  - skompresowane treści stron (adresowane zawartością,
+#                                          identyczne strony zajmują miejsce tylko raz)
+#   {katalog}/index/{sha256 adresu}.json - metadane: URL, ETag, Last-Modified, czas pobrania,
+#                                          kodowanie oraz skrót treści
+#
+# Świeże wpisy (w ramach TTL dla danego typu strony) są zwracane bez zapytania do serwisu,
+# przeterminowane są odświeżane zapytaniem warunkowym (If-None-Match / If-Modified-Since).
+# W trybie offline cache jest jedynym źródłem danych.
+
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+
+CACHE_DIR = os.environ.get('SCRAPER_CACHE_DIR', '.cache/pages')
+
+DAY = 24 * 60 * 60
+DEFAULT_TTL = DAY
+# TTL dla typów stron (fragment adresu -> sekundy). Dane kwartalne zmieniają się rzadko.
+PAGE_TTLS = {
+    'dane-finansowe': 7 * DAY,
+    'wskazniki': DAY,
+    'bankier.pl': DAY,
+}
+
+
+class CacheMiss(Exception):
+    """Brak strony w cache w trybie offline."""
+
+
+class PageCache:
+    def __init__(self, directory=CACHE_DIR, ttls=None, default_ttl=DEFAULT_TTL, offline=False):
+        self.directory = directory
+        self.ttls = PAGE_TTLS if ttls is None else ttls
+        self.default_ttl = default_ttl
+        self.offline = offline
+        os.makedirs(os.path.join(directory, 'bodies'), exist_ok=True)
+        os.makedirs(os.path.join(directory, 'index'), exist_ok=True)
+
+    def ttl_for(self, url):
+        for pattern, ttl in self.ttls.items():
+            if pattern in url:
+                return ttl
+        return self.default_ttl
+
+    def _index_path(self, url):
+        return os.path.join(self.directory, 'index', hashlib.sha256(url.encode('utf-8')).hexdigest() + '.json')
+
+    def _body_path(self, body_hash):
+        return os.path.join(self.directory, 'bodies', body_hash + '.gz')
+
+    def lookup(self, url):
+        """Zwraca metadane wpisu lub None."""
+        path = self._index_path(url)
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            meta = json.load(f)
+        return meta if os.path.exists(self._body_path(meta['body_hash'])) else None
+
+    def is_fresh(self, meta):
+        return time.time() - meta['fetched_at'] < self.ttl_for(meta['url'])
+
+    def read_text(self, meta):
+        with gzip.open(self._body_path(meta['body_hash']), 'rb') as f:
+            return f.read().decode(meta.get('encoding') or 'utf-8', errors='replace')
+
+    def conditional_headers(self, meta):
+        """Nagłówki zapytania warunkowego dla przeterminowanego wpisu."""
+        headers = {}
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+        return headers
+
+    def store(self, url, response):
+        """Zapisuje treść i metadane odpowiedzi 200; zwraca metadane."""
+        content = response.content
+        body_hash = hashlib.sha256(content).hexdigest()
+        body_path = self._body_path(body_hash)
+        if not os.path.exists(body_path):
+            _atomic_write(body_path, gzip.compress(content))
+        meta = {
+            'url': url,
+            'status': response.status_code,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'encoding': response.encoding,
+            'fetched_at': time.time(),
+            'body_hash': body_hash,
+            'size': len(content),
+        }
+        self._write_meta(url, meta)
+        return meta
+
+    def revalidated(self, meta):
+        """Odnotowuje odpowiedź 304 - treść bez zmian, odświeżamy tylko czas pobrania."""
+        meta = dict(meta, fetched_at=time.time())
+        self._write_meta(meta['url'], meta)
+        return meta
+
+    def _write_meta(self, url, meta):
+        _atomic_write(self._index_path(url), json.dumps(meta).encode('utf-8'))
+
+
+def _atomic_write(path, data):
+    tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
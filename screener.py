@@ -0,0 +1,229 @@
+# Plik: screener.py
+# Tabela przeglądowa wszystkich tickerów (skaner) budowana z magazynu notowań (price_store).
+#
+# Jeden wiersz na ticker: ostatni kurs i zmiana, maksimum/minimum 52 tygodni, średni wolumen,
+# stopy zwrotu w kilku horyzontach oraz pola wyceny z wig_company_forecasts.csv.
+# Zapis: data/screener.json w formacie {"columns": [...], "data": [[...], ...]} (+ warianty .gz/.br).
+# Przy aktualizacji przeliczane są tylko tickery, których historia zmieniła się w bieżącym
+# przebiegu - wiersze pozostałych są brane z poprzedniej wersji pliku. Pola wyceny są
+# dołączane na nowo przy każdym zapisie (plik CSV jest mały, a zmienia go inny skrypt).
+#
+# Zapytania z Pythona:
+#   table = load_screener()
+#   query(table, where=[('ret_1r', '>', 0.2), ('pe', '<', 15)], sort_by='ret_1m', ascending=False, limit=20)
+
+import argparse
+import logging
+import operator
+import os
+
+import numpy as np
+import pandas as pd
+
+import artifacts
+import price_store
+
+SCREENER_FILE = 'screener.json'
+FORECASTS_CSV = 'wig_company_forecasts.csv'
+COMPANIES_CSV = 'wig_companies.csv'
+SECONDS_PER_DAY = 86400
+HISTORY_DAYS = 400                  # Ile dni wstecz czytamy z magazynu (52 tygodnie + zapas)
+AVG_VOLUME_BARS = 20
+# Horyzonty stóp zwrotu w dniach kalendarzowych (kurs odniesienia: ostatnie zamknięcie nie później niż N dni temu)
+RETURN_HORIZONS = {'ret_1t': 7, 'ret_1m': 30, 'ret_3m': 91, 'ret_6m': 182, 'ret_1r': 365}
+
+PRICE_FIELDS = ['ticker', 'time', 'close', 'change', 'change_pct', 'high_52w', 'low_52w', 'avg_volume_20',
+                *RETURN_HORIZONS, 'ret_ytd']
+# Pola wyceny: kolumna w wig_company_forecasts.csv -> kolumna skanera
+FORECAST_FIELDS = {
+    'Średnia stopa wzrostu EPS r/r': 'eps_growth',
+    'Średni wskaźnik C/Z': 'pe',
+    'Aktualny EPS': 'eps',
+    'Prognoza EPS na kolejny rok': 'eps_forecast',
+    'Prognoza ceny akcji na następny rok': 'price_forecast',
+}
+SCREENER_COLUMNS = ['ticker', 'name', *PRICE_FIELDS[1:], *FORECAST_FIELDS.values(), 'upside']
+
+OPERATORS = {
+    '<': operator.lt, '<=': operator.le, '>': operator.gt, '>=': operator.ge,
+    '==': operator.eq, '!=': operator.ne,
+}
+
+
+def screener_path(data_dir=price_store.DATA_DIR):
+    return os.path.join(data_dir, SCREENER_FILE)
+
+
+# === OBLICZANIE ===
+
+def price_row(ticker, data_dir=price_store.DATA_DIR):
+    """Wskaźniki cenowe tickera z ostatnich HISTORY_DAYS dni notowań albo None, gdy brak danych."""
+    last = price_store.last_time(ticker, data_dir)
+    if last is None:
+        return None
+    start = last - HISTORY_DAYS * SECONDS_PER_DAY
+    if price_store.load_manifest(ticker, data_dir) is not None:
+        bars = price_store.read_range(ticker, start, data_dir=data_dir, as_frame=False)
+    else:
+        df = price_store.load_bars(ticker, data_dir)
+        df = df[df['time'] >= start]
+        bars = {name: df[name].to_numpy() for name in price_store.PRICE_COLUMNS}
+    return compute_row(ticker, bars)
+
+
+def compute_row(ticker, bars):
+    """Wiersz skanera z kolumn notowań (rosnąco po czasie, co najmniej rok historii dla pełnych wyników)."""
+    times = np.asarray(bars['time'], dtype='int64')
+    close = np.asarray(bars['close'], dtype='float64')
+    if len(times) == 0:
+        return None
+    last_time, last_close = int(times[-1]), float(close[-1])
+    previous = float(close[-2]) if len(close) > 1 else np.nan
+    year_mask = times > last_time - 365 * SECONDS_PER_DAY
+
+    def change_since(moment):
+        # Kurs odniesienia: ostatnie zamknięcie nie później niż `moment`
+        index = np.searchsorted(times, moment, side='right') - 1
+        return last_close / close[index] - 1 if index >= 0 else np.nan
+
+    row = {
+        'ticker': ticker.upper(),
+        'time': last_time,
+        'close': last_close,
+        'change': last_close - previous,
+        'change_pct': last_close / previous - 1 if previous else np.nan,
+        'high_52w': float(np.max(np.asarray(bars['high'], dtype='float64')[year_mask])),
+        'low_52w': float(np.min(np.asarray(bars['low'], dtype='float64')[year_mask])),
+        'avg_volume_20': float(np.nanmean(np.asarray(bars['volume'], dtype='float64')[-AVG_VOLUME_BARS:])),
+    }
+    for name, days in RETURN_HORIZONS.items():
+        row[name] = change_since(last_time - days * SECONDS_PER_DAY)
+    year_start = np.datetime64(np.datetime64(last_time, 's'), 'Y').astype('datetime64[s]').astype('int64')
+    row['ret_ytd'] = change_since(int(year_start) - 1)
+    return row
+
+
+def load_forecasts(base_dir):
+    """Pola wyceny z wig_company_forecasts.csv (liczby; 'N/A' i 'NULL' jako NaN) z kolumną ticker."""
+    path = os.path.join(base_dir, FORECASTS_CSV)
+    if not os.path.exists(path):
+        return pd.DataFrame(columns=['ticker', *FORECAST_FIELDS.values()])
+    df = pd.read_csv(path, keep_default_na=False, dtype=str)
+    result = pd.DataFrame({'ticker': df['Ticker'].str.strip().str.upper()})
+    for column, name in FORECAST_FIELDS.items():
+        result[name] = pd.to_numeric(df[column], errors='coerce') if column in df.columns else np.nan
+    return result.drop_duplicates(subset='ticker', keep='last')
+
+
+def load_names(base_dir):
+    """Nazwy spółek z wig_companies.csv ({ticker: nazwa})."""
+    path = os.path.join(base_dir, COMPANIES_CSV)
+    if not os.path.exists(path):
+        return {}
+    df = pd.read_csv(path, keep_default_na=False, dtype=str)
+    return dict(zip(df['Ticker'].str.strip().str.upper(), df['Nazwa'].str.strip()))
+
+
+def build_table(rows, forecasts, names):
+    """Łączy wiersze cenowe z polami wyceny i nazwami; wynik posortowany po tickerze."""
+    prices = pd.DataFrame(rows, columns=PRICE_FIELDS)
+    table = prices.merge(forecasts, on='ticker', how='left')
+    table['name'] = table['ticker'].map(names)
+    table['upside'] = table['price_forecast'] / table['close'] - 1
+    return table.reindex(columns=SCREENER_COLUMNS).sort_values('ticker', ignore_index=True)
+
+
+# === ZAPIS I ODCZYT ===
+
+def load_screener(data_dir=price_store.DATA_DIR):
+    """Tabela skanera jako DataFrame (pusta, gdy plik jeszcze nie istnieje)."""
+    path = screener_path(data_dir)
+    if not os.path.exists(path):
+        return pd.DataFrame(columns=SCREENER_COLUMNS)
+    table = pd.read_json(path, orient='split', dtype=False, convert_dates=False)
+    return table.reindex(columns=SCREENER_COLUMNS)
+
+
+def update_screener(tickers=None, data_dir=price_store.DATA_DIR, base_dir='.'):
+    """
+    Przelicza wiersze podanych tickerów (None = wszystkich z katalogu danych), pozostałe
+    bierze z poprzedniej wersji pliku, dołącza pola wyceny i zapisuje data/screener.json.
+    Zwraca (tabela, czy plik się zmienił).
+    """
+    previous = load_screener(data_dir)
+    known = set(artifacts.list_tickers(data_dir))
+    if tickers is None or previous.empty:
+        tickers = known
+    tickers = {t.upper() for t in tickers}
+
+    rows = [row for row in previous[PRICE_FIELDS].to_dict('records')
+            if row['ticker'] in known and row['ticker'] not in tickers]
+    for ticker in sorted(tickers & known):
+        try:
+            row = price_row(ticker, data_dir)
+        except Exception as e:
+            logging.warning(f"Nie udało się przeliczyć skanera dla {ticker}: {e}")
+            row = next((r for r in previous[PRICE_FIELDS].to_dict('records') if r['ticker'] == ticker), None)
+        if row is not None:
+            rows.append(row)
+
+    table = build_table(rows, load_forecasts(base_dir), load_names(base_dir))
+    body = table.to_json(orient='split', index=False, force_ascii=False, double_precision=6).encode('utf-8')
+    path = screener_path(data_dir)
+    if os.path.exists(path):
+        with open(path, 'rb') as f:
+            if f.read() == body:
+                return table, False
+    # Plik tymczasowy w tym samym katalogu i os.replace - czytelnik nie zobaczy uciętej tabeli
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(body)
+    os.replace(tmp_path, path)
+    artifacts.compress_file(path, body)
+    return table, True
+
+
+def query(table, where=None, sort_by=None, ascending=True, limit=None, columns=None):
+    """
+    Filtruje i sortuje tabelę skanera.
+    where    - lista warunków (kolumna, operator, wartość); operatory: < <= > >= == != in.
+               Wiersze z brakującą wartością (NaN) nie spełniają warunku.
+    sort_by  - kolumna lub lista kolumn; NaN zawsze na końcu.
+    limit    - maksymalna liczba wierszy; columns - lista zwracanych kolumn.
+    """
+    mask = np.ones(len(table), dtype=bool)
+    for column, op, value in where or []:
+        values = table[column]
+        if op == 'in':
+            mask &= values.isin(value).to_numpy()
+        elif op in OPERATORS:
+            mask &= OPERATORS[op](values, value).fillna(False).to_numpy(dtype=bool)
+        else:
+            raise ValueError(f"Nieznany operator: {op}")
+    result = table[mask]
+    if sort_by is not None:
+        result = result.sort_values(sort_by, ascending=ascending, na_position='last', kind='stable')
+    if limit is not None:
+        result = result.head(limit)
+    if columns is not None:
+        result = result[list(columns)]
+    return result.reset_index(drop=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Buduje tabelę skanera data/screener.json.")
+    parser.add_argument('--data-dir', default=price_store.DATA_DIR)
+    parser.add_argument('--sort', default='ret_1r', help="Kolumna sortowania podglądu.")
+    parser.add_argument('--limit', type=int, default=10, help="Liczba wierszy podglądu.")
+    parser.add_argument('tickers', nargs='*', help="Tickery do przeliczenia (domyślnie wszystkie).")
+    args = parser.parse_args(argv)
+
+    table, changed = update_screener(args.tickers or None, args.data_dir)
+    print(f"Skaner: {len(table)} tickerów, plik {'zaktualizowany' if changed else 'bez zmian'}.")
+    with pd.option_context('display.width', 200, 'display.max_columns', 12):
+        print(query(table, sort_by=args.sort, ascending=False, limit=args.limit,
+                    columns=['ticker', 'name', 'close', 'change_pct', args.sort, 'pe', 'upside']))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,236 @@
+# Plik: analytics_reference.py
+# Wzorzec do testów scrapers/analytics.py: procedury Calculate_Wig_Annual_Summary
+# i GenerateForecasts (mysql_procedure/) przepisane wiersz po wierszu, na decimal.Decimal.
+#
+# Celowo bez pandas i bez wektoryzacji - każda funkcja odpowiada jednemu krokowi procedury,
+# a każde wyrażenie jednemu wyrażeniu SQL, tak aby zgodność dało się sprawdzić wzrokiem.
+# Wejście i wyjście to listy słowników (wiersze tabel).
+
+import decimal
+import math
+import re
+from collections import OrderedDict
+from decimal import Decimal, ROUND_HALF_UP
+
+import numpy as np
+
+# Wystarczająca precyzja, aby dzielenie DECIMAL nie gubiło cyfr przed zaokrągleniem
+CONTEXT = decimal.Context(prec=80)
+
+_SPACE = '\t\n\v\f\r'
+
+
+# === RZUTOWANIA MYSQL ===
+
+def is_null(value):
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+
+def replace_spaces(value):
+    """REPLACE(x, ' ', '') - kolumna DOUBLE jest najpierw zamieniana na tekst."""
+    if isinstance(value, float):
+        text = repr(value)
+        return text[:-2] if text.endswith('.0') else text
+    return str(value).replace(' ', '')
+
+
+def cast_signed(value):
+    if is_null(value):
+        return None
+    match = re.match(rf'^[{_SPACE}]*([+-]?\d+)', replace_spaces(value))
+    return int(match.group(1)) if match else 0
+
+
+def cast_unsigned(value):
+    signed = cast_signed(value)
+    return None if signed is None else signed % 2 ** 64
+
+
+def cast_decimal0(value):
+    """CAST(... AS DECIMAL(20,0))."""
+    if is_null(value):
+        return None
+    sign, whole, fraction = re.match(rf'^[{_SPACE}]*([+-]?)(\d*)(?:\.(\d*))?', replace_spaces(value)).groups()
+    if not whole and not fraction:
+        return 0
+    number = int(Decimal(f"{whole or '0'}.{fraction or '0'}").quantize(Decimal(1), ROUND_HALF_UP))
+    return -number if sign == '-' else number
+
+
+def cast_double(value):
+    if is_null(value):
+        return None
+    match = re.match(rf'^[{_SPACE}]*([+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)', replace_spaces(value))
+    return float(match.group(1)) if match else 0.0
+
+
+# === ARYTMETYKA DECIMAL I DOUBLE ===
+
+def round_decimal(value, digits):
+    """ROUND(decimal, digits)."""
+    return value.quantize(Decimal(1).scaleb(-digits), ROUND_HALF_UP)
+
+
+def divide_decimal(numerator, denominator, scale):
+    """Dzielenie DECIMAL: wynik ze skalą `scale` (skala dzielnej + 4); dzielenie przez 0 daje NULL."""
+    if denominator == 0:
+        return None
+    return round_decimal(CONTEXT.divide(Decimal(numerator), Decimal(denominator)), scale)
+
+
+def round_double(value, digits):
+    """ROUND(double, digits)."""
+    return float(np.round(value, digits))
+
+
+def avg(values):
+    """AVG(double) - suma po kolei, z pominięciem NULL."""
+    values = [v for v in values if v is not None and not math.isnan(v)]
+    if not values:
+        return None
+    total = 0.0
+    for value in values:
+        total += value
+    return total / len(values)
+
+
+# === CALCULATE_WIG_ANNUAL_SUMMARY ===
+
+def temp_annual_summary(rows):
+    groups = OrderedDict()
+    for row in rows:
+        quarter = row['Kwartał']
+        if not isinstance(quarter, str) or not re.match(r'^Q[1-4][0-9]{4}$', quarter, re.IGNORECASE):
+            continue
+        groups.setdefault((row['Spółka'], row['Ticker'], quarter[-4:]), []).append(row)
+
+    result = []
+    for (company, ticker, year), group in groups.items():
+        valid_quarters_count = sum(
+            1 for r in group if not is_null(r['Liczba akcji']) and not is_null(r['Zysk netto']) and not is_null(r['Kurs']))
+        if valid_quarters_count != 4:
+            continue
+        q4 = [r for r in group if r['Kwartał'].upper().startswith('Q4')]
+        profit_sum = sum(cast_signed(r['Zysk netto']) * 1000 if not is_null(r['Zysk netto']) else 0 for r in group)
+        shares_q4 = [cast_unsigned(r['Liczba akcji']) for r in q4 if not is_null(r['Liczba akcji'])]
+        price_q4 = [cast_double(r['Kurs']) for r in q4 if not is_null(r['Kurs'])]
+        shares_q4 = max(shares_q4) if shares_q4 else None
+        price_q4 = max(price_q4) if price_q4 else None
+        result.append({
+            'Spółka': company, 'Ticker': ticker, 'Rok': int(year),
+            'Zysk netto sum': profit_sum, 'Liczba Akcji Q4': shares_q4, 'Kurs Q4': price_q4,
+            # SIGNED / UNSIGNED: DECIMAL ze skalą 4; NULL w mianowniku daje NULL
+            'current_year_eps': None if shares_q4 is None else divide_decimal(profit_sum, shares_q4, 4),
+        })
+    return result
+
+
+def eps_growth(current, previous):
+    """CASE ... END wewnątrz COALESCE(..., 0); argumenty to DECIMAL ze skalą 4 lub None."""
+    if previous is None:
+        return None
+    if previous == 0:
+        return Decimal(0)
+    if current is None:
+        return None
+    if previous < 0 and current >= 0:
+        return (divide_decimal(current, abs(previous), 8) + 1) * 100
+    if previous < 0 and current < 0:
+        return divide_decimal(current - previous, abs(previous), 8) * 100
+    return divide_decimal(current - previous, previous, 8) * 100
+
+
+def calculate_wig_annual_summary(rows):
+    t1_rows = temp_annual_summary(rows)
+    temp_prev_year_eps = {(t['Ticker'], t['Rok'] + 1): t['current_year_eps'] for t in t1_rows}
+
+    result = []
+    for t1 in t1_rows:
+        eps = t1['current_year_eps']
+        prev_year_eps = temp_prev_year_eps.get((t1['Ticker'], t1['Rok']))
+        growth = eps_growth(eps, prev_year_eps)
+        if eps is None or eps == 0 or t1['Kurs Q4'] is None:
+            price_to_earnings = None
+        else:
+            price_to_earnings = round_double(t1['Kurs Q4'] / float(eps), 2)
+        result.append({
+            'Spółka': t1['Spółka'],
+            'Ticker': t1['Ticker'],
+            'Rok': t1['Rok'],
+            'EPS': None if eps is None else float(round_decimal(eps, 2)),
+            'C/Z': price_to_earnings,
+            'Procentowa zmiana EPS r/r': 0.0 if growth is None else float(round_decimal(growth, 2)),
+            'Zysk netto': t1['Zysk netto sum'],
+            'Liczba akcji': t1['Liczba Akcji Q4'],
+            'Kurs': t1['Kurs Q4'],
+        })
+    # Kolejność klucza głównego wig_annual_summary
+    return sorted(result, key=lambda r: (r['Ticker'], r['Rok']))
+
+
+# === GENERATEFORECASTS ===
+
+def temp_annual_stats(annual, start_year, end_year):
+    groups = OrderedDict()
+    for row in sorted(annual, key=lambda r: (r['Ticker'], r['Rok'])):
+        if start_year <= row['Rok'] <= end_year:
+            groups.setdefault((row['Ticker'], row['Spółka']), []).append(row)
+
+    result = []
+    for (ticker, company), group in sorted(groups.items()):
+        last_eps = [r['EPS'] for r in group if r['Rok'] == end_year and r['EPS'] is not None]
+        result.append({
+            'Ticker': ticker, 'Spółka': company,
+            'avg_eps_growth': avg([r['Procentowa zmiana EPS r/r'] for r in group]),
+            'avg_pe_ratio': avg([r['C/Z'] for r in group]),
+            'last_eps': max(last_eps) if last_eps else None,
+            'years_count': end_year - start_year + 1,
+        })
+    return result
+
+
+def temp_latest_eps(rows):
+    """Wiersze w kolejności kolumny id z wig_indicators_with_id (ostatni = najnowszy)."""
+    by_ticker = OrderedDict()
+    for row in rows:
+        by_ticker.setdefault(row['Ticker'], []).append(row)
+    result = {}
+    for ticker, group in by_ticker.items():
+        ranked = group[::-1][:4]
+        total_net_profit = sum(cast_decimal0(r['Zysk netto']) or 0 for r in ranked) * 1000
+        result[ticker] = {'TotalNetProfit': total_net_profit, 'LatestShareCount': cast_unsigned(ranked[0]['Liczba akcji']) or 0}
+    return result
+
+
+def generate_forecasts(annual, rows, start_year, end_year):
+    latest = temp_latest_eps(rows)
+    result = []
+    for t1 in temp_annual_stats(annual, start_year, end_year):
+        t2 = latest.get(t1['Ticker'], {'TotalNetProfit': 0, 'LatestShareCount': 0})
+        growth, pe, last_eps = t1['avg_eps_growth'], t1['avg_pe_ratio'], t1['last_eps']
+        forecast_eps = None if last_eps is None or growth is None else last_eps * (1 + growth / 100)
+
+        if (forecast_eps is not None and forecast_eps <= 0) or (pe is not None and pe <= 0):
+            price = 'N/A'
+        elif forecast_eps is None or pe is None:
+            price = None
+        else:
+            price = replace_spaces(round_double(forecast_eps * pe, 2))
+
+        if t2['LatestShareCount'] > 0:
+            current_eps = float(round_decimal(divide_decimal(t2['TotalNetProfit'], t2['LatestShareCount'], 4), 2))
+        else:
+            current_eps = 0.0
+
+        result.append({
+            'Spółka': t1['Spółka'],
+            'Ticker': t1['Ticker'],
+            'Średnia stopa wzrostu EPS r/r': None if growth is None else round_double(growth, 2),
+            'Średni wskaźnik C/Z': None if pe is None else round_double(pe, 2),
+            'Prognoza EPS na kolejny rok': None if forecast_eps is None else round_double(forecast_eps, 2),
+            'Prognoza ceny akcji na następny rok': price,
+            'EPS za poprzedni rok': last_eps,
+            'Aktualny EPS': current_eps,
+            'Obliczona Średnia z Ostatnich lat': t1['years_count'],
+        })
+    return result
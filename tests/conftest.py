@@ -0,0 +1,11 @@
+# Plik: conftest.py
+# Moduły z katalogu głównego i ze scrapers/ są importowane bez pakietu, jak w skryptach.
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+for path in (ROOT, os.path.join(ROOT, 'scrapers')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
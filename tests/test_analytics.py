@@ -0,0 +1,160 @@
+# Plik: test_analytics.py
+# scrapers/analytics.py kontra transkrypcja procedur MySQL (analytics_reference.py)
+# oraz zgodność przyrostowego AnalyticsEngine z pełnym przeliczeniem.
+
+import pickle
+import random
+
+import pandas as pd
+import pytest
+
+import analytics
+import analytics_reference as reference
+
+YEARS = range(2015, 2025)
+
+
+def indicator_rows(tickers=60, seed=5):
+    """Dane kwartalne z przypadkami brzegowymi: NULL-e, '-', ułamki, zero akcji, twarde spacje."""
+    rng = random.Random(seed)
+    rows = []
+    for t in range(tickers):
+        shares = rng.choice([1000, 50_000, 3_333_333, 12_345_678, 7])
+        for year in YEARS:
+            for q in (4, 3, 2, 1):
+                profit = rng.choice([rng.randint(-5000, 5000), rng.randint(-50, 50), 0, 1])
+                row = {'Spółka': f'SP{t}', 'Ticker': f'T{t}', 'Kwartał': f'Q{q}{year}',
+                       'Liczba akcji': f'{shares:,}'.replace(',', ' '), 'Zysk netto': f'{profit:,}'.replace(',', ' '),
+                       'Kurs': round(rng.uniform(0.1, 500), 2)}
+                x = rng.random()
+                if x < 0.02:
+                    row['Zysk netto'] = None
+                elif x < 0.03:
+                    row['Kurs'] = None
+                elif x < 0.04:
+                    row['Zysk netto'] = '-'
+                elif x < 0.05 and q == 4:
+                    row['Liczba akcji'] = ''
+                elif x < 0.06:
+                    row['Zysk netto'] = f'{profit}.5'
+                elif x < 0.07 and q == 4:
+                    row['Liczba akcji'] = '0'
+                elif x < 0.08:
+                    row['Zysk netto'] = '12\xa0345'
+                rows.append(row)
+        # Kwartał niezgodny z '^Q[1-4][0-9]{4}$' - pomijany w podsumowaniu, liczony w "Aktualnym EPS"
+        rows.append({'Spółka': f'SP{t}', 'Ticker': f'T{t}', 'Kwartał': 'Q12025.1',
+                     'Liczba akcji': '5', 'Zysk netto': '3', 'Kurs': 1.0})
+    return pd.DataFrame(rows, columns=analytics.INPUT_COLUMNS)
+
+
+def assert_same_rows(expected, got):
+    assert len(got) == len(expected) > 0
+    assert list(got.columns) == list(expected[0])
+    for column in got.columns:
+        want = [row[column] for row in expected]
+        have = got[column].tolist()
+        mismatched = [(i, w, h) for i, (w, h) in enumerate(zip(want, have))
+                      if not (w == h or (pd.isna(w) and pd.isna(h)))]
+        assert not mismatched, (column, mismatched[:5])
+
+
+@pytest.fixture(scope='module')
+def indicators():
+    return indicator_rows()
+
+
+def test_annual_summary_matches_procedure(indicators):
+    expected = reference.calculate_wig_annual_summary(indicators.to_dict('records'))
+    got = analytics.annual_summary(indicators)
+    assert_same_rows(expected, got)
+    # Przypadki brzegowe rzeczywiście występują w danych
+    assert got['EPS'].isna().any()
+    assert (got['Procentowa zmiana EPS r/r'] < 0).any()
+
+
+@pytest.mark.parametrize('start_year, end_year', [(2020, 2024), (2016, 2018), (2024, 2024)])
+def test_forecasts_match_procedure(indicators, start_year, end_year):
+    rows = indicators.to_dict('records')
+    expected = reference.generate_forecasts(reference.calculate_wig_annual_summary(rows), rows, start_year, end_year)
+    got = analytics.forecasts(analytics.annual_summary(indicators), analytics.latest_eps(indicators), start_year, end_year)
+    assert_same_rows(expected, got)
+    assert (got['Prognoza ceny akcji na następny rok'] == 'N/A').any()
+
+
+def test_single_company_by_hand():
+    rows = [{'Spółka': 'Alfa', 'Ticker': 'ALF', 'Kwartał': f'Q{q}{year}', 'Liczba akcji': '1 000',
+             'Zysk netto': '250' if year == 2023 else '500', 'Kurs': 40.0}
+            for year in (2023, 2024) for q in (4, 3, 2, 1)]
+    indicators = pd.DataFrame(rows)
+
+    annual = analytics.annual_summary(indicators)
+    assert annual['EPS'].tolist() == [1000.0, 2000.0]
+    assert annual['C/Z'].tolist() == [0.04, 0.02]
+    assert annual['Procentowa zmiana EPS r/r'].tolist() == [0.0, 100.0]
+
+    forecast = analytics.forecasts(annual, analytics.latest_eps(indicators), 2023, 2024).iloc[0]
+    assert forecast['Średnia stopa wzrostu EPS r/r'] == 50.0
+    assert forecast['Prognoza EPS na kolejny rok'] == 3000.0
+    assert forecast['Prognoza ceny akcji na następny rok'] == '90'
+    # 4 ostatnie wiersze (kolejność wejścia): 4 x 500 tys. zł / 1000 akcji
+    assert forecast['Aktualny EPS'] == 2000.0
+
+
+def test_engine_incremental_equals_fresh_recompute(indicators):
+    engine = analytics.AnalyticsEngine()
+    assert len(engine.update(indicators)) == indicators['Ticker'].nunique()
+    engine.forecasts(2020, 2024)
+    engine.forecasts(2016, 2018)
+
+    changed = indicators.copy()
+    changed.loc[changed['Ticker'] == 'T3', 'Kurs'] += 1
+    changed.loc[(changed['Ticker'] == 'T7') & (changed['Kwartał'] == 'Q42024'), 'Zysk netto'] = '-900'
+    assert engine.update(changed) == {'T3', 'T7'}
+    assert engine.update(changed) == set()
+
+    # Znikający ticker oraz nowy ticker
+    changed = pd.concat([changed[changed['Ticker'] != 'T5'],
+                         indicator_rows(tickers=1, seed=9).assign(Ticker='NEW', Spółka='Nowa')], ignore_index=True)
+    assert engine.update(changed) == {'NEW'}
+
+    annual = analytics.annual_summary(changed)
+    pd.testing.assert_frame_equal(engine.annual, annual)
+    for start_year, end_year in [(2020, 2024), (2016, 2018), (2022, 2024)]:
+        fresh = analytics.forecasts(annual, analytics.latest_eps(changed), start_year, end_year)
+        pd.testing.assert_frame_equal(engine.forecasts(start_year, end_year), fresh)
+
+
+def test_engine_save_and_load(indicators, tmp_path):
+    engine = analytics.AnalyticsEngine()
+    engine.update(indicators)
+    path = tmp_path / 'analytics.pkl'
+    engine.save(path)
+
+    restored = analytics.AnalyticsEngine.load(path)
+    assert restored.update(indicators) == set()
+    pd.testing.assert_frame_equal(restored.forecasts(2020, 2024), engine.forecasts(2020, 2024))
+
+
+def test_engine_discards_state_from_other_code(indicators, tmp_path, monkeypatch):
+    engine = analytics.AnalyticsEngine()
+    engine.update(indicators)
+    path = tmp_path / 'analytics.pkl'
+    engine.save(path)
+    assert not (tmp_path / 'analytics.pkl.tmp').exists()
+
+    monkeypatch.setattr(analytics, 'code_version', lambda: 'inny kod')
+    restored = analytics.AnalyticsEngine.load(path)
+    assert restored.fingerprints == {}
+    assert len(restored.update(indicators)) == indicators['Ticker'].nunique()
+    monkeypatch.undo()
+
+    monkeypatch.setattr(analytics, 'STATE_VERSION', analytics.STATE_VERSION + 1)
+    assert analytics.AnalyticsEngine.load(path).fingerprints == {}
+    monkeypatch.undo()
+
+    # Stary format (sam __dict__) oraz uszkodzony plik
+    path.write_bytes(pickle.dumps(engine.__dict__))
+    assert analytics.AnalyticsEngine.load(path).fingerprints == {}
+    path.write_bytes(b'\x80uszkodzony')
+    assert analytics.AnalyticsEngine.load(path).fingerprints == {}
@@ -0,0 +1,56 @@
+# Plik: test_backtest.py
+# Wektorowe prognozy z scrapers/backtest.py kontra analytics.forecasts dla tych samych okien.
+
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import analytics
+import backtest
+
+YEARS = range(2005, 2025)
+
+
+@pytest.fixture(scope='module')
+def annual():
+    rng = random.Random(18)
+    rows = []
+    for t in range(150):
+        shares = rng.choice([7, 1000, 3_333_333, 12_345_678])
+        for year in YEARS:
+            if rng.random() < 0.05:
+                continue            # Brakujący rok w środku historii
+            for q in (4, 3, 2, 1):
+                rows.append({'Spółka': f'SP{t}', 'Ticker': f'T{t}', 'Kwartał': f'Q{q}{year}',
+                             'Liczba akcji': str(shares), 'Zysk netto': str(rng.randint(-3000, 9000)),
+                             'Kurs': round(rng.uniform(0.5, 900), 2)})
+    return analytics.annual_summary(pd.DataFrame(rows))
+
+
+def procedure_prices(annual, tickers, start_year, end_year):
+    # "Aktualny EPS" nie wpływa na prognozę ceny
+    latest = pd.DataFrame({'Ticker': tickers, 'TotalNetProfit': 0, 'LatestShareCount': 0})
+    result = analytics.forecasts(annual, latest, start_year, end_year).set_index('Ticker')
+    prices = result['Prognoza ceny akcji na następny rok'].reindex(tickers)
+    return pd.to_numeric(prices, errors='coerce').to_numpy(dtype='float64')
+
+
+@pytest.mark.parametrize('length', [1, 3, 5, 8, 10, 13])
+def test_window_forecasts_match_procedure(annual, length):
+    tickers, _, years, arrays = backtest.annual_arrays(annual)
+    forecasts = backtest.window_forecasts(arrays, length)
+    for end_year in years[length - 1:]:
+        expected = procedure_prices(annual, tickers, end_year - length + 1, end_year)
+        # Dokładna równość - sumy w średnich muszą być liczone w tej samej kolejności co AVG()
+        np.testing.assert_array_equal(forecasts[:, end_year - years[0]], expected, err_msg=f'okno {length}, rok {end_year}')
+
+
+def test_window_means_add_values_in_order():
+    # Po kolei każda jedynka ginie przy 1e16; sumowanie parami (np.sum od 8 elementów) zachowałoby je
+    values = np.array([[1e16] + [1.0] * 8 + [-1e16]])
+    means, counts = backtest.window_means(values, 10)
+    assert counts[0, -1] == 10
+    assert means[0, -1] == analytics._sequential_mean(values[0]) == 0.0
+    assert values[0].sum() != 0.0
@@ -0,0 +1,141 @@
+# Plik: test_db_loader.py
+# Liczniki inserted/updated/unchanged/deleted z db_loader.load_dataframe na bazie SQLite.
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, inspect
+
+from db_loader import load_dataframe
+
+TABLE = 'wig_indicators_summary'
+
+
+def quarterly_rows(tickers=('PKO', 'PZU', 'KGH'), years=(2023, 2024)):
+    rows = []
+    for n, ticker in enumerate(tickers):
+        for year in years:
+            for q in (4, 3, 2, 1):
+                rows.append({'Spółka': f'Spółka {ticker}', 'Ticker': ticker, 'Kwartał': f'Q{q}{year}',
+                             'Liczba akcji': str(1000 * (n + 1)), 'Zysk netto': str(10 * q + year % 100),
+                             'Kurs': float(q + n) + 0.25})
+    return pd.DataFrame(rows)
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'gpw.db'}")
+    yield engine
+    engine.dispose()
+
+
+def read_table(engine):
+    return pd.read_sql_table(TABLE, engine).sort_values(['Ticker', 'Kwartał']).reset_index(drop=True)
+
+
+def test_first_load_into_missing_table(engine):
+    df = quarterly_rows()
+    stats = load_dataframe(df, engine, TABLE)
+    assert stats == {'inserted': len(df), 'updated': 0, 'unchanged': 0, 'deleted': 0}
+    assert inspect(engine).get_pk_constraint(TABLE)['constrained_columns'] == ['Ticker', 'Kwartał']
+
+
+def test_full_rebuild_into_missing_table(engine):
+    df = quarterly_rows()
+    stats = load_dataframe(df, engine, TABLE, full_rebuild=True)
+    assert stats == {'inserted': len(df), 'updated': 0, 'unchanged': 0, 'deleted': 0}
+    assert len(read_table(engine)) == len(df)
+
+
+def test_legacy_table_without_primary_key_is_migrated(engine):
+    df = quarterly_rows()
+    legacy = pd.concat([df.head(10), df[df['Ticker'] == 'PKO'].assign(Ticker='OLD')], ignore_index=True)
+    legacy.to_sql(TABLE, engine, index=False)
+
+    stats = load_dataframe(df, engine, TABLE)
+
+    # 10 wierszy bez zmian, reszta nowa, 8 wierszy spółki OLD znika przy przebudowie
+    assert stats == {'inserted': len(df) - 10, 'updated': 0, 'unchanged': 10, 'deleted': 8}
+    assert inspect(engine).get_pk_constraint(TABLE)['constrained_columns'] == ['Ticker', 'Kwartał']
+    assert set(read_table(engine)['Ticker']) == {'PKO', 'PZU', 'KGH'}
+    assert not inspect(engine).has_table(f'{TABLE}_new')
+    assert not inspect(engine).has_table(f'{TABLE}_old')
+
+
+def test_rerun_without_changes(engine):
+    df = quarterly_rows()
+    load_dataframe(df, engine, TABLE)
+    stats = load_dataframe(df, engine, TABLE)
+    assert stats == {'inserted': 0, 'updated': 0, 'unchanged': len(df), 'deleted': 0}
+    assert not inspect(engine).has_table(f'{TABLE}_staging')
+
+
+def test_partial_upsert(engine):
+    df = quarterly_rows()
+    load_dataframe(df, engine, TABLE)
+
+    changed = df.copy()
+    changed.loc[3, 'Kurs'] = 99.5
+    changed.loc[5, 'Zysk netto'] = '-7'
+    added = df[df['Ticker'] == 'PKO'].head(2).assign(Kwartał=['Q12025', 'Q22025'])
+    # Wierszy nieobecnych w nowych danych (tu: KGH) upsert nie usuwa
+    partial = pd.concat([changed[changed['Ticker'] != 'KGH'], added], ignore_index=True)
+
+    stats = load_dataframe(partial, engine, TABLE)
+
+    assert stats == {'inserted': 2, 'updated': 2, 'unchanged': len(partial) - 4, 'deleted': 0}
+    stored = read_table(engine).set_index(['Ticker', 'Kwartał'])
+    assert len(stored) == len(df) + 2
+    assert stored.loc[(df.loc[3, 'Ticker'], df.loc[3, 'Kwartał']), 'Kurs'] == 99.5
+    assert stored.loc[(df.loc[5, 'Ticker'], df.loc[5, 'Kwartał']), 'Zysk netto'] == '-7'
+    assert ('PKO', 'Q22025') in stored.index
+
+
+def test_full_rebuild_swaps_table(engine):
+    df = quarterly_rows()
+    load_dataframe(df, engine, TABLE)
+
+    subset = df[df['Ticker'] != 'PZU'].copy()
+    subset.loc[subset.index[0], 'Kurs'] = 0.5
+    stats = load_dataframe(subset, engine, TABLE, full_rebuild=True)
+
+    removed = int((df['Ticker'] == 'PZU').sum())
+    assert stats == {'inserted': 0, 'updated': 1, 'unchanged': len(subset) - 1, 'deleted': removed}
+    stored = read_table(engine)
+    assert len(stored) == len(subset)
+    assert 'PZU' not in set(stored['Ticker'])
+    assert inspect(engine).get_pk_constraint(TABLE)['constrained_columns'] == ['Ticker', 'Kwartał']
+    assert not inspect(engine).has_table(f'{TABLE}_new')
+    assert not inspect(engine).has_table(f'{TABLE}_old')
+
+
+def annual_rows():
+    """Wiersze jak z analytics.annual_summary: kolumny Int64 (z NULL-ami) i int64, klucz (Ticker, Rok)."""
+    return pd.DataFrame({
+        'Ticker': ['PKO'] * 4 + ['PZU'] * 4,
+        'Rok': [2021, 2022, 2023, 2024] * 2,
+        'EPS': [1.5, 2.25, None, 3.0, 0.5, 0.75, 1.0, 1.25],
+        'Zysk netto': pd.array([1000, 2000, None, 4000, 500, 750, 1000, 1250], dtype='Int64'),
+        'Liczba akcji': pd.array([1000] * 8, dtype='Int64'),
+        'Kwartały': [4] * 8,
+    })
+
+
+def test_integer_columns_with_new_key_are_unchanged(engine):
+    df = annual_rows()
+    keys = ['Ticker', 'Rok']
+    load_dataframe(df[df['Rok'] < 2024], engine, TABLE, key_columns=keys)
+
+    # Nowy klucz sprawia, że złączenie zamienia kolumny całkowite z bazy na float
+    stats = load_dataframe(df, engine, TABLE, key_columns=keys)
+    assert stats == {'inserted': 2, 'updated': 0, 'unchanged': 6, 'deleted': 0}
+
+    changed = df.copy()
+    changed.loc[0, 'Zysk netto'] = 1001
+    changed.loc[1, 'Liczba akcji'] = pd.NA
+    changed.loc[2, 'Kwartały'] = 3
+    stats = load_dataframe(pd.concat([changed, df.head(1).assign(Rok=2025)], ignore_index=True),
+                           engine, TABLE, key_columns=keys)
+    assert stats == {'inserted': 1, 'updated': 3, 'unchanged': 5, 'deleted': 0}
+    stored = pd.read_sql_table(TABLE, engine).set_index(keys)
+    assert stored.loc[('PKO', 2021), 'Zysk netto'] == 1001
+    assert pd.isna(stored.loc[('PKO', 2022), 'Liczba akcji'])
@@ -0,0 +1,74 @@
+# Plik: test_price_store.py
+# Zapis manifestu tickera w price_store.
+
+import json
+import os
+
+import pandas as pd
+import pytest
+
+import price_store
+
+
+def bars(days, start='2024-01-02'):
+    times = [int(day.timestamp()) for day in pd.date_range(start, periods=days, freq='B')]
+    close = [100.0 + i for i in range(days)]
+    return pd.DataFrame({'time': times, 'open': close, 'high': close, 'low': close, 'close': close, 'volume': 1000.0})
+
+
+def test_save_bars_writes_manifest(tmp_path):
+    changed = price_store.save_bars('PKO', bars(10), str(tmp_path))
+    manifest = price_store.load_manifest('PKO', str(tmp_path))
+    assert manifest['rows'] == 10
+    assert [p['year'] for p in manifest['partitions']] == [2024]
+    assert sorted(os.path.basename(p) for p in changed) == ['2024.bin', '2024.json']
+    assert not any(name.endswith('.tmp') for name in os.listdir(tmp_path / 'PKO'))
+
+
+def test_failed_manifest_write_keeps_previous_manifest(tmp_path, monkeypatch):
+    price_store.save_bars('PKO', bars(10), str(tmp_path))
+    path = tmp_path / 'PKO' / price_store.MANIFEST_FILE
+    before = path.read_text()
+
+    dump = json.dump
+
+    def broken_dump(obj, f, **kwargs):
+        if not (isinstance(obj, dict) and 'partitions' in obj):
+            return dump(obj, f, **kwargs)
+        f.write('{"ticker": "PK')
+        raise OSError("Brak miejsca na dysku")
+
+    monkeypatch.setattr(json, 'dump', broken_dump)
+    with pytest.raises(OSError):
+        price_store.save_bars('PKO', bars(12), str(tmp_path), replace=False)
+    monkeypatch.undo()
+
+    assert path.read_text() == before
+    assert price_store.load_manifest('PKO', str(tmp_path))['rows'] == 10
+
+
+def test_legacy_file_removed_only_after_manifest(tmp_path, monkeypatch):
+    legacy = tmp_path / 'PKO.json'
+    legacy.write_text(bars(10).to_json(orient='records'))
+
+    def broken_save_manifest(ticker, manifest, data_dir):
+        raise OSError("Brak miejsca na dysku")
+
+    monkeypatch.setattr(price_store, 'save_manifest', broken_save_manifest)
+    with pytest.raises(OSError):
+        price_store.save_bars('PKO', bars(3, start='2024-02-01'), str(tmp_path), replace=False)
+    monkeypatch.undo()
+    assert legacy.exists()
+
+    changed = price_store.save_bars('PKO', bars(3, start='2024-02-01'), str(tmp_path), replace=False)
+    assert not legacy.exists()
+    assert changed[-1] == str(legacy)
+    assert price_store.load_manifest('PKO', str(tmp_path))['rows'] == 13
+
+
+def test_export_json_replaces_partition_atomically(tmp_path):
+    price_store.save_bars('PKO', bars(10), str(tmp_path))
+    path = price_store.export_json('PKO', 2024, str(tmp_path))
+    with open(path) as f:
+        assert len(json.load(f)) == 10
+    assert not any(name.endswith('.tmp') for name in os.listdir(tmp_path / 'PKO'))